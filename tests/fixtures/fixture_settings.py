@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Кэш в памяти процесса (locmem) переживает тесты, поэтому чистим его.
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def sync_thumbnails(settings):
+    # Иначе пул дописывает миниатюры уже после подмены MEDIA_ROOT.
+    settings.THUMBNAIL_ASYNC = False
@@ -0,0 +1,114 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import RequestProfile
+
+
+def _average(total, profile):
+    return round(total / profile.requests, 4) if profile.requests else 0
+
+
+class RequestProfileAdmin(admin.ModelAdmin):
+    """
+    Сводка ProfilingMiddleware по адресам: средние на один замер
+    и стеки вызовов для flame graph.
+    """
+
+    list_display = (
+        'view_name',
+        'requests',
+        'average_wall_time',
+        'max_wall_time',
+        'average_cpu_time',
+        'average_sql_count',
+        'average_sql_time',
+        'average_template_time',
+        'cache_hit_rate',
+        'updated',
+    )
+    search_fields = ('view_name',)
+    ordering = ('-wall_time',)
+    readonly_fields = (
+        'view_name',
+        'requests',
+        'wall_time',
+        'max_wall_time',
+        'cpu_time',
+        'sql_count',
+        'sql_time',
+        'template_time',
+        'cache_hits',
+        'cache_misses',
+        'updated',
+        'collapsed_stacks',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<path:object_id>/stacks/',
+                self.admin_site.admin_view(self.stacks_view),
+                name='core_requestprofile_stacks',
+            ),
+        ] + super().get_urls()
+
+    def stacks_view(self, request, object_id):
+        """Стеки в свёрнутом виде для flamegraph.pl и speedscope."""
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        lines = (
+            f'{stack} {samples}\n'
+            for stack, samples in profile.stacks.order_by(
+                '-samples'
+            ).values_list('stack', 'samples')
+        )
+        response = HttpResponse(lines, content_type='text/plain')
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile.view_name}.folded"'
+        )
+        return response
+
+    def average_wall_time(self, profile):
+        return _average(profile.wall_time, profile)
+
+    def average_cpu_time(self, profile):
+        return _average(profile.cpu_time, profile)
+
+    def average_sql_count(self, profile):
+        return _average(profile.sql_count, profile)
+
+    def average_sql_time(self, profile):
+        return _average(profile.sql_time, profile)
+
+    def average_template_time(self, profile):
+        return _average(profile.template_time, profile)
+
+    def cache_hit_rate(self, profile):
+        total = profile.cache_hits + profile.cache_misses
+        return f'{profile.cache_hits / total:.0%}' if total else '-'
+
+    def collapsed_stacks(self, profile):
+        count = profile.stacks.count()
+        if not count:
+            return '-'
+        return format_html(
+            '<a href="{}">Скачать ({} стеков)</a>',
+            reverse('admin:core_requestprofile_stacks', args=[profile.pk]),
+            count,
+        )
+
+    average_wall_time.short_description = 'Время, с'
+    average_cpu_time.short_description = 'Процессор, с'
+    average_sql_count.short_description = 'SQL-запросов'
+    average_sql_time.short_description = 'SQL, с'
+    average_template_time.short_description = 'Шаблоны, с'
+    cache_hit_rate.short_description = 'Попадания в кэш'
+    collapsed_stacks.short_description = 'Стеки для flame graph'
+
+
+admin.site.register(RequestProfile, RequestProfileAdmin)
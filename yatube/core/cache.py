@@ -0,0 +1,345 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from . import metrics
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' size INTEGER NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL)',
+    # Вытеснение идёт по индексу от давних записей и не читает value.
+    'DROP INDEX IF EXISTS cache_accessed',
+    'CREATE INDEX IF NOT EXISTS cache_accessed_size ON cache (accessed, size)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    'CREATE TABLE IF NOT EXISTS stats ('
+    ' name TEXT PRIMARY KEY,'
+    ' value INTEGER NOT NULL)',
+    # Число и объём записей ведут триггеры, чтобы не считать их
+    # по всей таблице при каждой записи.
+    'CREATE TABLE IF NOT EXISTS totals ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 1),'
+    ' entries INTEGER NOT NULL,'
+    ' size INTEGER NOT NULL)',
+    'INSERT INTO totals (id, entries, size)'
+    ' SELECT 1, (SELECT COUNT(*) FROM cache),'
+    ' (SELECT COALESCE(SUM(size), 0) FROM cache)'
+    ' WHERE NOT EXISTS (SELECT 1 FROM totals)',
+    'CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN'
+    ' UPDATE totals SET entries = entries + 1, size = size + NEW.size;'
+    ' END',
+    'CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN'
+    ' UPDATE totals SET entries = entries - 1, size = size - OLD.size;'
+    ' END',
+    'CREATE TRIGGER IF NOT EXISTS cache_resize AFTER UPDATE OF size ON cache'
+    ' BEGIN'
+    ' UPDATE totals SET size = size + NEW.size - OLD.size;'
+    ' END',
+)
+
+STATS = ('hits', 'misses', 'evictions')
+
+
+class SQLiteCache(BaseCache):
+    """
+    Общий для всех процессов кэш в отдельном файле SQLite.
+
+    Не требует внешних сервисов. Размер ограничен числом записей
+    (MAX_ENTRIES) и суммарным объёмом (MAX_SIZE, байт); при переполнении
+    вытесняются давно не читавшиеся записи (LRU); истёкшие записи
+    удаляются раз в CULL_INTERVAL записей. Попадания, промахи
+    и вытеснения копятся в процессе и раз в STATS_FLUSH_INTERVAL секунд
+    сбрасываются в общий файл, так что stats() видна всем воркерам.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = location
+        self._max_size = options.get('MAX_SIZE')
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+        self._touch_interval = options.get('TOUCH_INTERVAL', 10)
+        self._flush_interval = options.get('STATS_FLUSH_INTERVAL', 5)
+        self._cull_interval = options.get('CULL_INTERVAL', 100)
+        self._writes = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = dict.fromkeys(STATS, 0)
+        self._flushed_at = time.monotonic()
+
+    @property
+    def _db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            directory = os.path.dirname(self._path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self._path,
+                timeout=self._busy_timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in SCHEMA:
+                    db.execute(statement)
+                db.execute('COMMIT')
+            except BaseException:
+                db.execute('ROLLBACK')
+                raise
+            self._local.db = db
+        return db
+
+    def _expires(self, timeout):
+        return self.get_backend_timeout(timeout)
+
+    def _count(self, name, amount=1):
+        if not amount:
+            return
+        metrics.CACHE_EVENTS.inc(amount, event=name)
+        with self._lock:
+            self._pending[name] += amount
+            due = time.monotonic() - self._flushed_at > self._flush_interval
+        if due:
+            self._flush_stats()
+
+    def _flush_stats(self):
+        with self._lock:
+            pending, self._pending = self._pending, dict.fromkeys(STATS, 0)
+            self._flushed_at = time.monotonic()
+        self._db.executemany(
+            'INSERT INTO stats (name, value) VALUES (?, ?) '
+            'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value',
+            [(name, value) for name, value in pending.items() if value],
+        )
+
+    def _fetch(self, keys):
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        rows = self._db.execute(
+            f'SELECT key, value, expires, accessed FROM cache '
+            f'WHERE key IN ({placeholders})',
+            keys,
+        ).fetchall()
+        found, expired, stale = {}, [], []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                expired.append(key)
+                continue
+            found[key] = pickle.loads(value)
+            if now - accessed > self._touch_interval:
+                stale.append(key)
+        if expired:
+            self._delete(expired)
+        if stale:
+            self._db.execute(
+                f'UPDATE cache SET accessed = ? '
+                f'WHERE key IN ({", ".join("?" * len(stale))})',
+                [now, *stale],
+            )
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def _store(self, items, timeout, only_new=False):
+        now = time.time()
+        expires = self._expires(timeout)
+        if expires is not None and expires <= now and not only_new:
+            # Нулевой или отрицательный срок: записи просто нет.
+            self._delete(list(items))
+            return False
+        rows = []
+        for key, value in items.items():
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            rows.append((key, data, len(data), expires, now))
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if only_new:
+                db.execute(
+                    'DELETE FROM cache WHERE key = ? AND expires <= ?',
+                    (rows[0][0], now),
+                )
+                statement = (
+                    'INSERT OR IGNORE INTO cache '
+                    '(key, value, size, expires, accessed) '
+                    'VALUES (?, ?, ?, ?, ?)'
+                )
+            else:
+                # Не INSERT OR REPLACE: замена строки не вызывает
+                # триггер удаления, и счётчик объёма разошёлся бы.
+                statement = (
+                    'INSERT INTO cache (key, value, size, expires, accessed) '
+                    'VALUES (?, ?, ?, ?, ?) '
+                    'ON CONFLICT (key) DO UPDATE SET value = excluded.value,'
+                    ' size = excluded.size, expires = excluded.expires,'
+                    ' accessed = excluded.accessed'
+                )
+            changed = db.executemany(statement, rows).rowcount
+            self._cull(db, now)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return changed > 0
+
+    def _totals(self, db):
+        return db.execute('SELECT entries, size FROM totals').fetchone()
+
+    def _overflow(self, entries, size):
+        """Превышены ли пределы: (по числу записей, по объёму)."""
+        return (
+            entries > self._max_entries,
+            self._max_size is not None and size > self._max_size,
+        )
+
+    def _cull(self, db, now):
+        """
+        Раз в CULL_INTERVAL записей удаляет истёкшие записи, а при
+        переполнении — сначала истёкшие, затем самые давние по чтению.
+        """
+        with self._lock:
+            self._writes += 1
+            sweep = self._writes % self._cull_interval == 0
+        if not sweep and not any(self._overflow(*self._totals(db))):
+            return
+        # Прежде чем вытеснять живые записи, убираем истёкшие.
+        db.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+        entries, size = self._totals(db)
+        over_entries, over_size = self._overflow(entries, size)
+        if not (over_entries or over_size):
+            return
+        # Как и встроенные бэкенды, освобождаем место с запасом:
+        # 1 / CULL_FREQUENCY от предела за раз.
+        keep_entries = self._max_entries - (
+            self._max_entries // self._cull_frequency
+        )
+        victims = max(entries - keep_entries, 0) if over_entries else 0
+        if over_size:
+            keep_size = self._max_size - (
+                self._max_size // self._cull_frequency
+            )
+            freed = 0
+            for (row_size,) in db.execute(
+                'SELECT size FROM cache ORDER BY accessed'
+            ):
+                if size - freed <= keep_size:
+                    break
+                freed += row_size
+                victims += 1
+        victims = min(victims, entries)
+        db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (victims,),
+        )
+        self._count('evictions', victims)
+
+    def _delete(self, keys):
+        placeholders = ', '.join('?' * len(keys))
+        return self._db.execute(
+            f'DELETE FROM cache WHERE key IN ({placeholders})', keys
+        ).rowcount
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return self._store({key: value}, timeout, only_new=True)
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._fetch([key]).get(key, default)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._store({self._key(key, version): value}, timeout)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        return self._db.execute(
+            'UPDATE cache SET expires = ?, accessed = ? WHERE key = ?',
+            (self._expires(timeout), time.time(), key),
+        ).rowcount > 0
+
+    def delete(self, key, version=None):
+        self._delete([self._key(key, version)])
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        if not keys:
+            return {}
+        made = {self._key(key, version): key for key in keys}
+        found = self._fetch(list(made))
+        return {made[key]: value for key, value in found.items()}
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if data:
+            self._store(
+                {self._key(key, version): value
+                 for key, value in data.items()},
+                timeout,
+            )
+        return []
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        if keys:
+            self._delete(keys)
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        return self._db.execute(
+            'SELECT 1 FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone() is not None
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), key),
+            )
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        return value
+
+    def stats(self):
+        """Статистика кэша, общая для всех процессов."""
+        self._flush_stats()
+        result = dict.fromkeys(STATS, 0)
+        result.update(self._db.execute('SELECT name, value FROM stats'))
+        result['entries'], result['size'] = self._totals(self._db)
+        lookups = result['hits'] + result['misses']
+        result['hit_rate'] = result['hits'] / lookups if lookups else 0.0
+        return result
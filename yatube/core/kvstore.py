@@ -0,0 +1,40 @@
+from django.core.cache import caches
+from sorl.thumbnail.conf import settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores.base import KVStoreBase, add_prefix
+
+
+class CacheKVStore(KVStoreBase):
+    """
+    KV-хранилище sorl-thumbnail в общем кэше Django (THUMBNAIL_CACHE)
+    вместо таблицы в базе. Запись, вытесненная из кэша, восстанавливается
+    по уже готовому файлу миниатюры, без повторной генерации.
+
+    Перечислять ключи кэш не умеет, поэтому команда thumbnail cleanup
+    ничего не делает; лишние миниатюры удаляет collect_media.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THUMBNAIL_CACHE]
+
+    def get_many(self, image_files):
+        """Записи о картинках image_files одним запросом; None — нет."""
+        keys = [add_prefix(image_file.key) for image_file in image_files]
+        found = self.cache.get_many(keys)
+        return [
+            deserialize_image_file(found[key]) if key in found else None
+            for key in keys
+        ]
+
+    def _get_raw(self, key):
+        return self.cache.get(key)
+
+    def _set_raw(self, key, value):
+        self.cache.set(key, value, None)
+
+    def _delete_raw(self, *keys):
+        self.cache.delete_many(keys)
+
+    def _find_keys_raw(self, prefix):
+        return []
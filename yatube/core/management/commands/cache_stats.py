@@ -0,0 +1,20 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Показывает статистику попаданий общего кэша.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('alias', nargs='?', default='default')
+
+    def handle(self, *args, **options):
+        cache = caches[options['alias']]
+        if not hasattr(cache, 'stats'):
+            raise CommandError(
+                f'Кэш {options["alias"]} не собирает статистику.'
+            )
+        stats = cache.stats()
+        for name in ('hits', 'misses', 'evictions', 'entries', 'size'):
+            self.stdout.write(f'{name}: {stats[name]}')
+        self.stdout.write(f'hit_rate: {stats["hit_rate"]:.2%}')
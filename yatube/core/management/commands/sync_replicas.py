@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик DATABASE_REPLICAS '
+        '(локальная замена репликации).'
+    )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError('Реплики копируются только для SQLite.')
+        if not settings.DATABASE_REPLICA_FILES:
+            raise CommandError('Реплики не настроены: DATABASE_REPLICAS.')
+        source = sqlite3.connect(primary['NAME'])
+        try:
+            for name in settings.DATABASE_REPLICA_FILES:
+                # Онлайн-бэкап: читатели реплики видят либо старую,
+                # либо новую копию целиком.
+                target = sqlite3.connect(name)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                self.stdout.write(f'{name}: готово')
+        finally:
+            source.close()
@@ -0,0 +1,340 @@
+import glob
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: файлы завершившихся процессов не складываются.
+    fcntl = None
+
+# Файл процесса: 8 байт заголовка (занятый объём), дальше записи
+# «длина ключа (4 байта), ключ в UTF-8 с выравниванием до 8 байт,
+# значение (double)». Пишет в файл только его процесс, /metrics
+# суммирует файлы всех процессов.
+HEADER = struct.Struct('<I4x')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 64 * 1024
+# Сюда складываются значения завершившихся процессов.
+MERGED_FILE = 'merged.db'
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, math.inf
+)
+
+# Все метрики по имени, в порядке объявления.
+REGISTRY = {}
+
+
+class MmapFile:
+    """Значения метрик одного процесса в файле, отображённом в память."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size < INITIAL_SIZE:
+            self.file.truncate(INITIAL_SIZE)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.offsets = {}
+        for key, _, offset in _entries(self.map):
+            self.offsets[key] = offset
+        self.used = HEADER.unpack_from(self.map)[0] or HEADER.size
+
+    def add(self, key, amount):
+        with self.lock:
+            offset = self.offsets.get(key)
+            if offset is None:
+                offset = self._append(key)
+            value = VALUE.unpack_from(self.map, offset)[0]
+            VALUE.pack_into(self.map, offset, value + amount)
+
+    def _append(self, key):
+        encoded = key.encode()
+        padded = len(encoded) + (-(KEY_LENGTH.size + len(encoded)) % 8)
+        size = KEY_LENGTH.size + padded + VALUE.size
+        while self.used + size > len(self.map):
+            self.map.close()
+            self.file.truncate(
+                os.fstat(self.file.fileno()).st_size * 2
+            )
+            self.map = mmap.mmap(self.file.fileno(), 0)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        self.map[
+            self.used + KEY_LENGTH.size:
+            self.used + KEY_LENGTH.size + len(encoded)
+        ] = encoded
+        offset = self.used + KEY_LENGTH.size + padded
+        VALUE.pack_into(self.map, offset, 0)
+        # Заголовок обновляется последним: читатель не увидит
+        # недописанную запись.
+        self.used += size
+        HEADER.pack_into(self.map, 0, self.used)
+        self.offsets[key] = offset
+        return offset
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def _entries(data):
+    """Записи файла метрик: (ключ, значение, смещение значения)."""
+    used = HEADER.unpack_from(data)[0]
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(data, position)[0]
+        start = position + KEY_LENGTH.size
+        key = bytes(data[start:start + length]).decode()
+        offset = start + length + (-(KEY_LENGTH.size + length) % 8)
+        yield key, VALUE.unpack_from(data, offset)[0], offset
+        position = offset + VALUE.size
+
+
+_file = None
+_file_lock = threading.Lock()
+
+
+def _storage():
+    """Файл текущего процесса; после fork у потомка — свой."""
+    global _file
+    path = os.path.join(settings.METRICS_DIR, f'{os.getpid()}.db')
+    if _file is None or _file.path != path:
+        with _file_lock:
+            if _file is None or _file.path != path:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _file = MmapFile(path)
+    return _file
+
+
+def _key(name, labels):
+    if not labels:
+        return name
+    pairs = ','.join(
+        '{}="{}"'.format(
+            label,
+            str(value).replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'),
+        )
+        for label, value in labels
+    )
+    return f'{name}{{{pairs}}}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def _labels(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f'{self.name}: нужны метки {", ".join(self.labelnames)}'
+            )
+        return [(label, labels[label]) for label in self.labelnames]
+
+
+class Counter(Metric):
+    """Счётчик, который только растёт."""
+
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if settings.METRICS_DIR:
+            _storage().add(
+                _key(f'{self.name}_total', self._labels(labels)), amount
+            )
+
+
+class Histogram(Metric):
+    """
+    Распределение значений по корзинам buckets (верхние границы)
+    с суммой и числом наблюдений.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        if not settings.METRICS_DIR:
+            return
+        labels = self._labels(labels)
+        storage = _storage()
+        for bound in self.buckets:
+            if value <= bound:
+                storage.add(
+                    _key(f'{self.name}_bucket', [*labels, ('le', _le(bound))]),
+                    1,
+                )
+        storage.add(_key(f'{self.name}_sum', labels), value)
+        storage.add(_key(f'{self.name}_count', labels), 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Замеряет время блока в секундах."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+def _le(bound):
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _dead_files():
+    """Файлы процессов, которые уже завершились."""
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+        name = os.path.splitext(os.path.basename(path))[0]
+        if (
+            name.isdigit()
+            and int(name) != os.getpid()
+            and not _alive(int(name))
+        ):
+            yield path
+
+
+def _fold(merged, path):
+    try:
+        with open(path, 'rb') as source:
+            data = source.read()
+    except FileNotFoundError:
+        # Уже сложен другим процессом.
+        return
+    if len(data) >= HEADER.size:
+        for key, value, _ in _entries(data):
+            merged.add(key, value)
+    os.remove(path)
+
+
+def compact():
+    """
+    Складывает файлы завершившихся процессов в MERGED_FILE и удаляет
+    их: иначе с каждым перезапуском воркеров файлов только прибавляется.
+    Сумма значений при этом не меняется.
+    """
+    if fcntl is None:
+        return
+    dead = list(_dead_files())
+    if not dead:
+        return
+    lock_path = os.path.join(settings.METRICS_DIR, 'merge.lock')
+    with open(lock_path, 'a') as lock:
+        # Файл складывает только один процесс, иначе он попадёт
+        # в сумму дважды.
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        merged = MmapFile(os.path.join(settings.METRICS_DIR, MERGED_FILE))
+        try:
+            for path in dead:
+                _fold(merged, path)
+        finally:
+            merged.close()
+
+
+def collect():
+    """Сумма значений по файлам всех процессов: ключ -> значение."""
+    compact()
+    totals = {}
+    for path in glob.glob(os.path.join(settings.METRICS_DIR, '*.db')):
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < HEADER.size:
+            continue
+        for key, value, _ in _entries(data):
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def _family(key):
+    name = key.split('{', 1)[0]
+    for suffix in ('_total', '_bucket', '_sum', '_count'):
+        if name.endswith(suffix) and name[:-len(suffix)] in REGISTRY:
+            return name[:-len(suffix)]
+    return name
+
+
+def exposition():
+    """Все метрики в текстовом формате Prometheus 0.0.4."""
+    families = {}
+    for key, value in collect().items():
+        families.setdefault(_family(key), []).append((key, value))
+    lines = []
+    for name, metric in REGISTRY.items():
+        if name not in families:
+            continue
+        header = f'{name}_total' if metric.type == 'counter' else name
+        lines.append(f'# HELP {header} {metric.documentation}')
+        lines.append(f'# TYPE {header} {metric.type}')
+        lines.extend(
+            f'{key} {value!r}' for key, value in families[name]
+        )
+    return '\n'.join(lines) + '\n'
+
+
+VIEW_DURATION = Histogram(
+    'yatube_view_duration_seconds',
+    'Время ответа представления.',
+    ('view', 'method'),
+)
+VIEW_RESPONSES = Counter(
+    'yatube_view_responses',
+    'Ответы представлений по коду.',
+    ('view', 'status'),
+)
+LISTING_CACHE = Counter(
+    'yatube_listing_cache_requests',
+    'Обращения к кэшу страниц лент: hit или miss.',
+    ('listing', 'result'),
+)
+LISTING_DURATION = Histogram(
+    'yatube_listing_duration_seconds',
+    'Время выборки страницы паджинатором.',
+    ('kind',),
+)
+CACHE_EVENTS = Counter(
+    'yatube_cache_events',
+    'Попадания, промахи и вытеснения общего кэша SQLite.',
+    ('event',),
+)
+IMAGE_DURATION = Histogram(
+    'yatube_image_process_duration_seconds',
+    'Обработка загруженной картинки поста.',
+    ('result',),
+)
+THUMBNAIL_DURATION = Histogram(
+    'yatube_thumbnail_duration_seconds',
+    'Подготовка миниатюр sorl-thumbnail.',
+    ('path',),
+)
+THUMBNAIL_KVSTORE = Counter(
+    'yatube_thumbnail_kvstore_requests',
+    'Поиск готовых миниатюр в KV-хранилище sorl: hit или miss.',
+    ('result',),
+)
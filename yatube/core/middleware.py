@@ -0,0 +1,181 @@
+import mimetypes
+import os
+import random
+import time
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from . import metrics, profiling, routers
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Сжатые копии статики в порядке предпочтения: Accept-Encoding -> суффикс.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFilesMiddleware:
+    """
+    Отдаёт собранную collectstatic статику из STATIC_ROOT, не доходя
+    до представлений, — для развёртываний без фронтового сервера.
+
+    Файлы с хэшем в имени (из staticfiles.json) кэшируются браузером
+    навсегда: при новом содержимом меняется и адрес. Если клиент
+    принимает br или gzip и рядом лежит сжатая копия, отдаётся она.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.prefix = settings.STATIC_URL
+        self.root = settings.STATIC_ROOT
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, request):
+        if (
+            self.root
+            and request.method in ('GET', 'HEAD')
+            and request.path_info.startswith(self.prefix)
+        ):
+            response = self.serve(
+                request, request.path_info[len(self.prefix):]
+            )
+            if response is not None:
+                return response
+        return self.get_response(request)
+
+    def serve(self, request, name):
+        try:
+            path = safe_join(self.root, name)
+        except SuspiciousFileOperation:
+            return None
+        if not os.path.isfile(path):
+            return None
+        content_type = mimetypes.guess_type(path)[0]
+        variants = [
+            (encoding, path + suffix) for encoding, suffix in ENCODINGS
+            if os.path.isfile(path + suffix)
+        ]
+        accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        encoding = None
+        for candidate, variant in variants:
+            if candidate in accepted:
+                encoding, path = candidate, variant
+                break
+        stat = os.stat(path)
+        if not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime,
+            stat.st_size,
+        ):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                open(path, 'rb'),
+                content_type=content_type or 'application/octet-stream',
+            )
+            response['Content-Length'] = stat.st_size
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if name in self.immutable:
+            response['Cache-Control'] = 'public, max-age=31536000, immutable'
+        else:
+            response['Cache-Control'] = 'public, max-age=60'
+        if variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает представлениям REPLICA_VIEWS читать с реплик.
+
+    Запросы с небезопасным методом и запросы, в которых что-то
+    записано, ставят куку: пока она жива (REPLICA_STICKY_SECONDS),
+    пользователь читает с основной базы и видит свои изменения,
+    даже если реплики отстают.
+    """
+
+    cookie = 'primary'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and (
+                routers.is_pinned() or request.method not in SAFE_METHODS
+            ):
+                response.set_cookie(
+                    self.cookie,
+                    '1',
+                    max_age=settings.REPLICA_STICKY_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+            return response
+        finally:
+            routers.reset()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in SAFE_METHODS
+            and self.cookie not in request.COOKIES
+            and request.resolver_match.view_name in settings.REPLICA_VIEWS
+        ):
+            routers.use_replicas()
+
+
+class ProfilingMiddleware:
+    """
+    Замеряет долю PROFILE_SAMPLE_RATE запросов: время, процессор, SQL,
+    отрисовку шаблонов, кэш и, с PROFILE_STACKS, стеки вызовов. Замеры
+    складываются в сводку по имени адреса (core.models.RequestProfile),
+    которую показывает админка. Остальные запросы проходят без замера.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        profiling.install()
+
+    def __call__(self, request):
+        if random.random() >= settings.PROFILE_SAMPLE_RATE:
+            return self.get_response(request)
+        with profiling.profile(settings.PROFILE_STACKS) as sample:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            profiling.record(match.view_name, sample)
+        return response
+
+
+class MetricsMiddleware:
+    """Время ответа и коды ответов по имени адреса для /metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            metrics.VIEW_DURATION.observe(
+                time.perf_counter() - started,
+                view=match.view_name,
+                method=request.method,
+            )
+            metrics.VIEW_RESPONSES.inc(
+                view=match.view_name, status=response.status_code
+            )
+        return response
@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 01:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=200, unique=True, verbose_name='Адрес')),
+                ('requests', models.PositiveIntegerField(default=0, verbose_name='Замеров')),
+                ('wall_time', models.FloatField(default=0, verbose_name='Время, с')),
+                ('max_wall_time', models.FloatField(default=0, verbose_name='Худшее время, с')),
+                ('cpu_time', models.FloatField(default=0, verbose_name='Процессор, с')),
+                ('sql_count', models.PositiveIntegerField(default=0, verbose_name='SQL-запросов')),
+                ('sql_time', models.FloatField(default=0, verbose_name='SQL, с')),
+                ('template_time', models.FloatField(default=0, verbose_name='Шаблоны, с')),
+                ('cache_hits', models.PositiveIntegerField(default=0, verbose_name='Попаданий в кэш')),
+                ('cache_misses', models.PositiveIntegerField(default=0, verbose_name='Промахов кэша')),
+                ('updated', models.DateTimeField(verbose_name='Последний замер')),
+            ],
+            options={
+                'verbose_name': 'Профиль адреса',
+                'verbose_name_plural': 'Профили адресов',
+                'ordering': ('view_name',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ProfileStack',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stack', models.TextField(verbose_name='Стек')),
+                ('samples', models.PositiveIntegerField(default=0, verbose_name='Выборок')),
+                ('profile', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stacks', to='core.RequestProfile', verbose_name='Профиль')),
+            ],
+            options={
+                'verbose_name': 'Стек',
+                'verbose_name_plural': 'Стеки',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='profilestack',
+            constraint=models.UniqueConstraint(fields=('profile', 'stack'), name='unique_profile_stack'),
+        ),
+    ]
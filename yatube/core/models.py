@@ -0,0 +1,69 @@
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    Сводка замеров запросов к одному адресу (ProfilingMiddleware):
+    суммы по всем замерам, средние считаются в админке.
+    """
+
+    view_name = models.CharField(
+        max_length=200, unique=True, verbose_name='Адрес'
+    )
+    requests = models.PositiveIntegerField(default=0, verbose_name='Замеров')
+    wall_time = models.FloatField(default=0, verbose_name='Время, с')
+    max_wall_time = models.FloatField(
+        default=0, verbose_name='Худшее время, с'
+    )
+    cpu_time = models.FloatField(default=0, verbose_name='Процессор, с')
+    sql_count = models.PositiveIntegerField(
+        default=0, verbose_name='SQL-запросов'
+    )
+    sql_time = models.FloatField(default=0, verbose_name='SQL, с')
+    template_time = models.FloatField(default=0, verbose_name='Шаблоны, с')
+    cache_hits = models.PositiveIntegerField(
+        default=0, verbose_name='Попаданий в кэш'
+    )
+    cache_misses = models.PositiveIntegerField(
+        default=0, verbose_name='Промахов кэша'
+    )
+    updated = models.DateTimeField(verbose_name='Последний замер')
+
+    class Meta:
+        ordering = ('view_name',)
+        verbose_name = 'Профиль адреса'
+        verbose_name_plural = 'Профили адресов'
+
+    def __str__(self):
+        return self.view_name
+
+
+class ProfileStack(models.Model):
+    """
+    Стек вызовов в свёрнутом виде («модуль:функция;модуль:функция»)
+    и сколько раз он попал в выборку на адресе. Строки «стек число»
+    читают flamegraph.pl и speedscope.
+    """
+
+    profile = models.ForeignKey(
+        RequestProfile,
+        on_delete=models.CASCADE,
+        related_name='stacks',
+        verbose_name='Профиль',
+    )
+    stack = models.TextField(verbose_name='Стек')
+    samples = models.PositiveIntegerField(
+        default=0, verbose_name='Выборок'
+    )
+
+    class Meta:
+        verbose_name = 'Стек'
+        verbose_name_plural = 'Стеки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['profile', 'stack'], name='unique_profile_stack'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.stack} {self.samples}'
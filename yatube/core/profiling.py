@@ -0,0 +1,312 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.template.backends.django import Template
+from django.utils import timezone
+
+from .models import ProfileStack, RequestProfile
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_MISSING = object()
+# Глубже стек не разворачивается: хвост рекурсии не важен.
+MAX_STACK_DEPTH = 128
+STACK_BATCH_SIZE = 500
+
+
+class Sample:
+    """Замер одного запроса."""
+
+    def __init__(self):
+        self.wall_time = 0
+        self.cpu_time = 0
+        self.sql_count = 0
+        self.sql_time = 0
+        self.template_time = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.stacks = Counter()
+        self.rendering = False
+        self.in_get_many = False
+
+
+def current():
+    """Замер текущего потока или None, если запрос не замеряется."""
+    return getattr(_local, 'sample', None)
+
+
+def _timed_render(render):
+    @wraps(render)
+    def wrapper(self, *args, **kwargs):
+        sample = current()
+        if sample is None or sample.rendering:
+            return render(self, *args, **kwargs)
+        sample.rendering = True
+        started = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            sample.template_time += time.perf_counter() - started
+            sample.rendering = False
+    return wrapper
+
+
+def install():
+    """
+    Подключает замер отрисовки шаблонов. Вне замера обёртка только
+    проверяет thread-local и сразу вызывает исходный render.
+    """
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = _timed_render(Template.render)
+        Template.render.profiled = True
+
+
+def _sql_wrapper(sample):
+    def wrapper(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            sample.sql_count += 1
+            sample.sql_time += time.perf_counter() - started
+    return wrapper
+
+
+@contextmanager
+def _counting_cache(cache, sample):
+    """Считает попадания и промахи cache.get и cache.get_many."""
+    get, get_many = cache.get, cache.get_many
+
+    def counting_get(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        if not sample.in_get_many:
+            if value is _MISSING:
+                sample.cache_misses += 1
+            else:
+                sample.cache_hits += 1
+        return default if value is _MISSING else value
+
+    def counting_get_many(keys, version=None):
+        keys = list(keys)
+        sample.in_get_many = True
+        try:
+            found = get_many(keys, version=version)
+        finally:
+            sample.in_get_many = False
+        sample.cache_hits += len(found)
+        sample.cache_misses += len(keys) - len(found)
+        return found
+
+    cache.get, cache.get_many = counting_get, counting_get_many
+    try:
+        yield
+    finally:
+        del cache.get, cache.get_many
+
+
+class StackSampler(threading.Thread):
+    """
+    Раз в interval секунд снимает стек потока thread_id и считает
+    одинаковые стеки: статистический профиль без трассировки вызовов.
+    """
+
+    def __init__(self, thread_id, interval, stacks):
+        super().__init__(name='profiler', daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = stacks
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+
+def collapse(frame):
+    """Стек от корня к frame одной строкой «модуль:функция;…»."""
+    names = []
+    while frame is not None and len(names) < MAX_STACK_DEPTH:
+        names.append(
+            f'{frame.f_globals.get("__name__", "?")}:{frame.f_code.co_name}'
+        )
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+@contextmanager
+def profile(stacks=False):
+    """
+    Замеряет код внутри блока в текущем потоке: время, процессор, SQL
+    на всех базах, отрисовку шаблонов и обращения к кэшам; со stacks=True
+    ещё и снимает стеки раз в PROFILE_STACK_INTERVAL секунд.
+    """
+    sample = Sample()
+    sampler = None
+    with ExitStack() as hooks:
+        for alias in connections:
+            hooks.enter_context(
+                connections[alias].execute_wrapper(_sql_wrapper(sample))
+            )
+        for alias in settings.CACHES:
+            hooks.enter_context(_counting_cache(caches[alias], sample))
+        if stacks:
+            sampler = StackSampler(
+                threading.get_ident(),
+                settings.PROFILE_STACK_INTERVAL,
+                sample.stacks,
+            )
+            sampler.start()
+        _local.sample = sample
+        started, cpu_started = time.perf_counter(), time.thread_time()
+        try:
+            yield sample
+        finally:
+            sample.wall_time = time.perf_counter() - started
+            sample.cpu_time = time.thread_time() - cpu_started
+            _local.sample = None
+            if sampler is not None:
+                sampler.stop()
+
+
+class Pending:
+    """Сумма замеров одного адреса, ещё не записанная в базу."""
+
+    FIELDS = (
+        'wall_time', 'cpu_time', 'sql_count', 'sql_time', 'template_time',
+        'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.max_wall_time = 0
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+        self.stacks = Counter()
+
+    def add(self, sample):
+        self.requests += 1
+        self.max_wall_time = max(self.max_wall_time, sample.wall_time)
+        for field in self.FIELDS:
+            setattr(self, field, getattr(self, field) + getattr(sample, field))
+        self.stacks.update(sample.stacks)
+
+
+_pending = {}
+_pending_lock = threading.Lock()
+_flushed = time.monotonic()
+
+
+def _add(view_name, pending):
+    updated = RequestProfile.objects.filter(view_name=view_name).update(
+        requests=F('requests') + pending.requests,
+        max_wall_time=Greatest('max_wall_time', pending.max_wall_time),
+        updated=timezone.now(),
+        **{
+            field: F(field) + getattr(pending, field)
+            for field in Pending.FIELDS
+        },
+    )
+    if updated:
+        return RequestProfile.objects.get(view_name=view_name)
+    return RequestProfile.objects.create(
+        view_name=view_name,
+        requests=pending.requests,
+        max_wall_time=pending.max_wall_time,
+        updated=timezone.now(),
+        **{field: getattr(pending, field) for field in Pending.FIELDS},
+    )
+
+
+def _add_stacks(profile, stacks):
+    names = list(stacks)
+    existing = {}
+    for start in range(0, len(names), STACK_BATCH_SIZE):
+        existing.update(
+            (row.stack, row) for row in ProfileStack.objects.filter(
+                profile=profile,
+                stack__in=names[start:start + STACK_BATCH_SIZE],
+            )
+        )
+    for stack, samples in stacks.items():
+        if stack in existing:
+            existing[stack].samples = F('samples') + samples
+    ProfileStack.objects.bulk_update(
+        existing.values(), ['samples'], batch_size=STACK_BATCH_SIZE
+    )
+    if len(existing) == len(stacks):
+        return
+    ProfileStack.objects.bulk_create(
+        (
+            ProfileStack(profile=profile, stack=stack, samples=samples)
+            for stack, samples in stacks.items() if stack not in existing
+        ),
+        batch_size=STACK_BATCH_SIZE,
+    )
+    # Хранятся только PROFILE_MAX_STACKS самых частых стеков адреса.
+    stacks = ProfileStack.objects.filter(profile=profile)
+    stacks.exclude(pk__in=stacks.order_by('-samples', 'pk').values('pk')[
+        :settings.PROFILE_MAX_STACKS
+    ]).delete()
+
+
+def _write(view_name, pending):
+    """
+    Добавляет накопленные замеры к сводке адреса view_name. Ошибки
+    записи только пишутся в лог: профилирование не должно ронять запрос.
+    """
+    try:
+        for attempt in range(2):
+            try:
+                with transaction.atomic():
+                    profile = _add(view_name, pending)
+                    if pending.stacks:
+                        _add_stacks(profile, pending.stacks)
+                return
+            except IntegrityError:
+                # Первый замер адреса пришёл одновременно из двух процессов.
+                if attempt:
+                    raise
+    except Exception:
+        logger.exception('Не удалось записать профиль %s', view_name)
+
+
+def flush():
+    """Записывает в базу все накопленные в процессе замеры."""
+    global _flushed
+    with _pending_lock:
+        pending = dict(_pending)
+        _pending.clear()
+        _flushed = time.monotonic()
+    for view_name, totals in pending.items():
+        _write(view_name, totals)
+
+
+def record(view_name, sample):
+    """
+    Добавляет замер к сводке адреса view_name. Замеры копятся в памяти
+    процесса и пишутся в базу не чаще раза в PROFILE_FLUSH_INTERVAL
+    секунд, поэтому замеряемый запрос обычно ничего не пишет. Замеры
+    за последний интервал перед остановкой процесса теряются.
+    """
+    with _pending_lock:
+        _pending.setdefault(view_name, Pending()).add(sample)
+        due = time.monotonic() - _flushed >= settings.PROFILE_FLUSH_INTERVAL
+    if due:
+        flush()
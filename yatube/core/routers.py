@@ -0,0 +1,76 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+_state = threading.local()
+
+
+def use_replicas():
+    """Разрешает текущему потоку читать с реплик (до reset())."""
+    _state.replicas = True
+    _state.pinned = False
+
+
+def pin_primary():
+    """До конца запроса и чтение, и запись идут в основную базу."""
+    _state.pinned = True
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+@contextmanager
+def primary():
+    """
+    Внутри блока поток читает с основной базы, не закрепляясь за ней.
+    Так читается всё, что потом надолго ложится в общий кэш: реплики
+    обновляются вручную и могут отставать сколько угодно.
+    """
+    replicas = getattr(_state, 'replicas', False)
+    _state.replicas = False
+    try:
+        yield
+    finally:
+        _state.replicas = replicas
+
+
+def reset():
+    _state.replicas = False
+    _state.pinned = False
+
+
+class ReplicaRouter:
+    """
+    Чтение — с реплик DATABASE_REPLICAS, запись — в основную базу.
+
+    Реплики читаются только там, где это разрешил use_replicas()
+    (core.middleware.ReplicaMiddleware для представлений REPLICA_VIEWS);
+    воркеры, команды и остальные страницы работают с основной базой.
+    После первой записи поток закрепляется за основной базой, чтобы
+    следом не прочитать с реплики то, что до неё ещё не дошло.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            # Сессия нужна сразу после входа, её реплика может не знать.
+            model._meta.app_label != 'sessions'
+            and settings.DATABASE_REPLICAS
+            and getattr(_state, 'replicas', False)
+            and not is_pinned()
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        pin_primary()
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы: объекты из них совместимы.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
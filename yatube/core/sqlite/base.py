@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db.backends.sqlite3 import base
+
+# PRAGMA, которые записывают в файл базы, а не настраивают соединение.
+WRITE_PRAGMAS = {'journal_mode', 'auto_vacuum', 'page_size'}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite под параллельную запись.
+
+    Каждое новое соединение получает PRAGMA из SQLITE_PRAGMAS (реплики
+    с mode=ro — только те, что не пишут в файл), а
+    транзакции начинаются с BEGIN IMMEDIATE (SQLITE_BEGIN_IMMEDIATE):
+    блокировка записи берётся сразу и ждёт busy_timeout. Обычный BEGIN
+    берёт её только при первой записи, и если базу успел изменить другой
+    писатель, SQLite отвечает «database is locked», не дожидаясь.
+    """
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        read_only = 'mode=ro' in str(self.settings_dict['NAME'])
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            if not (read_only and name in WRITE_PRAGMAS):
+                conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if settings.SQLITE_BEGIN_IMMEDIATE:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import os
+import tempfile
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.storage import FileSystemStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BLOB_DIR = 'blobs'
+
+# umask процесса: os.umask только меняет его, поэтому читаем один раз.
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+# Статика, которую имеет смысл сжимать заранее.
+COMPRESSIBLE = ('.css', '.js', '.svg', '.ico', '.txt', '.json', '.map')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище с дедупликацией по содержимому.
+
+    Содержимое файла пишется один раз в blobs/<2 символа>/<sha256>.<расш.>,
+    а под именем, которое выбрал upload_to, создаётся символьная ссылка
+    на него. Имена в базе остаются прежними, одинаковые загрузки занимают
+    место один раз, а url() отдаёт адрес самого blob-файла: он не меняется,
+    пока не меняется содержимое, и его можно кэшировать навсегда.
+    Ссылки без владельца и blob-файлы без ссылок удаляет collect_media.
+    """
+
+    def _save(self, name, content):
+        blob = self._save_blob(name, content)
+        while True:
+            path = self.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.symlink(
+                    os.path.relpath(self.path(blob), os.path.dirname(path)),
+                    path,
+                )
+            except FileExistsError:
+                name = self.get_available_name(name)
+                continue
+            return name
+
+    def _save_blob(self, name, content):
+        """Пишет содержимое во временный файл, считая хэш на лету."""
+        directory = self.path(BLOB_DIR)
+        os.makedirs(directory, exist_ok=True)
+        digest = hashlib.sha256()
+        descriptor, temporary = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    output.write(chunk)
+            digest = digest.hexdigest()
+            extension = os.path.splitext(name)[1].lower()
+            blob = f'{BLOB_DIR}/{digest[:2]}/{digest}{extension}'
+            path = self.path(blob)
+            try:
+                # Такое содержимое уже есть. Свежее время изменения не даст
+                # collect_media удалить blob, который снова понадобился.
+                os.utime(path)
+            except FileNotFoundError:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # mkstemp создаёт файл с правами 0600, а обычное
+                # сохранение — с правами по umask: фронтовой сервер
+                # под другим пользователем должен файл прочитать.
+                os.chmod(
+                    temporary,
+                    self.file_permissions_mode
+                    if self.file_permissions_mode is not None
+                    else 0o666 & ~UMASK,
+                )
+                os.replace(temporary, path)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return blob
+
+    def exists(self, name):
+        # Битая ссылка тоже занимает имя.
+        return os.path.lexists(self.path(name))
+
+    def blob_name(self, name):
+        """Имя blob-файла, на который ссылается name (или само name)."""
+        path = self.path(name)
+        if not os.path.islink(path):
+            return name
+        return os.path.relpath(
+            os.path.realpath(path), os.path.realpath(self.location)
+        ).replace(os.sep, '/')
+
+    def url(self, name):
+        return super().url(self.blob_name(name))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Статика для collectstatic: к именам файлов добавляется хэш содержимого
+    (css/bootstrap.min.3a7b….css), а рядом кладутся сжатые заранее копии
+    .gz и, если установлен пакет brotli, .br. Их отдаёт
+    core.middleware.StaticFilesMiddleware или фронтовой сервер
+    (gzip_static/brotli_static в nginx), а соответствие имён лежит
+    в staticfiles.json.
+
+    Пока collectstatic не запускали, {% static %} отдаёт имена без хэша.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                names.update((name, hashed_name))
+            yield name, hashed_name, processed
+        if not dry_run:
+            for name in sorted(names):
+                if name.endswith(COMPRESSIBLE):
+                    self._compress(name)
+
+    def _compress(self, name):
+        """Пишет сжатые копии файла, если они заметно меньше него."""
+        with self.open(name) as original:
+            data = original.read()
+        variants = {'.gz': gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            path = self.path(name + suffix)
+            if len(compressed) < len(data) * 0.95:
+                with open(path, 'wb') as output:
+                    output.write(compressed)
+            elif os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,108 @@
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.location = f'{self.directory}/cache.sqlite3'
+        self.cache = self.make_cache()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {
+            'OPTIONS': {
+                'MAX_ENTRIES': 4,
+                'CULL_FREQUENCY': 4,
+                'TOUCH_INTERVAL': 0,
+                'STATS_FLUSH_INTERVAL': 0,
+                **options,
+            }
+        })
+
+    def test_set_get_delete(self):
+        """Базовые операции кэша."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'other'))
+        self.cache.set('counter', 1)
+        self.assertEqual(self.cache.incr('counter'), 2)
+
+    def test_expired_entries_are_missing(self):
+        """Запись с истёкшим сроком не возвращается."""
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_lru_eviction(self):
+        """При переполнении вытесняются давно не читавшиеся записи."""
+        for index in range(4):
+            self.cache.set(f'key{index}', index)
+        self.cache.get('key0')
+        self.cache.set('key4', 4)
+        self.assertEqual(self.cache.get('key0'), 0)
+        self.assertIsNone(self.cache.get('key1'))
+        self.assertIsNone(self.cache.get('key2'))
+        self.assertEqual(self.cache.stats()['evictions'], 2)
+
+    def test_size_bound(self):
+        """Суммарный объём записей не превышает MAX_SIZE."""
+        cache = self.make_cache(MAX_ENTRIES=100, MAX_SIZE=1000)
+        for index in range(10):
+            cache.set(f'key{index}', 'x' * 200)
+        self.assertLessEqual(cache.stats()['size'], 1000)
+
+    def test_totals_follow_writes(self):
+        """Число и объём записей ведутся без подсчёта по таблице."""
+        cache = self.make_cache(MAX_ENTRIES=100)
+        cache.set('key', 'x' * 100)
+        cache.set('key', 'x' * 10)
+        cache.set('counter', 1)
+        cache.incr('counter', 10 ** 12)
+        cache.set_many({'a': 1, 'b': 2})
+        cache.delete('a')
+        self.assertEqual(
+            cache._totals(cache._db),
+            cache._db.execute(
+                'SELECT COUNT(*), SUM(size) FROM cache'
+            ).fetchone(),
+        )
+        cache.clear()
+        self.assertEqual(cache._totals(cache._db), (0, 0))
+
+    def test_expired_entries_swept_periodically(self):
+        """Истёкшие записи удаляются раз в CULL_INTERVAL записей."""
+        cache = self.make_cache(MAX_ENTRIES=100, CULL_INTERVAL=3)
+        cache.set('old', 'value', timeout=0.01)
+        time.sleep(0.02)
+        cache.set('key1', 1)
+        self.assertEqual(cache._totals(cache._db)[0], 2)
+        cache.set('key2', 2)
+        self.assertEqual(cache._totals(cache._db)[0], 2)
+
+    def test_zero_timeout_is_not_stored(self):
+        """Запись с нулевым сроком не пишется и удаляет прежнюю."""
+        self.cache.set('key', 'value')
+        self.cache.set('key', 'other', timeout=0)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache._totals(self.cache._db), (0, 0))
+
+    def test_stats_are_shared_between_instances(self):
+        """Статистику одного процесса видят другие."""
+        self.cache.set('key', 'value')
+        self.cache.get('key')
+        self.cache.get('missing')
+        stats = self.make_cache().stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hit_rate'], 0.5)
@@ -0,0 +1,35 @@
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.kvstore import CacheKVStore
+
+
+@override_settings(
+    CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    },
+)
+class CacheKVStoreTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.kvstore = CacheKVStore()
+        self.image = ImageFile('cache/aa/bb/thumb.jpg')
+        self.image.set_size((960, 339))
+
+    def test_set_and_get_many(self):
+        """Записи о миниатюрах читаются из кэша пачкой."""
+        self.kvstore.set(self.image)
+        missing = ImageFile('cache/cc/dd/other.jpg')
+        found, absent = self.kvstore.get_many([self.image, missing])
+        self.assertEqual(found.name, self.image.name)
+        self.assertEqual(tuple(found.size), (960, 339))
+        self.assertIsNone(absent)
+
+    def test_delete(self):
+        """Удалённая запись пропадает из кэша."""
+        self.kvstore.set(self.image)
+        self.kvstore.delete(self.image)
+        self.assertIsNone(self.kvstore.get(self.image))
@@ -0,0 +1,125 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        # Новый каталог — новый файл процесса, без прошлых значений.
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_counter_and_histogram(self):
+        """Счётчики и гистограммы выводятся в формате Prometheus."""
+        metrics.LISTING_CACHE.inc(listing='index', result='hit')
+        metrics.LISTING_CACHE.inc(2, listing='index', result='hit')
+        metrics.LISTING_DURATION.observe(0.03, kind='number')
+        text = metrics.exposition()
+        self.assertIn(
+            '# TYPE yatube_listing_cache_requests_total counter', text
+        )
+        self.assertIn(
+            'yatube_listing_cache_requests_total'
+            '{listing="index",result="hit"} 3.0',
+            text,
+        )
+        self.assertIn('# TYPE yatube_listing_duration_seconds histogram', text)
+        for bound, count in (('0.025', 0.0), ('0.05', 1.0), ('+Inf', 1.0)):
+            line = (
+                f'yatube_listing_duration_seconds_bucket'
+                f'{{kind="number",le="{bound}"}} {count}'
+            )
+            if count:
+                self.assertIn(line, text)
+            else:
+                self.assertNotIn(line, text)
+        self.assertIn(
+            'yatube_listing_duration_seconds_count{kind="number"} 1.0', text
+        )
+
+    def test_processes_are_summed(self):
+        """Значения из файлов разных процессов складываются."""
+        metrics.VIEW_RESPONSES.inc(view='posts:index', status=200)
+        other = metrics.MmapFile(os.path.join(self.directory, 'other.db'))
+        other.add('yatube_view_responses_total'
+                  '{view="posts:index",status="200"}', 4)
+        self.assertIn(
+            'yatube_view_responses_total{view="posts:index",status="200"} '
+            '5.0',
+            metrics.exposition(),
+        )
+
+    def test_dead_processes_are_merged(self):
+        """Файлы завершившихся процессов складываются в один."""
+        key = 'yatube_view_responses_total{view="posts:index",status="200"}'
+        for _ in range(2):
+            process = subprocess.Popen([sys.executable, '-c', ''])
+            process.wait()
+            dead = metrics.MmapFile(
+                os.path.join(self.directory, f'{process.pid}.db')
+            )
+            dead.add(key, 2)
+            dead.close()
+        metrics.VIEW_RESPONSES.inc(view='posts:index', status=200)
+        self.assertEqual(metrics.collect()[key], 5)
+        self.assertCountEqual(
+            os.listdir(self.directory),
+            [f'{os.getpid()}.db', metrics.MERGED_FILE, 'merge.lock'],
+        )
+        self.assertEqual(metrics.collect()[key], 5)
+
+    def test_file_grows(self):
+        """Файл процесса расширяется и читается после расширения."""
+        storage = metrics.MmapFile(os.path.join(self.directory, 'big.db'))
+        for number in range(3000):
+            storage.add(f'key_{number}', number)
+        reopened = metrics.MmapFile(storage.path)
+        self.assertEqual(len(reopened.offsets), 3000)
+        self.assertEqual(metrics.collect()['key_2999'], 2999)
+
+    def test_endpoint_and_middleware(self):
+        """Запросы к лентам видны на /metrics: время и кэш страниц."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            'yatube_view_duration_seconds_count'
+            '{view="posts:index",method="GET"} 2.0',
+            text,
+        )
+        for result in ('hit', 'miss'):
+            self.assertIn(
+                'yatube_listing_cache_requests_total'
+                f'{{listing="index",result="{result}"}} 1.0',
+                text,
+            )
+
+    def test_endpoint_hidden_from_outside(self):
+        """/metrics отвечает только адресам METRICS_ALLOWED_IPS."""
+        response = Client(REMOTE_ADDR='10.0.0.1').get(reverse('metrics'))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_endpoint_token(self):
+        """С METRICS_TOKEN /metrics отвечает только по токену."""
+        url = reverse('metrics')
+        self.assertEqual(Client().get(url).status_code, 404)
+        response = Client(REMOTE_ADDR='10.0.0.1').get(
+            url, HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
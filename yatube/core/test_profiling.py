@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import profiling
+from core.models import ProfileStack, RequestProfile
+
+User = get_user_model()
+
+
+@override_settings(
+    PROFILE_SAMPLE_RATE=1,
+    PROFILE_STACK_INTERVAL=0.001,
+    PROFILE_FLUSH_INTERVAL=0,
+)
+class ProfilingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(profiling.flush)
+
+    def test_sampled_requests_are_aggregated(self):
+        """Замеры складываются в сводку по имени адреса."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        profile = RequestProfile.objects.get(view_name='posts:index')
+        self.assertEqual(profile.requests, 2)
+        self.assertGreater(profile.wall_time, 0)
+        self.assertGreaterEqual(profile.wall_time, profile.template_time)
+        self.assertGreater(profile.template_time, 0)
+        self.assertGreater(profile.sql_count, 0)
+        # Вторая страница взята из кэша.
+        self.assertGreater(profile.cache_hits, 0)
+        self.assertGreater(profile.cache_misses, 0)
+
+    @override_settings(PROFILE_SAMPLE_RATE=0)
+    def test_not_sampled(self):
+        """При PROFILE_SAMPLE_RATE = 0 ничего не пишется."""
+        Client().get(reverse('posts:index'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+    @override_settings(PROFILE_FLUSH_INTERVAL=3600)
+    def test_samples_are_buffered(self):
+        """Замеры пишутся в базу пачкой, а не каждым запросом."""
+        profiling.flush()
+        client = Client()
+        client.get(reverse('posts:index'))
+        client.get(reverse('posts:index'))
+        self.assertFalse(RequestProfile.objects.exists())
+        profiling.flush()
+        profile = RequestProfile.objects.get(view_name='posts:index')
+        self.assertEqual(profile.requests, 2)
+
+    @override_settings(PROFILE_MAX_STACKS=2)
+    def test_rare_stacks_are_dropped(self):
+        """Для адреса хранятся только самые частые стеки."""
+        sample = profiling.Sample()
+        sample.stacks.update({'a:main': 3, 'b:main': 1, 'c:main': 2})
+        profiling.record('posts:index', sample)
+        self.assertCountEqual(
+            ProfileStack.objects.values_list('stack', flat=True),
+            ['a:main', 'c:main'],
+        )
+
+    def test_stacks_in_admin(self):
+        """Стеки адреса скачиваются из админки в свёрнутом виде."""
+        profile = RequestProfile.objects.create(
+            view_name='posts:index', requests=1, updated='2026-01-01T00:00Z'
+        )
+        ProfileStack.objects.create(
+            profile=profile, stack='a:main;b:view', samples=3
+        )
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        with override_settings(PROFILE_SAMPLE_RATE=0):
+            response = client.get(
+                reverse('admin:core_requestprofile_stacks', args=[profile.pk])
+            )
+        self.assertEqual(b''.join(response), b'a:main;b:view 3\n')
@@ -0,0 +1,110 @@
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from core import routers
+from core.middleware import ReplicaMiddleware
+from posts.cache import cache_listing
+from posts.models import Post
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.addCleanup(routers.reset)
+
+    def test_primary_by_default(self):
+        """Без разрешения middleware всё читается с основной базы."""
+        routers.reset()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_replica_until_first_write(self):
+        """После записи поток читает с основной базы."""
+        routers.use_replicas()
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_primary_block(self):
+        """В блоке primary() чтение идёт с основной базы без закрепления."""
+        routers.use_replicas()
+        with routers.primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertFalse(routers.is_pinned())
+        self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_replica_cards_are_not_cached(self):
+        """Карточка поста, прочитанного с реплики, не кэшируется."""
+        post = Post()
+        self.assertGreater(post.card_cache_timeout, 0)
+        post._state.db = 'replica'
+        self.assertEqual(post.card_cache_timeout, 0)
+
+    def test_sessions_on_primary(self):
+        """Сессии всегда читаются с основной базы."""
+        routers.use_replicas()
+        self.assertEqual(self.router.db_for_read(Session), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        """Без реплик всё идёт в основную базу."""
+        routers.use_replicas()
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaMiddlewareTests(SimpleTestCase):
+    def request(self, method, path, write=False, **kwargs):
+        """Прогоняет запрос через middleware; тело — база для чтения."""
+        def view(request):
+            self.middleware.process_view(request, None, (), {})
+            if write:
+                routers.pin_primary()
+            return HttpResponse(
+                routers.ReplicaRouter().db_for_read(Post)
+            )
+
+        self.middleware = ReplicaMiddleware(view)
+        request = getattr(RequestFactory(), method)(path, **kwargs)
+        request.resolver_match = resolve(path)
+        return self.middleware(request)
+
+    def test_listing_reads_replica(self):
+        """Ленты из REPLICA_VIEWS читаются с реплик."""
+        response = self.request('get', '/')
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(ReplicaMiddleware.cookie, response.cookies)
+
+    def test_cached_listing_built_from_primary(self):
+        """Страница ленты, которая ляжет в кэш, строится по основной базе."""
+        @cache_listing('index')
+        def view(request):
+            return HttpResponse(routers.ReplicaRouter().db_for_read(Post))
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        routers.use_replicas()
+        self.addCleanup(routers.reset)
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            self.assertEqual(view(request).content, b'default')
+
+    def test_other_views_read_primary(self):
+        """Остальные страницы читают с основной базы."""
+        response = self.request('get', '/search/')
+        self.assertEqual(response.content, b'default')
+
+    def test_write_sets_sticky_cookie(self):
+        """После записи пользователь какое-то время читает с основной базы."""
+        response = self.request('post', '/create/')
+        self.assertIn(ReplicaMiddleware.cookie, response.cookies)
+        response = self.request('get', '/', write=True)
+        self.assertIn(ReplicaMiddleware.cookie, response.cookies)
+        response = self.request(
+            'get', '/', HTTP_COOKIE=f'{ReplicaMiddleware.cookie}=1'
+        )
+        self.assertEqual(response.content, b'default')
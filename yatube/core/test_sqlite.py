@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import tempfile
+from unittest import mock
+
+from django.db import OperationalError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.sqlite.base import DatabaseWrapper
+from core.transactions import retry_on_locked
+
+
+class SQLiteBackendTests(TransactionTestCase):
+    def test_pragmas(self):
+        """Новое соединение получает PRAGMA из SQLITE_PRAGMAS."""
+        connection.close()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -64 * 1024)
+
+    def test_read_only_replica(self):
+        """Реплике только для чтения не задаются PRAGMA, пишущие в файл."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'replica.sqlite3')
+        sqlite3.connect(path).execute('CREATE TABLE t (id INTEGER)')
+        replica = DatabaseWrapper(
+            {
+                **connection.settings_dict,
+                'NAME': f'file:{path}?mode=ro',
+                'OPTIONS': {'uri': True},
+            },
+            alias='replica',
+        )
+        conn = replica.get_new_connection(replica.get_connection_params())
+        self.addCleanup(conn.close)
+        self.assertEqual(
+            conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete'
+        )
+        self.assertEqual(
+            conn.execute('PRAGMA busy_timeout').fetchone()[0], 5000
+        )
+
+    def test_begin_immediate(self):
+        """Транзакция сразу берёт блокировку записи."""
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                pass
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+@override_settings(SQLITE_RETRY_ATTEMPTS=3, SQLITE_RETRY_DELAY=0)
+class RetryOnLockedTests(TransactionTestCase):
+    def call(self, *errors, method='post'):
+        view = mock.Mock(side_effect=[*errors, HttpResponse('ok')])
+        view.__name__ = 'view'
+        request = getattr(RequestFactory(), method)('/')
+        return view, retry_on_locked(view)(request)
+
+    def test_retries_locked(self):
+        """При «database is locked» представление повторяется."""
+        locked = OperationalError('database is locked')
+        view, response = self.call(locked, locked)
+        self.assertEqual(view.call_count, 3)
+        self.assertEqual(response.content, b'ok')
+
+    def test_gives_up(self):
+        """После SQLITE_RETRY_ATTEMPTS попыток ошибка выходит наружу."""
+        locked = OperationalError('database is locked')
+        with self.assertRaises(OperationalError):
+            self.call(locked, locked, locked)
+
+    def test_other_errors_not_retried(self):
+        """Другие ошибки базы не повторяются."""
+        with self.assertRaises(OperationalError):
+            self.call(OperationalError('no such table: posts_post'))
+
+    def test_safe_methods_not_wrapped(self):
+        """Показ формы не берёт блокировку записи и не повторяется."""
+        with CaptureQueriesContext(connection) as queries:
+            view, response = self.call(method='get')
+        self.assertEqual(len(queries), 0)
+        locked = OperationalError('database is locked')
+        with self.assertRaises(OperationalError):
+            self.call(locked, method='get')
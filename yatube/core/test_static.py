@@ -0,0 +1,99 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import StaticFilesMiddleware
+
+CSS = b'body { color: black; }\n' * 100
+
+
+SOURCE = tempfile.mkdtemp()
+STATIC_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(STATICFILES_DIRS=[SOURCE], STATIC_ROOT=STATIC_ROOT)
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        os.makedirs(os.path.join(SOURCE, 'css'))
+        with open(os.path.join(SOURCE, 'css', 'site.css'), 'wb') as css:
+            css.write(CSS)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as manifest:
+            cls.hashed = json.load(manifest)['paths']['css/site.css']
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(SOURCE, ignore_errors=True)
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.middleware = StaticFilesMiddleware(
+            lambda request: HttpResponse('view')
+        )
+
+    def get(self, path, **headers):
+        return self.middleware(RequestFactory().get(path, **headers))
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        """collectstatic кладёт файл с хэшем в имени и его gzip-копию."""
+        self.assertNotEqual(self.hashed, 'css/site.css')
+        with open(os.path.join(STATIC_ROOT, self.hashed + '.gz'), 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), CSS)
+        self.assertEqual(
+            staticfiles_storage.url('css/site.css'), f'/static/{self.hashed}'
+        )
+
+    def test_hashed_file_is_immutable_and_compressed(self):
+        """Файл с хэшем отдаётся сжатым и кэшируется навсегда."""
+        response = self.get(
+            f'/static/{self.hashed}', HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(gzip.decompress(b''.join(response)), CSS)
+
+    def test_plain_name_is_revalidated(self):
+        """Имя без хэша без сжатия у клиента и без вечного кэша."""
+        response = self.get('/static/css/site.css')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(b''.join(response), CSS)
+
+    def test_not_modified(self):
+        """Неизменившийся файл не отдаётся заново."""
+        response = self.get(f'/static/{self.hashed}')
+        response = self.get(
+            f'/static/{self.hashed}',
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_missing_files_fall_through(self):
+        """Чего нет в STATIC_ROOT, обрабатывают представления."""
+        for path in ('/static/css/none.css', '/static/../settings.py', '/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path).content, b'view')
+
+
+class StaticUrlWithoutManifestTests(SimpleTestCase):
+    def test_url_without_collectstatic(self):
+        """Без collectstatic {% static %} отдаёт имена без хэша."""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        with override_settings(STATIC_ROOT=root):
+            self.assertEqual(
+                staticfiles_storage.url('css/bootstrap.min.css'),
+                '/static/css/bootstrap.min.css',
+            )
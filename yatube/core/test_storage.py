@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.storage import ContentAddressedStorage
+from core.views import media
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(
+            location=self.directory, base_url='/media/'
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def blobs(self):
+        return [
+            filename
+            for _, _, filenames in os.walk(f'{self.directory}/blobs')
+            for filename in filenames
+        ]
+
+    def test_identical_files_share_blob(self):
+        """Одинаковое содержимое хранится один раз под разными именами."""
+        first = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        second = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        other = self.storage.save('posts/b.gif', ContentFile(b'PNG'))
+        self.assertEqual(first, 'posts/a.gif')
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(self.blobs()), 2)
+        self.assertEqual(self.storage.url(first), self.storage.url(second))
+        self.assertNotEqual(self.storage.url(first), self.storage.url(other))
+        self.assertTrue(self.storage.url(first).startswith('/media/blobs/'))
+        with self.storage.open(second) as file:
+            self.assertEqual(file.read(), b'GIF')
+
+    def test_delete_keeps_shared_content(self):
+        """Удаление имени не удаляет содержимое, общее с другим именем."""
+        first = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        second = self.storage.save('posts/c.gif', ContentFile(b'GIF'))
+        self.storage.delete(first)
+        self.assertFalse(self.storage.exists(first))
+        with self.storage.open(second) as file:
+            self.assertEqual(file.read(), b'GIF')
+
+    def test_dangling_link_keeps_name(self):
+        """Ссылка на удалённое содержимое всё равно занимает имя."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        os.remove(self.storage.path(self.storage.blob_name(name)))
+        self.assertTrue(self.storage.exists(name))
+        self.assertNotEqual(
+            self.storage.save('posts/a.gif', ContentFile(b'GIF')), name
+        )
+
+    def test_duplicate_upload_refreshes_blob(self):
+        """Повторная загрузка освежает время изменения blob-файла."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        blob = self.storage.path(self.storage.blob_name(name))
+        os.utime(blob, (0, 0))
+        self.storage.save('posts/b.gif', ContentFile(b'GIF'))
+        self.assertGreater(os.stat(blob).st_mtime, 0)
+
+    def test_blob_permissions_match_plain_storage(self):
+        """Права blob-файла те же, что у обычного сохранения."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        plain = FileSystemStorage(location=self.directory).save(
+            'plain.gif', ContentFile(b'GIF')
+        )
+        self.assertEqual(
+            os.stat(self.storage.path(self.storage.blob_name(name))).st_mode,
+            os.stat(os.path.join(self.directory, plain)).st_mode,
+        )
+
+    @override_settings(FILE_UPLOAD_PERMISSIONS=0o640)
+    def test_blob_permissions_from_settings(self):
+        """FILE_UPLOAD_PERMISSIONS применяется и к blob-файлам."""
+        storage = ContentAddressedStorage(location=self.directory)
+        name = storage.save('posts/a.gif', ContentFile(b'GIF'))
+        self.assertEqual(
+            os.stat(storage.path(storage.blob_name(name))).st_mode & 0o777,
+            0o640,
+        )
+
+    def test_media_view_marks_blobs_immutable(self):
+        """Файлы содержимого отдаются с кэшем навсегда, остальные — нет."""
+        name = self.storage.save('posts/a.gif', ContentFile(b'GIF'))
+        request = RequestFactory().get('/')
+        os.makedirs(f'{self.directory}/cache')
+        with open(f'{self.directory}/cache/thumbnail.jpg', 'wb') as file:
+            file.write(b'JPEG')
+        with override_settings(MEDIA_ROOT=self.directory):
+            blob = media(request, self.storage.blob_name(name))
+            upload = media(request, name)
+            thumbnail = media(request, 'cache/thumbnail.jpg')
+        self.assertIn('immutable', blob['Cache-Control'])
+        self.assertFalse(upload.has_header('Cache-Control'))
+        self.assertFalse(thumbnail.has_header('Cache-Control'))
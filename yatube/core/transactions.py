@@ -0,0 +1,36 @@
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+from .middleware import SAFE_METHODS
+
+
+def retry_on_locked(view):
+    """
+    Выполняет представление в транзакции и повторяет его целиком, если
+    база ответила «database is locked»: до SQLITE_RETRY_ATTEMPTS попыток
+    с паузой SQLITE_RETRY_DELAY * 2 ** n секунд и случайным разбросом.
+    Безопасные запросы (показ формы) и запросы внутри чужой транзакции
+    просто вызывают представление: первым блокировка записи не нужна,
+    а откатить и повторить можно только транзакцию целиком.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method in SAFE_METHODS or connection.in_atomic_block:
+            return view(request, *args, **kwargs)
+        attempts = max(settings.SQLITE_RETRY_ATTEMPTS, 1)
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return view(request, *args, **kwargs)
+            except OperationalError as error:
+                if 'locked' not in str(error) or attempt == attempts - 1:
+                    raise
+            time.sleep(
+                settings.SQLITE_RETRY_DELAY * 2 ** attempt
+                * random.uniform(0.5, 1.5)
+            )
+    return wrapper
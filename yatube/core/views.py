@@ -1,6 +1,12 @@
+import hmac
 from http import HTTPStatus
 
+from django.conf import settings
+from django.http import Http404, HttpResponse
 from django.shortcuts import render
+from django.views.static import serve
+
+from . import metrics as metrics_registry
 
 
 def page_not_found(request, exception):
@@ -25,3 +31,38 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html', status=HTTPStatus.FORBIDDEN)
+
+
+def media(request, path):
+    """
+    Отдаёт файлы MEDIA_ROOT при разработке. Файлы из MEDIA_IMMUTABLE_DIRS
+    адресуются по содержимому и кэшируются браузером навсегда.
+    """
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if path.startswith(tuple(
+        f'{directory}/' for directory in settings.MEDIA_IMMUTABLE_DIRS
+    )):
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+
+def _metrics_allowed(request):
+    if settings.METRICS_TOKEN:
+        return hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', ''),
+            f'Bearer {settings.METRICS_TOKEN}',
+        )
+    return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+
+def metrics(request):
+    """
+    Метрики всех процессов в формате Prometheus: по METRICS_TOKEN, если
+    он задан, иначе для METRICS_ALLOWED_IPS.
+    """
+    if not settings.METRICS_DIR or not _metrics_allowed(request):
+        raise Http404
+    return HttpResponse(
+        metrics_registry.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Comment, Group, Post
+from .models import Comment, Group, Job, Post
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -42,6 +42,13 @@ class CommentAdmin(admin.ModelAdmin):
     search_fields = ('author', 'email', 'text')
 
 
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'args', 'status', 'attempts', 'run_at')
+    list_filter = ('status', 'task')
+    readonly_fields = ('error',)
+
+
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
+admin.site.register(Job, JobAdmin)
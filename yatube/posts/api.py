@@ -0,0 +1,188 @@
+import json
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse
+from django.views.decorators.http import condition, require_GET
+
+from . import timeline
+from .cache import listing_etag
+from .counters import user_counter
+from .models import Comment, Group, Post
+from .paginator import COUNT_APPROXIMATE, CursorPaginator
+
+User = get_user_model()
+
+POST_FIELDS = (
+    'id',
+    'text',
+    'pub_date',
+    'author__username',
+    'group__slug',
+    'image',
+    'thumbnails',
+    'comments_count',
+)
+COMMENT_FIELDS = ('id', 'text', 'created', 'author__username')
+
+
+def _json(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data,
+        status=status,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')},
+    )
+
+
+def _not_found():
+    return _json({'detail': 'Не найдено.'}, HTTPStatus.NOT_FOUND)
+
+
+def api_login_required(view):
+    """Как login_required, но вместо перехода на вход отвечает 401."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _json(
+                {'detail': 'Нужна авторизация.'}, HTTPStatus.UNAUTHORIZED
+            )
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def _comment_row(row):
+    row['author'] = row.pop('author__username')
+    return row
+
+
+def _post_row(row):
+    """Приводит строку values() поста к виду для клиента."""
+    _comment_row(row)
+    row['group'] = row.pop('group__slug')
+    image = row['image']
+    row['image'] = Post.image.field.storage.url(image) if image else None
+    thumbnails = row['thumbnails']
+    row['thumbnails'] = json.loads(thumbnails) if thumbnails else {}
+    return row
+
+
+def _page(request, rows, key=('pub_date', 'id'), per_page=None):
+    """
+    Страница записей по курсору (?after= / ?before=) и курсоры соседних
+    страниц. Строки берутся через values(), без создания моделей.
+    """
+    paginator = CursorPaginator(
+        rows,
+        per_page or settings.NUM_OF_POSTS,
+        key=key,
+        count_mode=COUNT_APPROXIMATE,
+    )
+    page = paginator.get_page(
+        1, request.GET.get('after'), request.GET.get('before')
+    )
+    return {
+        'results': list(page),
+        'next': paginator.next_cursor if page.has_next() else None,
+        'previous': (
+            paginator.previous_cursor
+            if paginator.has_previous_rows() else None
+        ),
+    }
+
+
+def _feed(request, posts, key=('pub_date', 'id')):
+    extra = [field for field in key if field not in POST_FIELDS]
+    data = _page(request, posts.values(*POST_FIELDS, *extra), key)
+    for row in data['results']:
+        for field in extra:
+            del row[field]
+    data['results'] = [_post_row(row) for row in data['results']]
+    return data
+
+
+@require_GET
+@condition(etag_func=lambda request: listing_etag(request, 'index'))
+def index(request):
+    """Главная лента."""
+    return _json(_feed(request, Post.objects.all()))
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, slug: listing_etag(request, f'group:{slug}')
+)
+def group_list(request, slug):
+    """Лента группы."""
+    group = Group.objects.filter(slug=slug).values(
+        'slug', 'title', 'description', 'posts_count'
+    ).first()
+    if group is None:
+        return _not_found()
+    data = _feed(request, Post.objects.filter(group__slug=slug))
+    data['group'] = group
+    return _json(data)
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, username: listing_etag(
+        request, f'profile:{username}'
+    )
+)
+def profile(request, username):
+    """Лента автора."""
+    author = User.objects.filter(username=username).values(
+        'id', 'username', 'first_name', 'last_name'
+    ).first()
+    if author is None:
+        return _not_found()
+    counter = user_counter(author.pop('id'))
+    author.update(
+        posts_count=counter.posts_count,
+        followers_count=counter.followers_count,
+        following_count=counter.following_count,
+    )
+    data = _feed(request, Post.objects.filter(author__username=username))
+    data['author'] = author
+    return _json(data)
+
+
+def _follow_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    # Любое изменение поста меняет версию главной ленты.
+    return listing_etag(request, 'index', f'follow:{request.user.pk}')
+
+
+@require_GET
+@api_login_required
+@condition(etag_func=_follow_etag)
+def follow_index(request):
+    """Лента подписок пользователя."""
+    return _json(
+        _feed(request, timeline.feed(request.user), timeline.FEED_KEY)
+    )
+
+
+@require_GET
+@condition(
+    etag_func=lambda request, post_id: listing_etag(
+        request, 'index', f'post:{post_id}'
+    )
+)
+def post_detail(request, post_id):
+    """Пост и страница комментариев к нему."""
+    post = Post.objects.filter(pk=post_id).values(*POST_FIELDS).first()
+    if post is None:
+        return _not_found()
+    data = _page(
+        request,
+        Comment.objects.filter(post_id=post_id).values(*COMMENT_FIELDS),
+        key=('created', 'id'),
+        per_page=settings.NUM_OF_COMMENTS,
+    )
+    data['results'] = [_comment_row(row) for row in data['results']]
+    data['post'] = _post_row(post)
+    return _json(data)
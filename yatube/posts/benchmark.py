@@ -0,0 +1,368 @@
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from . import counters, hotness, recommendations, search, timeline
+from .models import Comment, Follow, Group, Post
+from .urls import app_name, urlpatterns
+
+User = get_user_model()
+
+# Объём данных в dump.json; seed(scale) создаёт в scale раз больше.
+DUMP_SIZE = {'users': 4, 'posts': 39, 'comments': 2, 'follows': 3}
+GROUPS_PER_SCALE = 0.1
+# Каждый TOP_AUTHOR_POSTS-й пост и примерно каждая TOP_AUTHOR_FOLLOWS-я
+# подписка приходятся на самого активного автора.
+TOP_AUTHOR_POSTS = 40
+TOP_AUTHOR_FOLLOWS = 10
+METRICS = ('queries', 'time', 'memory')
+
+
+def seed(scale, random_seed=0):
+    """
+    Заполняет базу пользователями, группами, постами, комментариями
+    и подписками в scale раз больше dump.json. Данные детерминированы
+    random_seed, поэтому прогоны на разных коммитах сравнимы.
+    """
+    rnd = random.Random(random_seed)
+    sizes = {name: size * scale for name, size in DUMP_SIZE.items()}
+    User.objects.bulk_create(
+        User(username=f'bench_{i}') for i in range(sizes['users'])
+    )
+    users = list(
+        User.objects.filter(
+            username__startswith='bench_'
+        ).order_by('id').values_list('id', flat=True)
+    )
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-{i}', description='')
+        for i in range(max(int(scale * GROUPS_PER_SCALE), 1))
+    )
+    groups = list(
+        Group.objects.filter(
+            slug__startswith='bench-'
+        ).values_list('id', flat=True)
+    ) + [None]
+    # Первый пользователь — самый активный и популярный автор.
+    Post.objects.bulk_create(
+        (
+            Post(
+                text=f'Пост {i}',
+                author_id=(
+                    users[0] if i % TOP_AUTHOR_POSTS == 0
+                    else rnd.choice(users)
+                ),
+                group_id=rnd.choice(groups),
+            )
+            for i in range(sizes['posts'])
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+    )
+    post = Post.objects.filter(author_id=users[0]).order_by('id').first()
+    posts = list(Post.objects.values_list('id', flat=True))
+    Comment.objects.bulk_create(
+        (
+            Comment(
+                post_id=post.pk if i % 2 == 0 else rnd.choice(posts),
+                author_id=rnd.choice(users),
+                text=f'Комментарий {i}',
+            )
+            for i in range(sizes['comments'])
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+    )
+    pairs = {(users[1], users[0])}
+    while len(pairs) < min(sizes['follows'], len(users) * 2):
+        reader = rnd.choice(users[1:])
+        author = (
+            users[0] if rnd.randrange(TOP_AUTHOR_FOLLOWS) == 0
+            else rnd.choice(users)
+        )
+        if reader != author:
+            pairs.add((reader, author))
+    Follow.objects.bulk_create(
+        (Follow(user_id=reader, author_id=author)
+         for reader, author in pairs),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+    )
+    for user_id in {reader for reader, _ in pairs}:
+        timeline.rebuild(user_id)
+    counters.reconcile()
+    search.rebuild()
+    recommendations.rebuild()
+    hotness.update()
+
+
+def scenarios():
+    """
+    Запросы ко всем адресам posts/urls.py на засеянных данных:
+    имя адреса -> (кто, метод, путь, данные формы). Все запросы
+    обращаются к самому активному автору и его самому обсуждаемому посту.
+    Подписку и отписку выполняет пользователь fan, до замеров
+    не подписанный на автора.
+    """
+    author = User.objects.get(username='bench_0')
+    post = author.posts.order_by('id').first()
+    group = Group.objects.filter(slug__startswith='bench-').order_by(
+        'id'
+    ).first()
+    return {
+        'index': ('reader', 'get', reverse('posts:index'), None),
+        'popular': ('reader', 'get', reverse('posts:popular'), None),
+        'group_list': (
+            'reader',
+            'get',
+            reverse('posts:group_list', args=[group.slug]),
+            None,
+        ),
+        'profile': (
+            'reader',
+            'get',
+            reverse('posts:profile', args=[author.username]),
+            None,
+        ),
+        'post_detail': (
+            'reader',
+            'get',
+            reverse('posts:post_detail', args=[post.pk]),
+            None,
+        ),
+        'search': (
+            'reader', 'get', reverse('posts:search') + '?q=пост', None
+        ),
+        'api_index': ('reader', 'get', reverse('posts:api_index'), None),
+        'api_group_list': (
+            'reader',
+            'get',
+            reverse('posts:api_group_list', args=[group.slug]),
+            None,
+        ),
+        'api_profile': (
+            'reader',
+            'get',
+            reverse('posts:api_profile', args=[author.username]),
+            None,
+        ),
+        'api_post_detail': (
+            'reader',
+            'get',
+            reverse('posts:api_post_detail', args=[post.pk]),
+            None,
+        ),
+        'api_follow_index': (
+            'reader', 'get', reverse('posts:api_follow_index'), None
+        ),
+        'post_create': (
+            'author',
+            'post',
+            reverse('posts:post_create'),
+            {'text': 'Новый пост'},
+        ),
+        'post_edit': (
+            'author',
+            'post',
+            reverse('posts:post_edit', args=[post.pk]),
+            {'text': post.text, 'group': post.group_id or ''},
+        ),
+        'add_comment': (
+            'reader',
+            'post',
+            reverse('posts:add_comment', args=[post.pk]),
+            {'text': 'Комментарий'},
+        ),
+        'follow_index': (
+            'reader', 'get', reverse('posts:follow_index'), None
+        ),
+        'profile_follow': (
+            'fan',
+            'get',
+            reverse('posts:profile_follow', args=[author.username]),
+            None,
+        ),
+        'profile_unfollow': (
+            'fan',
+            'get',
+            reverse('posts:profile_unfollow', args=[author.username]),
+            None,
+        ),
+    }
+
+
+def url_names():
+    """Имена всех адресов приложения posts."""
+    return [f'{app_name}:{pattern.name}' for pattern in urlpatterns]
+
+
+def _request(client, method, path, data):
+    cache.clear()
+    return getattr(client, method)(path, data or {})
+
+
+def _recorder(queries):
+    # CaptureQueriesContext не годится: начало запроса сбрасывает
+    # connection.queries, и накопленный журнал теряется.
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+    return record
+
+
+def measure(client, method, path, data=None, repeat=3, prepare=None):
+    """
+    Замеряет запрос с пустым кэшем: число SQL-запросов, медианное время
+    (секунды) и пик выделенной памяти (байты). Память меряется отдельным
+    прогоном, чтобы tracemalloc не искажал время. prepare вызывается
+    перед каждым прогоном вне замера: так каждый прогон запроса,
+    меняющего данные, идёт по одному и тому же пути.
+    """
+    prepare = prepare or (lambda: None)
+    timings = []
+    for _ in range(repeat):
+        prepare()
+        queries = []
+        with connection.execute_wrapper(_recorder(queries)):
+            started = time.perf_counter()
+            response = _request(client, method, path, data)
+            timings.append(time.perf_counter() - started)
+    prepare()
+    tracemalloc.start()
+    try:
+        _request(client, method, path, data)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'time': round(statistics.median(timings), 6),
+        'memory': peak,
+    }
+
+
+def budget(view_name):
+    """Пределы для адреса: общие из PERF_BUDGETS с поправками адреса."""
+    budgets = settings.PERF_BUDGETS
+    return {**budgets['default'], **budgets.get(view_name, {})}
+
+
+def exceeded(view_name, result):
+    """Метрики результата, вышедшие за пределы бюджета."""
+    limits = budget(view_name)
+    return [
+        metric for metric in METRICS
+        if metric in limits and result[metric] > limits[metric]
+    ]
+
+
+def _following(user, author, state):
+    """Подготовка замера: подписка user на author есть (state) или нет."""
+    def prepare():
+        if state:
+            Follow.objects.get_or_create(user=user, author=author)
+        else:
+            Follow.objects.filter(user=user, author=author).delete()
+    return prepare
+
+
+@override_settings(JOBS_EAGER=False)
+def run(repeat=3):
+    """
+    Прогоняет все адреса posts от имени самого активного автора,
+    его первого подписчика и пользователя, который на автора не подписан;
+    возвращает результаты по имени адреса. Замеряется только путь
+    запроса: задачи остаются в очереди, как при работе с воркером
+    run_jobs.
+    """
+    follow = Follow.objects.filter(
+        author__username='bench_0'
+    ).order_by('user_id').select_related('user', 'author').first()
+    fan = User.objects.filter(username__startswith='bench_').exclude(
+        pk=follow.author_id
+    ).exclude(
+        pk__in=Follow.objects.filter(author=follow.author).values('user')
+    ).order_by('id').first() or follow.user
+    clients = {'author': Client(), 'reader': Client(), 'fan': Client()}
+    clients['author'].force_login(follow.author)
+    clients['reader'].force_login(follow.user)
+    clients['fan'].force_login(fan)
+    preparations = {
+        'profile_follow': _following(fan, follow.author, False),
+        'profile_unfollow': _following(fan, follow.author, True),
+    }
+    results = {}
+    for name, (who, method, path, data) in scenarios().items():
+        view_name = f'{app_name}:{name}'
+        result = measure(
+            clients[who], method, path, data, repeat, preparations.get(name)
+        )
+        result['path'] = path
+        result['exceeded'] = exceeded(view_name, result)
+        results[view_name] = result
+    return results
+
+
+def _write(client, requests, post_path, create_path):
+    """Чередует комментарии к посту и новые посты; (успехи, ошибки)."""
+    done = failed = 0
+    try:
+        for number in range(requests):
+            if number % 2:
+                path, data = create_path, {'text': f'Пост {number}'}
+            else:
+                path, data = post_path, {'text': f'Комментарий {number}'}
+            try:
+                response = client.post(path, data)
+            except DatabaseError:
+                failed += 1
+                continue
+            if response.status_code == 302:
+                done += 1
+            else:
+                failed += 1
+    finally:
+        connection.close()
+    return done, failed
+
+
+@override_settings(JOBS_EAGER=False)
+def concurrent_writes(writers, requests):
+    """
+    writers пользователей одновременно отправляют по requests запросов
+    add_comment (все к одному посту) и post_create. Возвращает число
+    успешных записей, ошибок, время (секунды) и записей в секунду.
+    """
+    users = list(User.objects.filter(
+        username__startswith='bench_'
+    ).order_by('id')[:writers])
+    post = Post.objects.filter(author=users[0]).order_by('id').first()
+    clients = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        clients.append(client)
+    post_path = reverse('posts:add_comment', args=[post.pk])
+    create_path = reverse('posts:post_create')
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        results = list(pool.map(
+            lambda client: _write(client, requests, post_path, create_path),
+            clients,
+        ))
+    elapsed = time.perf_counter() - started
+    done = sum(result[0] for result in results)
+    return {
+        'writers': len(clients),
+        'writes': done,
+        'errors': sum(result[1] for result in results),
+        'time': round(elapsed, 6),
+        'throughput': round(done / elapsed, 1),
+    }
@@ -0,0 +1,111 @@
+import hashlib
+import uuid
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from core import metrics, routers
+
+POST_CARD_FRAGMENT = 'post_card'
+
+
+def post_card_key(post_id):
+    """Ключ кэша карточки поста из includes/post_inc.html."""
+    return make_template_fragment_key(POST_CARD_FRAGMENT, [post_id])
+
+
+def invalidate_post_cards(post_ids):
+    """Сбрасывает закэшированные карточки постов."""
+    cache.delete_many([post_card_key(post_id) for post_id in post_ids])
+
+
+def _version_key(scope):
+    return f'listing:version:{scope}'
+
+
+def _new_version():
+    return uuid.uuid4().hex
+
+
+def listing_version(scope):
+    """
+    Текущая версия ленты scope ('index', 'popular', 'group:<slug>',
+    'profile:<username>', 'follow:<user_id>', 'post:<post_id>').
+
+    Если версия вытеснена из кэша, создаётся новая, поэтому старые
+    страницы никогда не достаются по потерянной версии.
+    """
+    return cache.get_or_set(_version_key(scope), _new_version, None)
+
+
+def bump_listings(*scopes):
+    """Делает устаревшими все закэшированные страницы лент scopes."""
+    cache.set_many(
+        {_version_key(scope): _new_version() for scope in scopes}, None
+    )
+
+
+def post_listings(post, group_slugs=()):
+    """Ленты, в которых показывается пост."""
+    scopes = {'index', 'popular', f'profile:{post.author.username}'}
+    if post.group_id:
+        scopes.add(f'group:{post.group.slug}')
+    scopes.update(f'group:{slug}' for slug in group_slugs if slug)
+    return scopes
+
+
+def refresh_post(post):
+    """Сбрасывает карточку поста и все ленты, где он показан."""
+    invalidate_post_cards([post.pk])
+    bump_listings(*post_listings(post))
+
+
+def listing_etag(request, *scopes):
+    """ETag страницы по версиям лент scopes и полному пути запроса."""
+    versions = ':'.join(listing_version(scope) for scope in scopes)
+    return hashlib.md5(
+        f'{versions}:{request.get_full_path()}'.encode()
+    ).hexdigest()
+
+
+def listing_key(request, scope):
+    """
+    Ключ страницы ленты: версия ленты, состояние входа и полный путь
+    запроса, включая номер страницы и курсор.
+    """
+    viewer = (
+        f'user:{request.user.pk}'
+        if request.user.is_authenticated else 'anon'
+    )
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'listing:{scope}:{listing_version(scope)}:{viewer}:{path}'
+
+
+def cache_listing(scope, kwarg=None):
+    """
+    Кэширует страницу ленты до изменения её версии. Страница для кэша
+    строится по основной базе, даже если запросу разрешены реплики.
+
+    Имя ленты — scope, а для лент группы или автора к нему добавляется
+    значение аргумента view kwarg: @cache_listing('group', 'slug').
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            name = scope if kwarg is None else f'{scope}:{kwargs[kwarg]}'
+            key = listing_key(request, name)
+            response = cache.get(key)
+            metrics.LISTING_CACHE.inc(
+                listing=scope, result='miss' if response is None else 'hit'
+            )
+            if response is None:
+                with routers.primary():
+                    response = view(request, *args, **kwargs)
+                if response.status_code == HTTPStatus.OK:
+                    cache.set(key, response, settings.LISTING_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
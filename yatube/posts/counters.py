@@ -0,0 +1,127 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F
+
+from .models import Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+# Счётчик пользователя: (поле, модель, по какому полю считать).
+USER_COUNTERS = (
+    ('posts_count', Post, 'author'),
+    ('followers_count', Follow, 'author'),
+    ('following_count', Follow, 'user'),
+)
+
+
+def shift(queryset, field, delta):
+    """
+    Сдвигает счётчик field у записей queryset на delta одним UPDATE.
+
+    Ниже нуля счётчик не уходит: такое расхождение исправит
+    reconcile_counters.
+    """
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def create_user_counter(user_id):
+    """Строка счётчиков пользователя, посчитанная по базе, если её нет."""
+    UserCounter.objects.get_or_create(
+        user_id=user_id, defaults=count_user(user_id)
+    )
+
+
+def shift_user(user_id, field, delta):
+    """
+    Сдвигает счётчик пользователя. Если строки счётчиков ещё нет,
+    она создаётся и считается по базе целиком, уже с этим изменением.
+    Уменьшение строку не создаёт: при удалении пользователя каскад
+    удаляет его строку раньше постов и подписок.
+    """
+    counters = UserCounter.objects.filter(user_id=user_id)
+    if (
+        not shift(counters, field, delta)
+        and delta > 0
+        and not counters.exists()
+    ):
+        create_user_counter(user_id)
+
+
+def shift_post(post_id, field, delta):
+    shift(Post.objects.filter(pk=post_id), field, delta)
+
+
+def shift_group(group_id, field, delta):
+    if group_id is not None:
+        shift(Group.objects.filter(pk=group_id), field, delta)
+
+
+def count_user(user_id):
+    """Точные значения счётчиков пользователя по базе."""
+    return {
+        field: model.objects.filter(**{key: user_id}).count()
+        for field, model, key in USER_COUNTERS
+    }
+
+
+def user_counter(user_id):
+    """
+    Счётчики пользователя. Строку создают сигналы при регистрации
+    и изменениях; если её нет, чтение не пишет в базу, а отдаёт нули.
+    """
+    counter = UserCounter.objects.filter(user_id=user_id).first()
+    return counter or UserCounter(user_id=user_id)
+
+
+def _reconcile_column(queryset, field, related):
+    fixed = 0
+    drifted = queryset.order_by().annotate(
+        actual=Count(related)
+    ).exclude(**{field: F('actual')}).values_list('pk', 'actual')
+    for pk, actual in drifted.iterator():
+        fixed += queryset.filter(pk=pk).update(**{field: actual})
+    return fixed
+
+
+def _reconcile_users():
+    actual = defaultdict(lambda: dict.fromkeys(
+        (field for field, _, _ in USER_COUNTERS), 0
+    ))
+    for field, model, key in USER_COUNTERS:
+        totals = model.objects.order_by().values_list(key).annotate(
+            total=Count('pk')
+        )
+        for user_id, total in totals:
+            actual[user_id][field] = total
+    stored = {
+        counter.pk: counter for counter in UserCounter.objects.all()
+    }
+    fixed, missing = 0, []
+    for user_id in User.objects.values_list('pk', flat=True).iterator():
+        counts = actual[user_id]
+        counter = stored.get(user_id)
+        if counter is None:
+            missing.append(UserCounter(user_id=user_id, **counts))
+            continue
+        if any(getattr(counter, name) != value
+               for name, value in counts.items()):
+            fixed += UserCounter.objects.filter(
+                pk=user_id
+            ).update(**counts)
+    UserCounter.objects.bulk_create(missing, ignore_conflicts=True)
+    return fixed
+
+
+def reconcile():
+    """
+    Пересчитывает все счётчики по базе и возвращает число исправленных
+    записей. Недостающие строки счётчиков пользователей создаются.
+    """
+    return (
+        _reconcile_column(Post.objects.all(), 'comments_count', 'comments')
+        + _reconcile_column(Group.objects.all(), 'posts_count', 'posts')
+        + _reconcile_users()
+    )
@@ -0,0 +1,125 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+# Списки смежности хранятся в кэше как отсортированные массивы id:
+# 8 байт на подписку вместо объекта модели или строки.
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+_COLUMNS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _key(direction, user_id):
+    return f'follow-graph:{direction}:{user_id}'
+
+
+def _load(direction, user_ids):
+    owner, other = _COLUMNS[direction]
+    loaded = {user_id: array('q') for user_id in user_ids}
+    # Списки живут в кэше час: реплика могла бы положить туда
+    # подписки, которых уже нет.
+    rows = Follow.objects.using('default').filter(
+        **{f'{owner}__in': user_ids}
+    ).order_by(owner, other).values_list(owner, other)
+    for owner_id, other_id in rows:
+        loaded[owner_id].append(other_id)
+    return loaded
+
+
+def _remember(adjacency):
+    """
+    Кладёт списки в кэш. Внутри транзакции — только после её фиксации:
+    прочитанное могло быть ещё не зафиксировано, и после отката в кэше
+    на FOLLOW_GRAPH_TIMEOUT осталось бы то, чего нет в базе.
+    """
+    def store():
+        cache.set_many(adjacency, settings.FOLLOW_GRAPH_TIMEOUT)
+
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(store)
+    else:
+        store()
+
+
+def _adjacency(direction, user_ids):
+    """Списки пользователей user_ids: из кэша, недостающие — из базы."""
+    keys = {_key(direction, user_id): user_id for user_id in set(user_ids)}
+    found = {
+        keys[key]: ids for key, ids in cache.get_many(list(keys)).items()
+    }
+    missing = [user_id for user_id in keys.values() if user_id not in found]
+    for start in range(0, len(missing), settings.TIMELINE_BATCH_SIZE):
+        loaded = _load(
+            direction, missing[start:start + settings.TIMELINE_BATCH_SIZE]
+        )
+        _remember({_key(direction, pk): ids for pk, ids in loaded.items()})
+        found.update(loaded)
+    return found
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _adjacency(FOLLOWING, [user_id])[user_id]
+
+
+def followers(author_id):
+    """Отсортированный массив id подписчиков author_id."""
+    return _adjacency(FOLLOWERS, [author_id])[author_id]
+
+
+def following_map(user_ids):
+    """following() сразу для многих пользователей: словарь id -> массив."""
+    return _adjacency(FOLLOWING, user_ids)
+
+
+def followers_map(author_ids):
+    """followers() сразу для многих авторов: словарь id -> массив."""
+    return _adjacency(FOLLOWERS, author_ids)
+
+
+def follows(user_id, author_id):
+    """Подписан ли user_id на author_id; двоичный поиск, O(log n)."""
+    if user_id is None:
+        return False
+    return _contains(following(user_id), author_id)
+
+
+def follows_many(user_id, author_ids):
+    """
+    Те из author_ids, на кого подписан user_id, — одна выборка списка
+    на всю страницу авторов.
+    """
+    if user_id is None:
+        return set()
+    ids = following(user_id)
+    return {
+        author_id for author_id in set(author_ids)
+        if _contains(ids, author_id)
+    }
+
+
+def forget(*user_ids):
+    """
+    Сбрасывает списки смежности пользователей. Сбрасывает сразу и ещё раз
+    после фиксации транзакции, чтобы параллельный запрос не закэшировал
+    незафиксированное состояние.
+    """
+    keys = [
+        _key(direction, user_id)
+        for user_id in user_ids for direction in _COLUMNS
+    ]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
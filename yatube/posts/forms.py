@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import validate
 from .models import Comment, Post
 
 
@@ -16,6 +18,12 @@ class PostForm(forms.ModelForm):
             'image': 'Изображение'
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            validate(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     """
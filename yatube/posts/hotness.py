@@ -0,0 +1,73 @@
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import bump_listings
+from .models import Post, UserCounter
+
+
+def score(comments, followers, age):
+    """
+    Популярность поста с comments комментариями у автора с followers
+    подписчиками через age (timedelta) после публикации. Со временем
+    убывает, поэтому свежие посты обгоняют старые с тем же весом.
+    """
+    hours = max(age.total_seconds(), 0) / 3600
+    weight = (
+        1
+        + comments * settings.HOT_COMMENT_WEIGHT
+        + math.log1p(followers) * settings.HOT_FOLLOWER_WEIGHT
+    )
+    return weight / (hours + 2) ** settings.HOT_GRAVITY
+
+
+def initial_score(author_id):
+    """
+    Популярность нового поста автора author_id: комментариев ещё нет,
+    возраст нулевой. Дальше её пересчитывает update().
+    """
+    followers = UserCounter.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    return score(0, followers or 0, timedelta(0))
+
+
+def update(now=None):
+    """
+    Пересчитывает hot_score постов за последние HOT_WINDOW_DAYS дней
+    пачками по TIMELINE_BATCH_SIZE; у более старых постов он обнуляется.
+    Подписчики берутся из UserCounter: строка счётчика создаётся вместе
+    с пользователем. Возвращает число пересчитанных постов.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.HOT_WINDOW_DAYS)
+    Post.objects.filter(pub_date__lt=since).exclude(
+        hot_score=0
+    ).update(hot_score=0)
+    recent = Post.objects.filter(pub_date__gte=since).order_by('id')
+    updated = last_id = 0
+    while True:
+        rows = list(recent.filter(id__gt=last_id).values_list(
+            'id',
+            'pub_date',
+            'comments_count',
+            'author__counter__followers_count',
+        )[:settings.TIMELINE_BATCH_SIZE])
+        if not rows:
+            break
+        Post.objects.bulk_update(
+            [
+                Post(
+                    pk=post_id,
+                    hot_score=score(comments, followers or 0, now - pub_date),
+                )
+                for post_id, pub_date, comments, followers in rows
+            ],
+            ['hot_score'],
+        )
+        updated += len(rows)
+        last_id = rows[-1][0]
+    bump_listings('popular')
+    return updated
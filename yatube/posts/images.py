@@ -0,0 +1,169 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import connection, transaction
+from PIL import Image, ImageOps
+
+from core import metrics
+
+from . import jobs, thumbnails
+from .cache import refresh_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def executor():
+    """Общий для процесса пул потоков, в котором обрабатываются картинки."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            thread_name_prefix='images',
+        )
+    return _executor
+
+
+def validate(upload):
+    """
+    Проверяет загруженную картинку до сохранения: размер файла
+    и число точек, чтобы не распаковывать в память огромные картинки.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            params={'limit': settings.POST_IMAGE_MAX_UPLOAD_SIZE >> 20},
+        )
+    # Картинку уже открыл forms.ImageField; читается только заголовок.
+    image = getattr(upload, 'image', None)
+    if image is None:
+        return
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая.',
+            params={'width': width, 'height': height},
+        )
+
+
+def encode(image):
+    """
+    Пережимает картинку в POST_IMAGE_FORMAT не больше POST_IMAGE_MAX_SIDE
+    по каждой стороне. Поворот из EXIF применяется, а сами метаданные
+    (EXIF, ICC, комментарии) в новый файл не попадают.
+    """
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert(
+            'RGBA'
+            if image.mode in ('LA', 'PA') or 'transparency' in image.info
+            else 'RGB'
+        )
+    side = settings.POST_IMAGE_MAX_SIDE
+    image.thumbnail((side, side), Image.LANCZOS)
+    output = BytesIO()
+    image.save(
+        output,
+        settings.POST_IMAGE_FORMAT,
+        quality=settings.POST_IMAGE_QUALITY,
+        method=6,
+    )
+    return output.getvalue()
+
+
+def _needs_encoding(image, size):
+    side = settings.POST_IMAGE_MAX_SIDE
+    return (
+        max(image.size) > side
+        or 'exif' in image.info
+        or 'icc_profile' in image.info
+        or size > settings.POST_IMAGE_KEEP_SIZE
+    )
+
+
+@jobs.task(atomic=False)
+def process(post_id):
+    """
+    Обрабатывает картинку поста и готовит миниатюры уже по новой.
+
+    Большие картинки и картинки с метаданными пережимаются, исходный
+    файл удаляется. Анимация и маленькие картинки без метаданных
+    остаются как есть. Если картинку успели заменить, результат
+    отбрасывается: для новой картинки поставлена своя задача.
+    """
+    started = time.perf_counter()
+    result = _process(post_id)
+    metrics.IMAGE_DURATION.observe(
+        time.perf_counter() - started, result=result
+    )
+
+
+def _process(post_id):
+    post = Post.objects.select_related('author', 'group').filter(
+        pk=post_id
+    ).first()
+    if post is None or not post.image:
+        return 'missing'
+    name = post.image.name
+    storage = post.image.storage
+    try:
+        with storage.open(name) as source, Image.open(source) as image:
+            if (
+                not getattr(image, 'is_animated', False)
+                and _needs_encoding(image, storage.size(name))
+            ):
+                data = encode(image)
+            else:
+                data = None
+    except Exception:
+        logger.exception('Не удалось обработать картинку поста %s', post_id)
+        return 'failed'
+    if data is not None:
+        stem = os.path.splitext(os.path.basename(name))[0]
+        extension = settings.POST_IMAGE_FORMAT.lower()
+        # Имя строится по upload_to поля, как при загрузке.
+        encoded = storage.save(
+            post.image.field.generate_filename(post, f'{stem}.{extension}'),
+            ContentFile(data),
+        )
+        if Post.objects.filter(pk=post_id, image=name).update(
+            image=encoded, thumbnails=''
+        ):
+            # Карточки и ленты ссылаются на исходный файл, который
+            # сейчас будет удалён, — сбрасываются, даже если миниатюры
+            # потом не получатся.
+            refresh_post(post)
+            transaction.on_commit(lambda: storage.delete(name))
+        else:
+            storage.delete(encoded)
+            return 'replaced'
+    thumbnails.generate(post_id)
+    return 'kept' if data is None else 'encoded'
+
+
+def _run(post_id):
+    try:
+        process(post_id)
+    finally:
+        connection.close()
+
+
+def schedule(post):
+    """
+    Ставит обработку картинки поста в очередь задач, а без воркера
+    (JOBS_EAGER) — в пул после фиксации транзакции.
+    """
+    if not settings.JOBS_EAGER:
+        jobs.enqueue(process, post.pk)
+    elif settings.THUMBNAIL_ASYNC:
+        transaction.on_commit(lambda: executor().submit(_run, post.pk))
+    else:
+        transaction.on_commit(lambda: process(post.pk))
@@ -0,0 +1,177 @@
+import json
+import logging
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import timedelta
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Зарегистрированные задачи по имени «модуль.функция».
+TASKS = {}
+
+
+def task(func=None, *, atomic=True):
+    """
+    Регистрирует функцию как задачу очереди: @task или @task(atomic=False).
+
+    Воркер выполняет задачу в транзакции, а в SQLite транзакция держит
+    единственную блокировку записи. Долгие задачи (пережатие картинок,
+    пересчёт предложений) объявляются с atomic=False: они считают вне
+    транзакции, свои записи делают короткими транзакциями сами и должны
+    спокойно переносить повтор после частичного выполнения.
+    """
+    if func is None:
+        return partial(task, atomic=atomic)
+    func.task_name = f'{func.__module__}.{func.__name__}'
+    func.atomic = atomic
+    TASKS[func.task_name] = func
+    return func
+
+
+def enqueue(func, *args):
+    """
+    Ставит вызов func(*args) в очередь; аргументы должны переводиться
+    в JSON. Задача записывается в текущей транзакции и видна воркеру
+    только вместе с данными, ради которых поставлена. При JOBS_EAGER
+    задача выполняется в том же процессе после фиксации транзакции:
+    блокировка записи SQLite не держится, пока задача работает.
+    """
+    if settings.JOBS_EAGER:
+        transaction.on_commit(partial(run_eagerly, func, args))
+        return
+    Job.objects.create(task=func.task_name, args=json.dumps(args))
+
+
+def run_eagerly(func, args):
+    """
+    Выполняет задачу сразу, как воркер, но без повторов: ошибка только
+    пишется в лог, транзакция запроса уже зафиксирована.
+    """
+    try:
+        with transaction.atomic() if func.atomic else nullcontext():
+            func(*args)
+    except Exception:
+        logger.exception('Задача %s не выполнена', func.task_name)
+
+
+def claim(worker, limit):
+    """
+    Забирает до limit готовых задач для воркера worker. Задачу,
+    которую одновременно забрал другой воркер, UPDATE по состоянию
+    не отдаст второй раз.
+    """
+    now = timezone.now()
+    ids = list(
+        Job.objects.filter(
+            status=Job.PENDING, run_at__lte=now
+        ).order_by('run_at', 'id').values_list('id', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    Job.objects.filter(pk__in=ids, status=Job.PENDING).update(
+        status=Job.RUNNING, locked_by=worker, locked_at=now
+    )
+    return list(
+        Job.objects.filter(
+            pk__in=ids, status=Job.RUNNING, locked_by=worker
+        ).order_by('run_at', 'id')
+    )
+
+
+def requeue_stale():
+    """
+    Возвращает в очередь задачи, которые воркер забрал и не закончил
+    за JOBS_LOCK_TIMEOUT секунд (воркер упал). Это тоже попытка.
+    """
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        locked_at__lt=timezone.now() - timedelta(
+            seconds=settings.JOBS_LOCK_TIMEOUT
+        ),
+    )
+    stale.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS - 1).update(
+        status=Job.FAILED, attempts=F('attempts') + 1
+    )
+    stale.update(
+        status=Job.PENDING,
+        attempts=F('attempts') + 1,
+        locked_by='',
+        locked_at=None,
+    )
+
+
+def execute(job):
+    """
+    Выполняет задачу в транзакции (если она не объявлена
+    с atomic=False). Выполненная задача удаляется,
+    упавшая повторяется через JOBS_RETRY_DELAY * 2 ** (попытка - 1)
+    секунд, а после JOBS_MAX_ATTEMPTS попыток остаётся в таблице
+    с ошибкой. Возвращает True, если задача выполнена.
+    """
+    try:
+        func = TASKS.get(job.task)
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.task}')
+        with transaction.atomic() if func.atomic else nullcontext():
+            func(*json.loads(job.args))
+    except Exception:
+        job.attempts += 1
+        job.error = traceback.format_exc()
+        job.locked_by, job.locked_at = '', None
+        if job.attempts >= settings.JOBS_MAX_ATTEMPTS:
+            job.status = Job.FAILED
+            logger.exception('Задача %s не выполнена', job)
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(
+                seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1)
+            )
+        job.save()
+        return False
+    job.delete()
+    return True
+
+
+def _execute_in_thread(job):
+    try:
+        return execute(job)
+    finally:
+        connection.close()
+
+
+def work(concurrency=None, once=False, poll_interval=None):
+    """
+    Выполняет задачи очереди, не больше concurrency одновременно.
+    С once=True возвращает число обработанных задач, когда готовых
+    не осталось; иначе ждёт новые каждые poll_interval секунд.
+    """
+    concurrency = concurrency or settings.JOBS_CONCURRENCY
+    poll_interval = poll_interval or settings.JOBS_POLL_INTERVAL
+    worker = uuid.uuid4().hex
+    processed = 0
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix='jobs'
+    ) as pool:
+        while True:
+            requeue_stale()
+            jobs = claim(worker, concurrency)
+            if not jobs:
+                if once:
+                    return processed
+                time.sleep(poll_interval)
+            elif concurrency == 1:
+                # Один поток — без пула, на соединении вызывающего.
+                processed += len([execute(job) for job in jobs])
+            else:
+                processed += len(list(pool.map(_execute_in_thread, jobs)))
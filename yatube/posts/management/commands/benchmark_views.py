@@ -0,0 +1,92 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import (override_settings, setup_databases,
+                               teardown_databases)
+
+from posts import benchmark
+
+# Замеры идут на пустом локальном кэше, чтобы не трогать общий.
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Засевает временную базу данными в scale раз больше dump.json, '
+        'замеряет все адреса posts (запросы, время, память) и сверяет '
+        'их с PERF_BUDGETS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int, default=1000,
+            help='Во сколько раз больше данных, чем в dump.json.'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=3,
+            help='Сколько раз повторять запрос для медианы времени.'
+        )
+        parser.add_argument(
+            '--output',
+            help='Файл для результатов в JSON (по умолчанию — stdout).'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON прошлого прогона, с которым сравнить результаты.'
+        )
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершиться с ошибкой, если бюджет превышен.'
+        )
+
+    def handle(self, *args, **options):
+        with override_settings(CACHES=BENCHMARK_CACHES):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                benchmark.seed(options['scale'])
+                results = benchmark.run(options['repeat'])
+            finally:
+                teardown_databases(old_config, verbosity=0)
+        report = json.dumps(
+            {
+                'scale': options['scale'],
+                'repeat': options['repeat'],
+                'results': results,
+            },
+            indent=2,
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(report)
+        else:
+            self.stdout.write(report)
+        if options['compare']:
+            with open(options['compare']) as previous:
+                self.compare(json.load(previous)['results'], results)
+        over = {
+            view_name: result['exceeded']
+            for view_name, result in results.items() if result['exceeded']
+        }
+        for view_name, metrics in over.items():
+            self.stderr.write(self.style.WARNING(
+                f'{view_name}: превышен бюджет {", ".join(metrics)}'
+            ))
+        if over and options['strict']:
+            raise CommandError(f'Превышен бюджет страниц: {len(over)}')
+
+    def compare(self, previous, results):
+        """Печатает изменение метрик относительно прошлого прогона."""
+        for view_name, result in results.items():
+            before = previous.get(view_name)
+            if before is None:
+                continue
+            changes = ', '.join(
+                f'{metric} {before[metric]} -> {result[metric]}'
+                for metric in benchmark.METRICS
+                if before[metric] != result[metric]
+            )
+            self.stderr.write(f'{view_name}: {changes or "без изменений"}')
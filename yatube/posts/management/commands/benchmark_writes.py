@@ -0,0 +1,67 @@
+import json
+import os
+import tempfile
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import (override_settings, setup_databases,
+                               teardown_databases)
+
+from posts import benchmark
+
+from .benchmark_views import BENCHMARK_CACHES
+
+# Настройки SQLite, как у Django по умолчанию, — для сравнения.
+PLAIN_SQLITE = {
+    'SQLITE_PRAGMAS': {},
+    'SQLITE_BEGIN_IMMEDIATE': False,
+    'SQLITE_RETRY_ATTEMPTS': 1,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет параллельную запись (add_comment и post_create) '
+        'во временную базу-файл: с настройками SQLite из settings '
+        'и с настройками Django по умолчанию.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--writers', type=int, default=8,
+            help='Сколько пользователей пишут одновременно.'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько запросов отправляет каждый.'
+        )
+        parser.add_argument(
+            '--scale', type=int, default=10,
+            help='Во сколько раз больше данных, чем в dump.json.'
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            'tuned': self.measure({}, options),
+            'plain': self.measure(PLAIN_SQLITE, options),
+        }
+        self.stdout.write(json.dumps(results, indent=2, sort_keys=True))
+
+    def measure(self, overrides, options):
+        """Прогон на свежей базе: режим журнала хранится в самом файле."""
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        name = test_settings.get('NAME')
+        with tempfile.TemporaryDirectory() as directory, override_settings(
+            CACHES=BENCHMARK_CACHES, **overrides
+        ):
+            test_settings['NAME'] = os.path.join(directory, 'writes.sqlite3')
+            connection.close()
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                benchmark.seed(options['scale'])
+                return benchmark.concurrent_writes(
+                    options['writers'], options['requests']
+                )
+            finally:
+                teardown_databases(old_config, verbosity=0)
+                test_settings['NAME'] = name
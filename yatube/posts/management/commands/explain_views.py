@@ -0,0 +1,53 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.replay import explain, replay, sample_urls
+
+# Признаки плохого плана: полный проход по таблице и сортировка
+# во временном дереве вместо чтения по индексу.
+SUSPICIOUS = (
+    re.compile(r'^SCAN (TABLE )?\w+$'),
+    re.compile(r'USE TEMP B-TREE FOR ORDER BY'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Повторяет запросы страниц posts и выводит их планы выполнения '
+        '(EXPLAIN), отмечая полные проходы по таблицам.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Завершиться с ошибкой, если найден подозрительный план.'
+        )
+
+    def handle(self, *args, **options):
+        urls, reader = sample_urls()
+        if not urls:
+            raise CommandError('В базе нет постов для проверки.')
+        problems = 0
+        for path in urls:
+            match, response, queries = replay(path, reader)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'{match.view_name} {path}: {len(queries)} запросов'
+            ))
+            for query in queries:
+                plan = explain(query['sql'])
+                self.stdout.write(f'  {query["sql"]}')
+                for line in plan:
+                    if any(pattern.search(line) for pattern in SUSPICIOUS):
+                        problems += 1
+                        self.stdout.write(
+                            self.style.WARNING(f'    ! {line}')
+                        )
+                    else:
+                        self.stdout.write(f'    {line}')
+        if problems and options['strict']:
+            raise CommandError(f'Подозрительных планов: {problems}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено страниц: {len(urls)}, '
+            f'подозрительных планов: {problems}'
+        ))
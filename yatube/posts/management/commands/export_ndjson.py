@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает пользователей, группы, посты, комментарии и подписки '
+        'в NDJSON (по объекту на строку) с постоянным расходом памяти.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл NDJSON (.gz — со сжатием), «-» — stdout.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько записей читать из базы за раз.'
+        )
+
+    def handle(self, *args, **options):
+        with transfer.open_stream(
+            options['path'], 'w', self.stdout
+        ) as stream:
+            totals = transfer.export(stream, options['chunk_size'])
+        self.stderr.write(self.style.SUCCESS(
+            'Выгружено: ' + ', '.join(
+                f'{label} {total}' for label, total in totals.items()
+            )
+        ))
@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает NDJSON из export_ndjson пачками через bulk_create '
+        'в одной транзакции и пересчитывает счётчики, поисковый индекс, '
+        'ленты и миниатюры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', help='Файл NDJSON (.gz — со сжатием), «-» — stdin.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько записей одной модели вставлять за раз.'
+        )
+        parser.add_argument(
+            '--skip-derived', action='store_true',
+            help='Не пересчитывать счётчики, индекс и ленты после загрузки.'
+        )
+
+    def handle(self, *args, **options):
+        importer = transfer.Importer(options['chunk_size'])
+        with transfer.open_stream(
+            options['path'], 'r', sys.stdin
+        ) as stream:
+            totals = importer.load(stream)
+        if not options['skip_derived']:
+            transfer.rebuild_derived()
+        self.stderr.write(self.style.SUCCESS(
+            'Загружено: ' + ', '.join(
+                f'{label} {total}' for label, total in totals.items()
+            )
+        ))
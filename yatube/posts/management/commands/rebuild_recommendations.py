@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+from posts.models import Recommendation
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает предложения «Кого почитать» для всех пользователей '
+        'по текущему графу подписок.'
+    )
+
+    def handle(self, *args, **options):
+        recommendations.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Предложений: {Recommendation.objects.count()}'
+        ))
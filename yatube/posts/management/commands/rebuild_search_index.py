@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import SearchEntry
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает поисковый индекс постов и комментариев.'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в индексе: {SearchEntry.objects.count()}'
+        ))
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Воркер очереди задач: выполняет отложенные задачи из таблицы Job '
+        '(нужен при JOBS_EAGER=0).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.JOBS_CONCURRENCY,
+            help='Сколько задач выполнять одновременно.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        processed = jobs.work(
+            concurrency=options['concurrency'], once=options['once']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано задач: {processed}')
+        )
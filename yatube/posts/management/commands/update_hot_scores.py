@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import hotness
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает популярность свежих постов для ленты «Популярное». '
+        'Запускается периодически, например из cron раз в несколько минут.'
+    )
+
+    def handle(self, *args, **options):
+        updated = hotness.update()
+        self.stdout.write(
+            self.style.SUCCESS(f'Пересчитано постов: {updated}')
+        )
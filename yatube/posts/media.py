@@ -0,0 +1,58 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from sorl.thumbnail import delete as delete_thumbnails
+
+from core.storage import BLOB_DIR
+from .models import Post
+
+UPLOAD_DIR = Post._meta.get_field('image').upload_to.rstrip('/')
+
+
+def _files(directory):
+    """Файлы и ссылки каталога MEDIA_ROOT: пары (имя, путь)."""
+    base = default_storage.path('')
+    for dirpath, _, filenames in os.walk(default_storage.path(directory)):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            yield os.path.relpath(path, base).replace(os.sep, '/'), path
+
+
+def _remove(name, path):
+    delete_thumbnails(name, delete_file=False)
+    os.remove(path)
+
+
+def collect(grace=None):
+    """
+    Удаляет из MEDIA_ROOT картинки, на которые не ссылается ни один пост,
+    вместе с их миниатюрами: сначала ссылки и файлы в каталоге загрузок,
+    затем blob-файлы, на которые не осталось ссылок. Файлы моложе grace
+    секунд (по умолчанию MEDIA_GC_GRACE) не трогаются.
+    Возвращает число удалённых загрузок и blob-файлов.
+    """
+    if grace is None:
+        grace = settings.MEDIA_GC_GRACE
+    deadline = time.time() - grace
+    referenced = set(
+        Post.objects.exclude(image='').exclude(
+            image__isnull=True
+        ).values_list('image', flat=True).iterator()
+    )
+    uploads = blobs = 0
+    linked = set()
+    for name, path in _files(UPLOAD_DIR):
+        if name in referenced or os.lstat(path).st_mtime > deadline:
+            if os.path.islink(path):
+                linked.add(default_storage.blob_name(name))
+            continue
+        _remove(name, path)
+        uploads += 1
+    for name, path in _files(BLOB_DIR):
+        if name in linked or os.lstat(path).st_mtime > deadline:
+            continue
+        _remove(name, path)
+        blobs += 1
+    return uploads, blobs
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 00:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Схема без данных: индекс существующих постов строится командой
+# rebuild_search_index по текущим правилам поиска из posts.search,
+# а миграция не зависит от кода приложения и настроек.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('comment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='posts.Comment')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='posts.Post')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['term', 'post', 'weight'], name='search_term_idx'),
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 2.2.16 on 2026-10-18 01:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Предел TIMELINE_FANOUT_LIMIT на момент миграции: до неё «тяжёлые»
+# авторы определялись по числу подписчиков на лету.
+FANOUT_LIMIT = 5000
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    HeavyAuthor = apps.get_model('posts', 'HeavyAuthor')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    post = Post.objects.filter(pk=models.OuterRef('post_id'))
+    TimelineEntry.objects.update(
+        author_id=models.Subquery(post.values('author_id')),
+        pub_date=models.Subquery(post.values('pub_date')),
+    )
+    HeavyAuthor.objects.bulk_create(
+        HeavyAuthor(author_id=author_id)
+        for author_id in Follow.objects.values('author').annotate(
+            followers=models.Count('id')
+        ).filter(followers__gt=FANOUT_LIMIT).values_list('author', flat=True)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0009_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeavyAuthor',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='author',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='timelineentry',
+            name='pub_date',
+            field=models.DateTimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-18 01:50
+
+from django.conf import settings
+from django.db import migrations
+
+
+def create_counters(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    UserCounter = apps.get_model('posts', 'UserCounter')
+    missing = User.objects.filter(counter__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserCounter.objects.bulk_create(
+        (
+            UserCounter(
+                user_id=user_id,
+                posts_count=Post.objects.filter(author_id=user_id).count(),
+                followers_count=Follow.objects.filter(
+                    author_id=user_id
+                ).count(),
+                following_count=Follow.objects.filter(
+                    user_id=user_id
+                ).count(),
+            )
+            for user_id in list(missing)
+        ),
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_timeline_denormalized'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_counters, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,33 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import DEFAULT_DB_ALIAS, models, router, transaction
+from django.utils import timezone
+from django.utils.functional import cached_property
 
 User = get_user_model()
 
 
-class Post(models.Model):
+class AtomicSaveModel(models.Model):
+    """
+    Модель, которая сохраняется в одной транзакции с обработчиками
+    сигналов: вместе с записью обновляются и счётчики. Внутри чужой
+    транзакции точка сохранения не ставится: ошибка откатывает её целиком.
+    """
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+
+class Post(AtomicSaveModel):
     """
     Модель для управления записями.
     """
@@ -38,15 +61,62 @@ class Post(models.Model):
         blank=True,
         null=True
     )
+    thumbnails = models.TextField(
+        verbose_name='Миниатюры',
+        blank=True,
+        default='',
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Комментариев',
+        default=0,
+        editable=False,
+    )
+    hot_score = models.FloatField(
+        verbose_name='Популярность',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-pub_date']
         verbose_name = 'Записи'
         verbose_name_plural = 'Записи'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'], name='post_pub_date_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+            models.Index(
+                fields=['-hot_score', '-id'], name='post_hot_score_idx'
+            ),
+        ]
 
     def __str__(self):
         return f'{self.text[:15]}'
 
+    @cached_property
+    def thumbnail_urls(self):
+        """Адреса заранее подготовленных миниатюр по имени размера."""
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
+    @property
+    def card_cache_timeout(self):
+        """
+        Срок карточки поста в кэше. Пост, прочитанный с реплики, мог
+        устареть, поэтому его карточка не кэшируется (срок 0).
+        """
+        if self._state.db in (None, DEFAULT_DB_ALIAS):
+            return settings.POST_CARD_CACHE_TIMEOUT
+        return 0
+
 
 class Group(models.Model):
     """
@@ -62,12 +132,17 @@ class Group(models.Model):
         verbose_name="url'адрес"
     )
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Записей',
+        default=0,
+        editable=False,
+    )
 
     def __str__(self):
         return f'{self.title}'
 
 
-class Comment(models.Model):
+class Comment(AtomicSaveModel):
     """
     Модель для создания комментариев.
 
@@ -95,12 +170,18 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
 
-class Follow(models.Model):
+class Follow(AtomicSaveModel):
     """
     Модель для создания подписок.
 
@@ -123,3 +204,205 @@ class Follow(models.Model):
                 fields=['author', 'user'], name='follows_unique'
             )
         ]
+        indexes = [
+            models.Index(
+                fields=['user', 'author'], name='follow_user_author_idx'
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """
+    Запись в ленте подписок пользователя.
+
+    Заполняется при публикации поста (fan-out-on-write) и при подписке,
+    чтобы лента читалась одним диапазоном по индексу. Автор и дата поста
+    повторены здесь: лента сортируется и чистится при отписке без
+    обращения к таблице постов.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='timeline_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_pub_date_idx'
+            ),
+            models.Index(
+                fields=['user', 'author'], name='timeline_user_author_idx'
+            ),
+        ]
+
+
+class HeavyAuthor(models.Model):
+    """
+    Автор, посты которого не раскладываются по лентам, а читаются при
+    запросе ленты (fan-out-on-read): подписчиков у него стало больше
+    TIMELINE_FANOUT_LIMIT. Отметка снимается только вместе с раскладкой
+    его постов по лентам (posts.timeline.settle), иначе посты, вышедшие,
+    пока автор был «тяжёлым», пропали бы из лент подписчиков.
+    """
+
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+
+
+class UserCounter(models.Model):
+    """
+    Счётчики пользователя, которые иначе пришлось бы считать COUNT(*).
+
+    Обновляются сигналами в транзакции изменения; строка создаётся
+    при регистрации пользователя (недостающие досоздают shift_user
+    и reconcile_counters).
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counter',
+    )
+    posts_count = models.PositiveIntegerField(
+        verbose_name='Постов',
+        default=0,
+    )
+    followers_count = models.PositiveIntegerField(
+        verbose_name='Подписчиков',
+        default=0,
+    )
+    following_count = models.PositiveIntegerField(
+        verbose_name='Подписок',
+        default=0,
+    )
+
+
+class SearchEntry(models.Model):
+    """
+    Запись обратного индекса поиска: основа слова встречается
+    в тексте поста (или его комментария comment) с весом weight.
+    """
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+    )
+    comment = models.ForeignKey(
+        Comment,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='search_entries',
+    )
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            # Покрывающий индекс: поиск читает только его.
+            models.Index(
+                fields=['term', 'post', 'weight'], name='search_term_idx'
+            ),
+        ]
+
+
+class Recommendation(models.Model):
+    """
+    Предложение подписаться: автор candidate для пользователя user
+    с весом score (чем больше общих связей, тем выше).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    candidate = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+    )
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'candidate'], name='recommendations_unique'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-score'], name='recommendations_user_idx'
+            ),
+        ]
+
+
+class Job(models.Model):
+    """
+    Отложенная задача: вызов task(*args) вне запроса, в воркере run_jobs.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Не выполнена'),
+    )
+
+    task = models.CharField(max_length=200, verbose_name='Задача')
+    args = models.TextField(default='[]', verbose_name='Аргументы')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Состояние',
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name='Попыток'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now, verbose_name='Выполнить после'
+    )
+    locked_by = models.CharField(max_length=64, blank=True, default='')
+    locked_at = models.DateTimeField(blank=True, null=True)
+    error = models.TextField(blank=True, default='', verbose_name='Ошибка')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', 'run_at', 'id'], name='job_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.task}{self.args}'
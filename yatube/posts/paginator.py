@@ -0,0 +1,216 @@
+import base64
+import binascii
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+COUNT_EXACT = 'exact'
+COUNT_CACHED = 'cached'
+COUNT_APPROXIMATE = 'approximate'
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа в непрозрачную строку для URL."""
+    raw = json.dumps(
+        [value.isoformat() if hasattr(value, 'isoformat') else value
+         for value in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Распаковывает курсор; для испорченного курсора возвращает None."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    return values
+
+
+class CursorPaginator(Paginator):
+    """
+    Паджинатор по ключу (по умолчанию pub_date, id) в порядке убывания.
+
+    Переходы «вперёд» и «назад» идут по курсору из последней или первой
+    записи страницы и не используют OFFSET, поэтому любая страница
+    выдаётся за одно и то же время. Номер страницы без курсора
+    обрабатывается как обычно, через OFFSET.
+    Общее количество считается по режиму PAGINATOR_COUNT_MODE:
+    exact — COUNT(*) на каждый запрос, cached — COUNT(*) из кэша,
+    approximate — COUNT(*) не дальше PAGINATOR_COUNT_LIMIT записей.
+    """
+
+    def __init__(self, object_list, per_page, key=('pub_date', 'id'),
+                 count_mode=None, **kwargs):
+        self.key = tuple(key)
+        super().__init__(
+            object_list.order_by(*(f'-{field}' for field in self.key)),
+            per_page,
+            **kwargs
+        )
+        self.count_mode = count_mode or settings.PAGINATOR_COUNT_MODE
+        self.page_obj = None
+        self.by_cursor = False
+        self._has_more = None
+
+    @cached_property
+    def count(self):
+        if self.count_mode == COUNT_CACHED:
+            digest = hashlib.md5(
+                str(self.object_list.query).encode()
+            ).hexdigest()
+            return cache.get_or_set(
+                f'paginator:count:{digest}',
+                self.object_list.count,
+                settings.PAGINATOR_COUNT_TIMEOUT,
+            )
+        if self.count_mode == COUNT_APPROXIMATE:
+            return self.object_list[:settings.PAGINATOR_COUNT_LIMIT].count()
+        return self.object_list.count()
+
+    @cached_property
+    def num_pages(self):
+        num_pages = super().num_pages
+        if self._has_more is None:
+            return num_pages
+        # По курсору мы точно знаем, есть ли что-то дальше текущей страницы,
+        # даже если счётчик устарел или был ограничен сверху.
+        number = self.page_obj.number
+        return max(num_pages, number + 1) if self._has_more else number
+
+    def get_page(self, number, after=None, before=None):
+        """
+        Возвращает страницу по курсору, если он передан и корректен,
+        иначе — по номеру, как Paginator.get_page.
+        """
+        after = self._coerce(decode_cursor(after, len(self.key)))
+        before = self._coerce(decode_cursor(before, len(self.key)))
+        self.by_cursor = after is not None or before is not None
+        if not self.by_cursor:
+            return super().get_page(number)
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        if after is not None:
+            return self._cursor_page(number, after, forward=True)
+        return self._cursor_page(number, before, forward=False)
+
+    def _key_fields(self):
+        query = self.object_list.query
+        opts = self.object_list.model._meta
+        for name in self.key:
+            if name in query.annotations:
+                yield query.annotations[name].output_field
+            else:
+                yield opts.pk if name == 'pk' else opts.get_field(name)
+
+    def _coerce(self, values):
+        """
+        Значения курсора в типах полей ключа. Если они не подходят
+        (курсор подделан или от другого ключа), возвращает None.
+        """
+        if values is None:
+            return None
+        try:
+            values = [
+                field.to_python(value)
+                for field, value in zip(self._key_fields(), values)
+            ]
+        except (ValidationError, TypeError, ValueError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        limit = settings.PAGINATOR_COUNT_LIMIT
+        if self.count_mode == COUNT_APPROXIMATE and self.count >= limit:
+            # Счётчик упёрся в предел: есть ли записи дальше, узнаём явно.
+            self._has_more = self.object_list[top:top + 1].exists()
+            self.__dict__.pop('num_pages', None)
+        elif top + self.orphans >= self.count:
+            top = self.count
+        return self._get_page(self.object_list[bottom:top], number, self)
+
+    def _keyset(self, values, forward):
+        """Условие «строго после» (или «строго до») ключа values."""
+        lookup = 'lt' if forward else 'gt'
+        condition = Q()
+        for position, field in enumerate(self.key):
+            equal = {
+                prev: values[index]
+                for index, prev in enumerate(self.key[:position])
+            }
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[position]})
+        return condition
+
+    def _cursor_page(self, number, values, forward):
+        rows = self.object_list.filter(self._keyset(values, forward))
+        if forward:
+            self._has_more = rows[self.per_page:self.per_page + 1].exists()
+            return self._get_page(rows[:self.per_page], number, self)
+        # Назад: ищем per_page-ю запись от курсора и берём всё между ними.
+        self._has_more = True
+        boundary = rows.order_by(*self.key).values_list(*self.key)[
+            self.per_page - 1:self.per_page
+        ]
+        if not boundary:
+            # До курсора меньше целой страницы — это первая страница.
+            return self._get_page(rows, 1, self)
+        rows = rows.exclude(self._keyset(boundary[0], forward=False))
+        return self._get_page(rows, number, self)
+
+    def _get_page(self, *args, **kwargs):
+        self.page_obj = super()._get_page(*args, **kwargs)
+        return self.page_obj
+
+    def _values(self, obj):
+        if isinstance(obj, dict):
+            return [obj[field] for field in self.key]
+        return [getattr(obj, field) for field in self.key]
+
+    def cursor(self, obj):
+        """Курсор, указывающий на запись obj (модель или словарь)."""
+        return encode_cursor(self._values(obj))
+
+    def has_previous_rows(self):
+        """
+        Есть ли записи перед текущей страницей. Для страницы по курсору
+        проверяется по ключу её первой записи, без OFFSET.
+        """
+        if self.page_obj is None or not len(self.page_obj):
+            return False
+        if not self.by_cursor:
+            return self.page_obj.has_previous()
+        return self.object_list.filter(
+            self._keyset(self._values(self.page_obj[0]), forward=False)
+        ).exists()
+
+    @property
+    def next_cursor(self):
+        """Курсор для перехода на следующую страницу."""
+        if self.page_obj is None or not len(self.page_obj):
+            return ''
+        return self.cursor(self.page_obj[len(self.page_obj) - 1])
+
+    @property
+    def previous_cursor(self):
+        """Курсор для перехода на предыдущую страницу."""
+        if self.page_obj is None or not len(self.page_obj):
+            return ''
+        return self.cursor(self.page_obj[0])
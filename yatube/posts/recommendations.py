@@ -0,0 +1,151 @@
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+
+from . import follow_graph, jobs
+from .cache import bump_listings
+from .models import Follow, Recommendation
+
+User = get_user_model()
+
+
+def score(user_id, following, followers):
+    """
+    Лучшие кандидаты в подписки для user_id: список (id, вес).
+
+    following и followers возвращают id подписок и подписчиков
+    пользователя. Кандидат получает вес за каждого автора из подписок,
+    который на него подписан (друзья друзей), и за каждого автора,
+    на которого они подписаны вместе (общие подписки). Авторы
+    с подписчиками больше RECOMMENDATIONS_FANOUT_LIMIT в общих подписках
+    не учитываются: они популярны у всех и ничего не говорят о вкусах.
+    """
+    followed = following(user_id)
+    scores = Counter()
+    for author_id in followed:
+        scores.update(dict.fromkeys(
+            following(author_id), settings.RECOMMENDATIONS_FOF_WEIGHT
+        ))
+        readers = followers(author_id)
+        if len(readers) <= settings.RECOMMENDATIONS_FANOUT_LIMIT:
+            scores.update(dict.fromkeys(
+                readers, settings.RECOMMENDATIONS_COFOLLOW_WEIGHT
+            ))
+    excluded = set(followed)
+    excluded.add(user_id)
+    return heapq.nsmallest(
+        settings.RECOMMENDATIONS_LIMIT,
+        (
+            (candidate, weight) for candidate, weight in scores.items()
+            if candidate not in excluded
+        ),
+        key=lambda item: (-item[1], item[0]),
+    )
+
+
+def _rows(user_id, scored):
+    return [
+        Recommendation(user_id=user_id, candidate_id=candidate, score=weight)
+        for candidate, weight in scored
+    ]
+
+
+def _bump_profiles(user_ids):
+    """Сбрасывает ленты профилей: предложения показываются в них."""
+    user_ids = list(user_ids)
+    for start in range(0, len(user_ids), settings.TIMELINE_BATCH_SIZE):
+        bump_listings(*(
+            f'profile:{username}' for username in User.objects.filter(
+                pk__in=user_ids[start:start + settings.TIMELINE_BATCH_SIZE]
+            ).values_list('username', flat=True)
+        ))
+
+
+def refresh(*user_ids):
+    """
+    Пересчитывает предложения пользователей по кэшу графа подписок.
+    Нужные списки смежности читаются пачками, а не по одному автору.
+    """
+    following = follow_graph.following_map(user_ids)
+    authors = {
+        author_id for ids in following.values() for author_id in ids
+    }
+    following.update(follow_graph.following_map(authors - set(following)))
+    followers = follow_graph.followers_map(authors)
+    rows = [
+        row for user_id in user_ids for row in _rows(
+            user_id,
+            score(user_id, following.__getitem__, followers.__getitem__),
+        )
+    ]
+    with transaction.atomic():
+        Recommendation.objects.filter(user_id__in=user_ids).delete()
+        Recommendation.objects.bulk_create(
+            rows, batch_size=settings.TIMELINE_BATCH_SIZE
+        )
+    _bump_profiles(user_ids)
+
+
+@jobs.task(atomic=False)
+def follow_changed(user_id, author_id):
+    """
+    Обновляет предложения после подписки user_id на author_id
+    или отписки: у самого пользователя, у его подписчиков (для них
+    author_id — друг друга) и у остальных читателей author_id (общая
+    подписка). Если подписчиков больше RECOMMENDATIONS_FANOUT_LIMIT,
+    их предложения догоняет периодический rebuild().
+    """
+    affected = {user_id}
+    for readers in (
+        follow_graph.followers(user_id), follow_graph.followers(author_id)
+    ):
+        if len(readers) <= settings.RECOMMENDATIONS_FANOUT_LIMIT:
+            affected.update(readers)
+    refresh(*affected)
+
+
+def rebuild():
+    """
+    Пересчитывает предложения всех пользователей. Граф подписок
+    читается из базы одним проходом и обходится в памяти; старые
+    предложения заменяются новыми в одной транзакции.
+    """
+    following, followers = defaultdict(list), defaultdict(list)
+    for user_id, author_id in Follow.objects.order_by(
+        'user_id', 'author_id'
+    ).values_list('user_id', 'author_id').iterator():
+        following[user_id].append(author_id)
+        followers[author_id].append(user_id)
+    with transaction.atomic():
+        affected = set(following)
+        affected.update(
+            Recommendation.objects.order_by().values_list(
+                'user_id', flat=True
+            ).distinct()
+        )
+        Recommendation.objects.all().delete()
+        batch = []
+        for user_id in list(following):
+            batch.extend(_rows(
+                user_id,
+                score(
+                    user_id,
+                    lambda pk: following.get(pk, ()),
+                    lambda pk: followers.get(pk, ()),
+                ),
+            ))
+            if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+                Recommendation.objects.bulk_create(batch)
+                batch = []
+        Recommendation.objects.bulk_create(batch)
+    _bump_profiles(affected)
+
+
+def suggestions(user_id):
+    """Предложения пользователю, лучшие первыми."""
+    return Recommendation.objects.filter(
+        user_id=user_id
+    ).select_related('candidate').order_by('-score', 'candidate_id')
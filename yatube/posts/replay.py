@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from .models import Follow, Post
+
+User = get_user_model()
+
+
+def sample_urls():
+    """
+    Адреса страниц приложения posts, открываемых на чтение,
+    с подставленными значениями из базы.
+    """
+    post = (
+        Post.objects.select_related('author', 'group')
+        .filter(group__isnull=False).first()
+        or Post.objects.select_related('author', 'group').first()
+    )
+    if post is None:
+        return [], None
+    follow = Follow.objects.select_related('user').first()
+    reader = follow.user if follow else post.author
+    urls = [
+        reverse('posts:index'),
+        reverse('posts:profile', args=[post.author.username]),
+        reverse('posts:post_detail', args=[post.pk]),
+        reverse('posts:follow_index'),
+    ]
+    if post.group:
+        urls.insert(1, reverse('posts:group_list', args=[post.group.slug]))
+    return urls, reader
+
+
+def replay(path, user=None):
+    """
+    Вызывает view по адресу path без middleware и сессий
+    и возвращает ответ и выполненные SQL-запросы.
+    """
+    request = RequestFactory().get(path)
+    request.user = user or AnonymousUser()
+    match = resolve(request.path_info)
+    with CaptureQueriesContext(connection) as queries:
+        response = match.func(request, *match.args, **match.kwargs)
+    return match, response, queries.captured_queries
+
+
+def explain(sql):
+    """План выполнения запроса в виде списка строк."""
+    prefix = connection.ops.explain_query_prefix()
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}')
+        return [str(row[-1]) for row in cursor.fetchall()]
@@ -0,0 +1,186 @@
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db.models import Count, Sum
+
+from . import jobs
+from .models import Comment, Post, SearchEntry
+
+WORD = re.compile(r'\w+')
+TERM_MAX_LENGTH = 64
+
+# Стеммер Портера для русского языка.
+VOWELS = 'аеиоуыэюя'
+RV = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+I_ENDING = re.compile(r'и$')
+SOFT_SIGN = re.compile(r'ь$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+def _strip(pattern, word):
+    """Отрезает окончание pattern; возвращает (слово, отрезано ли)."""
+    stripped = pattern.sub('', word, count=1)
+    return stripped, stripped != word
+
+
+def _region(word, start=0):
+    """Начало области после первой согласной, идущей за гласной."""
+    for index in range(start + 1, len(word)):
+        if word[index - 1] in VOWELS and word[index] not in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def stem(word):
+    """Основа русского слова; слова на других языках не меняются."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    r2 = _region(word, _region(word))
+    rv, found = _strip(PERFECTIVE_GERUND, rv)
+    if not found:
+        rv, _ = _strip(REFLEXIVE, rv)
+        rv, found = _strip(ADJECTIVE, rv)
+        if found:
+            rv, _ = _strip(PARTICIPLE, rv)
+        else:
+            rv, found = _strip(VERB, rv)
+            if not found:
+                rv, _ = _strip(NOUN, rv)
+    rv, _ = _strip(I_ENDING, rv)
+    derivational = DERIVATIONAL.search(rv)
+    if derivational and len(start) + derivational.start() >= r2:
+        rv = rv[:derivational.start()]
+    rv, found = _strip(SOFT_SIGN, rv)
+    if not found:
+        rv, _ = _strip(SUPERLATIVE, rv)
+        rv = DOUBLE_N.sub('н', rv)
+    return start + rv
+
+
+def terms(text):
+    """Основы слов текста с числом вхождений."""
+    return Counter(
+        stem(word)[:TERM_MAX_LENGTH]
+        for word in WORD.findall(text or '')
+        if len(word) > 1
+    )
+
+
+def _entries(post_id, text, weight, comment_id=None):
+    return [
+        SearchEntry(
+            term=term,
+            post_id=post_id,
+            comment_id=comment_id,
+            weight=count * weight,
+        )
+        for term, count in terms(text).items()
+    ]
+
+
+def index_post(post):
+    """Переиндексирует текст поста (записи комментариев не трогает)."""
+    SearchEntry.objects.filter(post=post, comment__isnull=True).delete()
+    SearchEntry.objects.bulk_create(
+        _entries(post.pk, post.text, settings.SEARCH_POST_WEIGHT)
+    )
+
+
+def index_comment(comment):
+    """Добавляет в индекс текст комментария к посту."""
+    SearchEntry.objects.filter(comment=comment).delete()
+    SearchEntry.objects.bulk_create(
+        _entries(
+            comment.post_id,
+            comment.text,
+            settings.SEARCH_COMMENT_WEIGHT,
+            comment.pk,
+        )
+    )
+
+
+@jobs.task
+def reindex_post(post_id):
+    """Задача очереди: переиндексирует пост по его текущему тексту."""
+    post = Post.objects.filter(pk=post_id).only('text').first()
+    if post is not None:
+        index_post(post)
+
+
+@jobs.task
+def reindex_comment(comment_id):
+    """Задача очереди: добавляет в индекс текст комментария."""
+    comment = Comment.objects.filter(pk=comment_id).only(
+        'post_id', 'text'
+    ).first()
+    if comment is not None:
+        index_comment(comment)
+
+
+def _save(entries):
+    """Сохраняет записи индекса пачками по TIMELINE_BATCH_SIZE."""
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= settings.TIMELINE_BATCH_SIZE:
+            SearchEntry.objects.bulk_create(batch)
+            batch = []
+    SearchEntry.objects.bulk_create(batch)
+
+
+def rebuild():
+    """Пересобирает весь индекс по постам и комментариям."""
+    SearchEntry.objects.all().delete()
+    _save(
+        entry
+        for post_id, text in Post.objects.order_by().values_list(
+            'id', 'text'
+        ).iterator()
+        for entry in _entries(post_id, text, settings.SEARCH_POST_WEIGHT)
+    )
+    _save(
+        entry
+        for post_id, comment_id, text in Comment.objects.order_by(
+        ).values_list('post_id', 'id', 'text').iterator()
+        for entry in _entries(
+            post_id, text, settings.SEARCH_COMMENT_WEIGHT, comment_id
+        )
+    )
+
+
+def search(query):
+    """
+    Посты, в тексте или комментариях которых есть все слова запроса:
+    словари post_id и rank (сумма весов совпавших слов).
+    """
+    query_terms = set(terms(query))
+    return SearchEntry.objects.filter(
+        term__in=query_terms
+    ).values('post_id').annotate(
+        rank=Sum('weight'),
+        matched=Count('term', distinct=True),
+    ).filter(matched=len(query_terms)).values('post_id', 'rank')
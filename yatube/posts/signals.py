@@ -0,0 +1,215 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import (counters, follow_graph, hotness, images, jobs, recommendations,
+               search, timeline)
+from .cache import (bump_listings, invalidate_post_cards, post_listings,
+                    refresh_post)
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Поля пользователя, которые выводятся в карточке поста.
+AUTHOR_CARD_FIELDS = {'username', 'first_name', 'last_name'}
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, raw=False, **kwargs):
+    """
+    Запоминает прежние группу, картинку и текст поста: ленту старой
+    группы нужно сбросить, для новой картинки — заново готовить
+    миниатюры, а новый текст — переиндексировать для поиска. Новому
+    посту задаёт начальную популярность.
+    """
+    if raw:
+        return
+    if instance.pk is None:
+        # Новый пост сразу попадает в популярное, не дожидаясь
+        # update_hot_scores.
+        instance.hot_score = hotness.initial_score(instance.author_id)
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'group__slug', 'image', 'text'
+    ).first() if instance.pk else None
+    instance._previous_group_id = previous[0] if previous else None
+    instance._previous_group_slugs = [previous[1]] if previous else []
+    instance._image_changed = (
+        (previous[2] if previous else '') != (instance.image.name or '')
+    )
+    instance._text_changed = (
+        previous is None or previous[3] != instance.text
+    )
+    if instance._image_changed:
+        instance.thumbnails = ''
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Новый пост попадает в ленты подписчиков, изменённый — перерисуется."""
+    if raw:
+        return
+    if created:
+        jobs.enqueue(timeline.fan_out, instance.pk, instance.author_id)
+        counters.shift_user(instance.author_id, 'posts_count', 1)
+        counters.shift_group(instance.group_id, 'posts_count', 1)
+    else:
+        invalidate_post_cards([instance.pk])
+        previous_group_id = getattr(instance, '_previous_group_id', None)
+        if previous_group_id != instance.group_id:
+            counters.shift_group(previous_group_id, 'posts_count', -1)
+            counters.shift_group(instance.group_id, 'posts_count', 1)
+    if getattr(instance, '_text_changed', True):
+        jobs.enqueue(search.reindex_post, instance.pk)
+    if instance.image and getattr(instance, '_image_changed', False):
+        images.schedule(instance)
+    bump_listings(*post_listings(
+        instance, getattr(instance, '_previous_group_slugs', ())
+    ))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    counters.shift_user(instance.author_id, 'posts_count', -1)
+    counters.shift_group(instance.group_id, 'posts_count', -1)
+    refresh_post(instance)
+
+
+def _comment_listings(post_id):
+    """Ленты, в которых выводится число комментариев поста."""
+    scopes = {f'post:{post_id}'}
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug'
+    ).first()
+    if post is not None:
+        username, slug = post
+        scopes.update(('index', 'popular', f'profile:{username}'))
+        if slug:
+            scopes.add(f'group:{slug}')
+    return scopes
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.shift_post(instance.post_id, 'comments_count', 1)
+        jobs.enqueue(search.reindex_comment, instance.pk)
+        bump_listings(*_comment_listings(instance.post_id))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.shift_post(instance.post_id, 'comments_count', -1)
+    bump_listings(*_comment_listings(instance.post_id))
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, raw=False, **kwargs):
+    """Запоминает прежний адрес группы: его ленту тоже нужно сбросить."""
+    instance._previous_slug = None
+    if instance.pk and not raw:
+        instance._previous_slug = Group.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, raw=False, **kwargs):
+    """
+    Изменённая группа перерисовывает свою ленту. Если сменился адрес,
+    сбрасываются и ленты со ссылками на группу под постами.
+    """
+    if created or raw:
+        return
+    previous = getattr(instance, '_previous_slug', None)
+    if previous is None or previous == instance.slug:
+        bump_listings(f'group:{instance.slug}')
+        return
+    bump_listings(
+        'index',
+        'popular',
+        f'group:{instance.slug}',
+        f'group:{previous}',
+        *(
+            f'profile:{username}'
+            for username in instance.posts.order_by()
+            .values_list('author__username', flat=True).distinct()
+        )
+    )
+
+
+@receiver(pre_save, sender=User)
+def author_saving(sender, instance, update_fields=None, raw=False,
+                  **kwargs):
+    """Запоминает прежнее имя: ленту старого профиля тоже нужно сбросить."""
+    instance._previous_username = None
+    if instance.pk and not raw and (
+        update_fields is None or 'username' in update_fields
+    ):
+        instance._previous_username = User.objects.filter(
+            pk=instance.pk
+        ).values_list('username', flat=True).first()
+
+
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, update_fields=None, raw=False,
+                 **kwargs):
+    """
+    Новому пользователю заводится строка счётчиков, а смена имени автора
+    сбрасывает карточки и ленты с его постами, включая ленту профиля
+    под прежним именем.
+    """
+    if created:
+        if not raw:
+            counters.create_user_counter(instance.pk)
+        return
+    if update_fields is not None and not AUTHOR_CARD_FIELDS & update_fields:
+        return
+    posts = instance.posts.all()
+    invalidate_post_cards(posts.values_list('id', flat=True))
+    scopes = {'index', f'profile:{instance.username}'}
+    previous = getattr(instance, '_previous_username', None)
+    if previous:
+        scopes.add(f'profile:{previous}')
+    scopes.update(
+        f'group:{slug}'
+        for slug in posts.filter(group__isnull=False).order_by()
+        .values_list('group__slug', flat=True).distinct()
+    )
+    bump_listings(*scopes)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, raw=False, **kwargs):
+    """После подписки в ленту попадают посты автора."""
+    if created and not raw:
+        follow_graph.forget(instance.user_id, instance.author_id)
+        jobs.enqueue(timeline.follow, instance.user_id, instance.author_id)
+        counters.shift_user(instance.author_id, 'followers_count', 1)
+        counters.shift_user(instance.user_id, 'following_count', 1)
+        jobs.enqueue(
+            recommendations.follow_changed,
+            instance.user_id,
+            instance.author_id,
+        )
+        bump_listings(
+            f'profile:{instance.author.username}',
+            f'follow:{instance.user_id}',
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """После отписки посты автора убираются из ленты."""
+    follow_graph.forget(instance.user_id, instance.author_id)
+    timeline.unfollow(instance.user_id, instance.author_id)
+    if instance.author_id in timeline.heavy_authors():
+        jobs.enqueue(timeline.settle, instance.author_id)
+    counters.shift_user(instance.author_id, 'followers_count', -1)
+    counters.shift_user(instance.user_id, 'following_count', -1)
+    jobs.enqueue(
+        recommendations.follow_changed, instance.user_id, instance.author_id
+    )
+    bump_listings(
+        f'profile:{instance.author.username}',
+        f'follow:{instance.user_id}',
+    )
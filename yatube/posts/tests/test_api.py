@@ -0,0 +1,148 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import RunOnCommitMixin
+
+User = get_user_model()
+
+
+class ApiTests(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {i}'
+            )
+            for i in range(settings.NUM_OF_POSTS + 2)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_feeds(self):
+        """Ленты отдаются в JSON без шаблонов."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.author.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(response.templates, [])
+                first = response.json()['results'][0]
+                self.assertEqual(first['text'], self.posts[-1].text)
+                self.assertEqual(first['author'], self.author.username)
+                self.assertEqual(first['group'], self.group.slug)
+
+    def test_cursor_paging(self):
+        """Курсоры ведут на соседние страницы без повторов."""
+        url = reverse('posts:api_index')
+        first = self.client.get(url).json()
+        self.assertIsNone(first['previous'])
+        second = self.client.get(url, {'after': first['next']}).json()
+        self.assertEqual(len(second['results']), 2)
+        self.assertIsNone(second['next'])
+        back = self.client.get(url, {'before': second['previous']}).json()
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_not_modified(self):
+        """Неизменная лента отдаётся как 304 без запросов к базе."""
+        url = reverse('posts:api_index')
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comment_changes_feed_etags(self):
+        """Новый комментарий меняет число комментариев в лентах."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.author.username]),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Comment.objects.create(
+            post=self.posts[-1], author=self.reader, text='Ответ'
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    response.json()['results'][0]['comments_count'], 1
+                )
+
+    def test_image_url_from_storage(self):
+        """Адрес картинки строит хранилище, как post.image.url."""
+        post = self.posts[-1]
+        Post.objects.filter(pk=post.pk).update(image='posts/pic.gif')
+        post.refresh_from_db()
+        first = self.client.get(reverse('posts:api_index')).json()
+        self.assertEqual(first['results'][0]['image'], post.image.url)
+
+    def test_post_detail(self):
+        """Пост отдаётся с комментариями; новый комментарий меняет ETag."""
+        post = self.posts[0]
+        url = reverse('posts:api_post_detail', args=[post.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.json()['post']['id'], post.pk)
+        Comment.objects.create(post=post, author=self.reader, text='Ответ')
+        fresh = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, HTTPStatus.OK)
+        self.assertEqual(fresh.json()['results'][0]['text'], 'Ответ')
+        self.assertEqual(fresh.json()['post']['comments_count'], 1)
+
+    def test_follow_index(self):
+        """Лента подписок требует входа и меняется при отписке."""
+        url = reverse('posts:api_follow_index')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        response = self.reader_client.get(url)
+        self.assertEqual(
+            len(response.json()['results']), settings.NUM_OF_POSTS
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        response = self.reader_client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.json()['results'], [])
+
+    def test_not_found(self):
+        """Несуществующие группа, автор и пост — 404 в JSON."""
+        urls = (
+            reverse('posts:api_group_list', args=['nope']),
+            reverse('posts:api_profile', args=['nope']),
+            reverse('posts:api_post_detail', args=[0]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+                self.assertIn('detail', response.json())
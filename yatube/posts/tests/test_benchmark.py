@@ -0,0 +1,40 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import benchmark
+
+
+class BenchmarkTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        benchmark.seed(scale=2)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_scenarios_cover_all_urls(self):
+        """Замеры есть для каждого адреса posts/urls.py."""
+        self.assertCountEqual(
+            (f'posts:{name}' for name in benchmark.scenarios()),
+            benchmark.url_names(),
+        )
+
+    def test_views_fit_budgets(self):
+        """
+        Все страницы posts укладываются в PERF_BUDGETS по запросам
+        и памяти. Время зависит от машины и проверяется только
+        командой benchmark_views.
+        """
+        results = benchmark.run(repeat=1)
+        for view_name, result in results.items():
+            with self.subTest(view_name=view_name):
+                self.assertLess(result['status'], 400)
+                self.assertGreater(result['queries'], 0)
+                self.assertEqual(
+                    [
+                        metric for metric in result['exceeded']
+                        if metric != 'time'
+                    ],
+                    [],
+                )
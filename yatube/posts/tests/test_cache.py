@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cache import listing_version
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='КБ', first_name='Кирилл'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        cls.url = reverse('posts:group_list', args=[cls.group.slug])
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def test_card_is_served_from_cache(self):
+        """Карточка поста берётся из кэша, пока пост не изменился."""
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_card_is_invalidated_on_post_save(self):
+        """Сохранение поста сбрасывает его карточку."""
+        self.client.get(self.url)
+        self.post.text = 'Отредактированный пост'
+        self.post.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Отредактированный пост')
+
+    def test_card_is_invalidated_on_author_rename(self):
+        """Смена имени автора сбрасывает карточки его постов."""
+        self.client.get(self.url)
+        self.user.first_name = 'Константин'
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Константин')
+
+    def test_login_does_not_invalidate_cards(self):
+        """Вход пользователя не сбрасывает карточки его постов."""
+        self.client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Тестовый пост')
+
+    def test_group_edit_refreshes_group_page(self):
+        """Изменение группы сбрасывает её ленту."""
+        self.client.get(self.url)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Новое название')
+
+    def test_group_slug_change_refreshes_old_page(self):
+        """Смена адреса группы сбрасывает и ленту по прежнему адресу."""
+        version = listing_version(f'group:{self.group.slug}')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'new-slug'
+        group.save()
+        self.assertNotEqual(
+            listing_version(f'group:{self.group.slug}'), version
+        )
+
+    def test_rename_refreshes_old_profile(self):
+        """Смена логина сбрасывает ленту профиля под прежним логином."""
+        version = listing_version(f'profile:{self.user.username}')
+        user = User.objects.get(pk=self.user.pk)
+        user.username = 'kb'
+        user.save()
+        self.assertNotEqual(
+            listing_version(f'profile:{self.user.username}'), version
+        )
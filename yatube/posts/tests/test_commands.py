@@ -0,0 +1,44 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class CommandsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='КБ')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый пост',
+            group=cls.group,
+        )
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def test_explain_views(self):
+        """explain_views выводит планы запросов всех страниц чтения."""
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        output = out.getvalue()
+        for view_name in (
+            'posts:index',
+            'posts:group_list',
+            'posts:profile',
+            'posts:post_detail',
+            'posts:follow_index',
+        ):
+            with self.subTest(view_name=view_name):
+                self.assertIn(view_name, output)
+        self.assertIn('Проверено страниц: 5', output)
@@ -0,0 +1,124 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from posts.counters import user_counter
+from posts.models import Comment, Follow, Group, Post, UserCounter
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_posts_counters(self):
+        """Посты автора и группы считаются при создании и удалении."""
+        self.assertEqual(user_counter(self.author.pk).posts_count, 0)
+        post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group
+        )
+        self.group.refresh_from_db()
+        self.assertEqual(user_counter(self.author.pk).posts_count, 1)
+        self.assertEqual(self.group.posts_count, 1)
+        post.group = self.other_group
+        post.save()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 1)
+        post.delete()
+        self.other_group.refresh_from_db()
+        self.assertEqual(user_counter(self.author.pk).posts_count, 0)
+        self.assertEqual(self.other_group.posts_count, 0)
+
+    def test_counter_row_is_created_on_write(self):
+        """
+        Строку счётчиков создаёт регистрация или изменение, а чтение
+        без строки отдаёт нули и ничего не пишет.
+        """
+        user = User.objects.create_user(username='new')
+        self.assertTrue(UserCounter.objects.filter(user=user).exists())
+        UserCounter.objects.filter(user=user).delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(user_counter(user.pk).posts_count, 0)
+        self.assertFalse(UserCounter.objects.filter(user=user).exists())
+        Follow.objects.create(user=self.reader, author=user)
+        self.assertEqual(
+            UserCounter.objects.get(user=user).followers_count, 1
+        )
+
+    def test_deleted_users_leave_no_counters(self):
+        """Каскад удаления пользователей не создаёт их строки заново."""
+        author = User.objects.create_user(username='leaving-author')
+        reader = User.objects.create_user(username='leaving-reader')
+        post = Post.objects.create(text='Пост', author=author)
+        Comment.objects.create(post=post, author=reader, text='Ответ')
+        Follow.objects.create(user=reader, author=author)
+        User.objects.filter(pk__in=[author.pk, reader.pk]).delete()
+        self.assertFalse(
+            UserCounter.objects.filter(
+                user_id__in=[author.pk, reader.pk]
+            ).exists()
+        )
+
+    def test_comments_counter(self):
+        """Комментарии поста считаются при создании и удалении."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_follow_counters(self):
+        """Подписчики и подписки считаются при подписке и отписке."""
+        user_counter(self.author.pk)
+        user_counter(self.reader.pk)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(user_counter(self.author.pk).followers_count, 1)
+        self.assertEqual(user_counter(self.reader.pk).following_count, 1)
+        follow.delete()
+        self.assertEqual(user_counter(self.author.pk).followers_count, 0)
+        self.assertEqual(user_counter(self.reader.pk).following_count, 0)
+
+    def test_reconcile_counters(self):
+        """reconcile_counters исправляет расхождения."""
+        user_counter(self.author.pk)
+        Post.objects.bulk_create(
+            Post(text='Пост', author=self.author, group=self.group)
+            for _ in range(3)
+        )
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 3)
+        self.assertEqual(
+            UserCounter.objects.get(user=self.author).posts_count, 3
+        )
+        self.assertTrue(
+            UserCounter.objects.filter(user=self.reader).exists()
+        )
+        self.assertIn('2', out.getvalue())
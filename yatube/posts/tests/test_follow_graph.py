@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author_{i}') for i in range(4)
+        ]
+        for author in cls.authors[:3]:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_adjacency(self):
+        """Списки подписок и подписчиков отсортированы по id."""
+        self.assertEqual(
+            list(follow_graph.following(self.reader.pk)),
+            sorted(author.pk for author in self.authors[:3]),
+        )
+        self.assertEqual(
+            list(follow_graph.followers(self.authors[0].pk)),
+            [self.reader.pk],
+        )
+        self.assertEqual(list(follow_graph.following(self.authors[3].pk)), [])
+
+    def test_signals_refresh_graph(self):
+        """Подписка и отписка сразу видны в графе."""
+        author = self.authors[3]
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
+        follow = Follow.objects.create(user=self.reader, author=author)
+        self.assertTrue(follow_graph.follows(self.reader.pk, author.pk))
+        self.assertIn(self.reader.pk, follow_graph.followers(author.pk))
+        follow.delete()
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
+        self.assertNotIn(self.reader.pk, follow_graph.followers(author.pk))
+
+    def test_profile_shows_viewer_subscription(self):
+        """Кнопка отписки — только если подписан сам зритель."""
+        client = Client()
+        client.force_login(self.authors[3])
+        response = client.get(
+            reverse('posts:profile', args=[self.authors[0].username])
+        )
+        self.assertFalse(response.context['following'])
+        client.force_login(self.reader)
+        response = client.get(
+            reverse('posts:profile', args=[self.authors[0].username])
+        )
+        self.assertTrue(response.context['following'])
+
+
+class FollowGraphCacheTests(TransactionTestCase):
+    """Кэш графа заполняется только зафиксированным состоянием."""
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author_{i}') for i in range(4)
+        ]
+        for author in self.authors[:3]:
+            Follow.objects.create(user=self.reader, author=author)
+
+    def test_lookups_use_cache(self):
+        """Повторные проверки не обращаются к базе."""
+        follow_graph.following(self.reader.pk)
+        ids = [author.pk for author in self.authors]
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.follows(self.reader.pk, self.authors[0].pk)
+            )
+            self.assertFalse(
+                follow_graph.follows(self.reader.pk, self.authors[3].pk)
+            )
+            self.assertEqual(
+                follow_graph.follows_many(self.reader.pk, ids), set(ids[:3])
+            )
+        self.assertEqual(follow_graph.follows_many(None, ids), set())
+
+    def test_rollback_leaves_no_cache(self):
+        """Откаченная подписка не остаётся в кэше графа."""
+        author = self.authors[3]
+        with transaction.atomic():
+            Follow.objects.create(user=self.reader, author=author)
+            self.assertTrue(follow_graph.follows(self.reader.pk, author.pk))
+            transaction.set_rollback(True)
+        self.assertIsNone(cache.get(
+            follow_graph._key(follow_graph.FOLLOWING, self.reader.pk)
+        ))
+        self.assertFalse(follow_graph.follows(self.reader.pk, author.pk))
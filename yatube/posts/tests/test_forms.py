@@ -56,10 +56,15 @@ class PostFormTests(TestCase):
     def test_create_post(self):
         """Валидная форма создает новый Пост в базе данных."""
         posts_count = Post.objects.count()
+        uploaded = SimpleUploadedFile(
+            name='small.gif',
+            content=self.gif_ka,
+            content_type='image/gif'
+        )
         form_data = {
             'text': 'Тестовый текст',
             'group': self.group.id,
-            'image': self.uploaded
+            'image': uploaded
         }
         response = self.authorized_client.post(
             reverse('posts:post_create'),
@@ -76,7 +81,7 @@ class PostFormTests(TestCase):
                 text='Тестовый текст',
                 group=self.group,
                 author=self.user,
-                image=self.post.image,
+                image='posts/small.gif',
             ).exists())
         self.assertEqual(response.status_code, HTTPStatus.OK)
 
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import hotness
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class HotnessTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_score(self):
+        """Популярность растёт с комментариями и убывает со временем."""
+        hour = timedelta(hours=1)
+        self.assertGreater(
+            hotness.score(5, 0, hour), hotness.score(0, 0, hour)
+        )
+        self.assertGreater(
+            hotness.score(0, 10, hour), hotness.score(0, 0, hour)
+        )
+        self.assertGreater(
+            hotness.score(5, 0, hour), hotness.score(5, 0, hour * 24)
+        )
+
+    def test_update_and_feed(self):
+        """Обсуждаемый пост выше нового, старые посты обнуляются."""
+        old = Post.objects.create(author=self.author, text='Старый')
+        Post.objects.filter(pk=old.pk).update(
+            pub_date=timezone.now() - timedelta(days=30), hot_score=1
+        )
+        discussed = Post.objects.create(author=self.author, text='Обсуждаемый')
+        fresh = Post.objects.create(author=self.author, text='Свежий')
+        for i in range(3):
+            Comment.objects.create(
+                post=discussed, author=self.author, text=f'Ответ {i}'
+            )
+        out = StringIO()
+        call_command('update_hot_scores', stdout=out)
+        self.assertIn('2', out.getvalue())
+        old.refresh_from_db()
+        self.assertEqual(old.hot_score, 0)
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(
+            list(response.context['page_obj']), [discussed, fresh, old]
+        )
+
+    def test_update_refreshes_cached_page(self):
+        """Пересчёт сбрасывает закэшированную ленту."""
+        first = Post.objects.create(author=self.author, text='Первый')
+        second = Post.objects.create(author=self.author, text='Второй')
+        hotness.update()
+        url = reverse('posts:popular')
+        self.assertEqual(
+            list(self.client.get(url).context['page_obj']), [second, first]
+        )
+        Comment.objects.create(post=first, author=self.author, text='Ответ')
+        hotness.update()
+        self.assertEqual(
+            list(self.client.get(url).context['page_obj']), [first, second]
+        )
+
+    def test_new_post_scored(self):
+        """Новый пост получает популярность сразу, без update()."""
+        post = Post.objects.create(author=self.author, text='Новый')
+        post.refresh_from_db()
+        self.assertEqual(
+            post.hot_score, hotness.score(0, 0, timedelta(0))
+        )
+        self.assertGreater(post.hot_score, 0)
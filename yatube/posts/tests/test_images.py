@@ -0,0 +1,132 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import images
+from posts.cache import listing_version
+from posts.forms import PostForm
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+def jpeg(width, height):
+    """JPEG с EXIF: ориентация «повернуть на 90°» и камера."""
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    exif[0x0110] = 'Камера'
+    output = BytesIO()
+    Image.new('RGB', (width, height), 'red').save(
+        output, 'JPEG', exif=exif.tobytes()
+    )
+    return output.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=64)
+class ImagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def create(self, name, content):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, content, 'image/jpeg'),
+        )
+
+    def test_large_photo_is_reencoded(self):
+        """Большое фото уменьшается, пережимается и теряет EXIF."""
+        post = self.create('photo.jpg', jpeg(200, 100))
+        images.process(post.pk)
+        post.refresh_from_db()
+        self.assertTrue(post.image.name.startswith('posts/photo'))
+        self.assertTrue(post.image.name.endswith('.webp'))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, 'WEBP')
+            # Поворот из EXIF применён до удаления метаданных.
+            self.assertEqual(image.size, (32, 64))
+            self.assertNotIn('exif', image.info)
+        self.assertIn('card', post.thumbnail_urls)
+
+    def test_small_image_is_kept(self):
+        """Маленькая картинка без метаданных хранится как есть."""
+        post = self.create('pic.gif', GIF)
+        name = post.image.name
+        images.process(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, name)
+        self.assertIn('card', post.thumbnail_urls)
+
+    def test_encoded_image_refreshes_listings(self):
+        """Ленты сбрасываются сразу после замены файла, до миниатюр."""
+        post = self.create('photo.jpg', jpeg(200, 100))
+        version = listing_version('index')
+        with mock.patch('posts.images.thumbnails.generate'):
+            images.process(post.pk)
+        self.assertNotEqual(listing_version('index'), version)
+
+    def test_grayscale_alpha_is_kept(self):
+        """Прозрачность картинки в режиме LA сохраняется."""
+        output = BytesIO()
+        Image.new('LA', (200, 100), (0, 0)).save(output, 'PNG')
+        with Image.open(BytesIO(output.getvalue())) as image:
+            data = images.encode(image)
+        with Image.open(BytesIO(data)) as image:
+            self.assertEqual(image.mode, 'RGBA')
+            self.assertEqual(image.getpixel((0, 0))[3], 0)
+
+    def test_replaced_image_is_not_overwritten(self):
+        """Результат для заменённой картинки отбрасывается."""
+        post = self.create('photo.jpg', jpeg(200, 100))
+        Post.objects.filter(pk=post.pk).update(image='posts/other.jpg')
+        images.process(post.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.image.name, 'posts/other.jpg')
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_form_rejects_large_file(self):
+        """Слишком большой файл не принимается."""
+        form = PostForm(
+            data={'text': 'Текст'},
+            files={'image': SimpleUploadedFile(
+                'photo.jpg', jpeg(20, 20), 'image/jpeg'
+            )},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('image', form.errors)
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=100)
+    def test_form_rejects_too_many_pixels(self):
+        """Картинка с большим числом точек не принимается."""
+        form = PostForm(
+            data={'text': 'Текст'},
+            files={'image': SimpleUploadedFile(
+                'photo.jpg', jpeg(20, 20), 'image/jpeg'
+            )},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('20×20', form.errors['image'][0])
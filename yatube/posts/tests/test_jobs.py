@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from posts import jobs, search, timeline
+from posts.models import Follow, Job, Post
+
+User = get_user_model()
+
+calls = []
+
+
+@jobs.task
+def record(value):
+    calls.append(value)
+
+
+@jobs.task
+def fail():
+    raise RuntimeError('Сбой')
+
+
+@jobs.task
+def depth():
+    calls.append(len(connection.savepoint_ids))
+
+
+@jobs.task(atomic=False)
+def depth_outside():
+    calls.append(len(connection.savepoint_ids))
+
+
+@override_settings(JOBS_EAGER=False)
+class JobsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        calls.clear()
+
+    def test_side_effects_are_queued(self):
+        """Побочные действия сохранения выполняет воркер, а не запрос."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        jobs.work(concurrency=1, once=True)
+        post = Post.objects.create(author=self.author, text='Очередь')
+        self.assertFalse(timeline.feed(self.reader).exists())
+        self.assertFalse(search.search('очередь').exists())
+        self.assertEqual(jobs.work(concurrency=1, once=True), 2)
+        self.assertIn(post, timeline.feed(self.reader))
+        self.assertTrue(search.search('очередь').exists())
+        self.assertFalse(Job.objects.exists())
+
+    def test_non_atomic_task(self):
+        """Задача с atomic=False выполняется вне транзакции воркера."""
+        jobs.enqueue(depth)
+        jobs.enqueue(depth_outside)
+        jobs.work(concurrency=1, once=True)
+        self.assertEqual(calls[0], calls[1] + 1)
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется позже, а потом остаётся с ошибкой."""
+        jobs.enqueue(fail)
+        jobs.work(concurrency=1, once=True)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('Сбой', job.error)
+        Job.objects.update(run_at=timezone.now())
+        with override_settings(JOBS_MAX_ATTEMPTS=2):
+            jobs.work(concurrency=1, once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_claim(self):
+        """Задачу забирает только один воркер, не больше limit за раз."""
+        for value in range(3):
+            jobs.enqueue(record, value)
+        self.assertEqual(len(jobs.claim('first', 2)), 2)
+        self.assertEqual(len(jobs.claim('second', 5)), 1)
+        self.assertEqual(jobs.claim('third', 5), [])
+
+    def test_stale_jobs_are_requeued(self):
+        """Задача упавшего воркера возвращается в очередь."""
+        jobs.enqueue(record, 1)
+        jobs.claim('dead', 1)
+        Job.objects.update(locked_at=timezone.now() - timedelta(days=1))
+        out = StringIO()
+        call_command('run_jobs', '--once', '--concurrency=1', stdout=out)
+        self.assertIn('Обработано задач: 1', out.getvalue())
+        self.assertEqual(calls, [1])
+
+
+@override_settings(JOBS_EAGER=True)
+class EagerJobsTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_after_commit(self):
+        """
+        При JOBS_EAGER задача выполняется без очереди, но только после
+        фиксации транзакции: блокировка записи уже отпущена.
+        """
+        with transaction.atomic():
+            jobs.enqueue(record, 1)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_eager_rolled_back(self):
+        """Задача отменённой транзакции не выполняется."""
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            jobs.enqueue(record, 1)
+            raise RuntimeError
+        self.assertEqual(calls, [])
+
+    def test_eager_failure_is_logged(self):
+        """Ошибка задачи пишется в лог и не доходит до запроса."""
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            jobs.enqueue(fail)
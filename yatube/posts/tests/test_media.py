@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                text='Одна и та же картинка',
+                image=SimpleUploadedFile('pic.gif', GIF, 'image/gif'),
+            )
+            for _ in range(2)
+        ]
+        for post in self.posts:
+            thumbnails.generate(post.pk)
+            post.refresh_from_db()
+
+    def collect(self):
+        out = StringIO()
+        call_command('collect_media', '--grace=0', stdout=out)
+        return out.getvalue()
+
+    def path(self, url):
+        return os.path.join(
+            TEMP_MEDIA_ROOT, url[len(settings.MEDIA_URL):]
+        )
+
+    def test_duplicates_share_file_and_thumbnails(self):
+        """Одинаковые загрузки хранятся и уменьшаются один раз."""
+        first, second = self.posts
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image.url, second.image.url)
+        self.assertEqual(first.thumbnail_urls, second.thumbnail_urls)
+
+    def test_collect_keeps_referenced_content(self):
+        """Содержимое живёт, пока на него ссылается хоть один пост."""
+        first, second = self.posts
+        blob = self.path(second.image.url)
+        thumbnail = self.path(second.thumbnail_urls['card'])
+        first.delete()
+        self.assertIn('Удалено загрузок: 1, файлов содержимого: 0',
+                      self.collect())
+        self.assertFalse(os.path.lexists(first.image.path))
+        self.assertTrue(os.path.exists(blob))
+        self.assertTrue(os.path.exists(thumbnail))
+        second.delete()
+        self.assertIn('Удалено загрузок: 1, файлов содержимого: 1',
+                      self.collect())
+        self.assertFalse(os.path.exists(blob))
+        self.assertFalse(os.path.exists(thumbnail))
@@ -1,14 +1,17 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.models import Follow, Group, Post
+from posts.paginator import encode_cursor
+from posts.tests.utils import RunOnCommitMixin
 
 User = get_user_model()
 
 
-class PaginatorViewsTest(TestCase):
+class PaginatorViewsTest(RunOnCommitMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -40,6 +43,7 @@ class PaginatorViewsTest(TestCase):
         }
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.authorized_client_follower = Client()
         self.authorized_client_follower.force_login(self.user_follower)
@@ -78,3 +82,76 @@ class PaginatorViewsTest(TestCase):
                 reverse('posts:follow_index') + page_num
             )
             self.assertEqual(len(response.context['page_obj']), num_of_posts)
+
+    def test_cursor_pages(self):
+        """Переход по курсору вперёд и назад без OFFSET."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        cursor = first.paginator.next_cursor
+        second = self.client.get(
+            url, {'page': 2, 'after': cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), settings.NUM_OF_POSTS_3)
+        self.assertEqual(second.number, 2)
+        self.assertFalse(second.has_next())
+        self.assertTrue(second.has_previous())
+        back = self.client.get(
+            url, {'page': 1, 'before': second.paginator.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_cursor_page_is_stable_after_new_post(self):
+        """Новый пост не сдвигает страницу, открытую по курсору."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        cursor = first.paginator.next_cursor
+        Post.objects.create(text='Новый пост', author=self.user)
+        cache.clear()
+        second = self.client.get(
+            url, {'page': 2, 'after': cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), settings.NUM_OF_POSTS_3)
+
+    def test_broken_cursor_falls_back_to_page_number(self):
+        """Испорченный курсор обрабатывается как обычный номер страницы."""
+        response = self.client.get(
+            reverse('posts:index'), {'page': 2, 'after': '%%%'}
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.NUM_OF_POSTS_3
+        )
+
+    def test_cursor_with_wrong_values_falls_back_to_page_number(self):
+        """Курсор с неподходящими значениями не ломает ленты."""
+        for values in (
+            ['abc', 1],
+            [None, 1],
+            [{'x': 1}, 2],
+            ['2020-01-01T00:00:00', 'zz'],
+        ):
+            cursor = encode_cursor(values)
+            with self.subTest(values=values):
+                response = self.client.get(
+                    reverse('posts:index'), {'page': 2, 'after': cursor}
+                )
+                self.assertEqual(
+                    len(response.context['page_obj']),
+                    settings.NUM_OF_POSTS_3,
+                )
+                response = self.client.get(
+                    reverse('posts:api_index'), {'after': cursor}
+                )
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(PAGINATOR_COUNT_MODE='approximate',
+                       PAGINATOR_COUNT_LIMIT=5)
+    def test_approximate_count_keeps_next_link(self):
+        """Ограниченный подсчёт не мешает идти дальше по курсору."""
+        url = reverse('posts:index')
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(first.paginator.count, 5)
+        self.assertTrue(first.has_next())
+        second = self.client.get(
+            url, {'page': 2, 'after': first.paginator.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(len(second), settings.NUM_OF_POSTS_3)
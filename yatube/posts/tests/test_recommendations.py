@@ -0,0 +1,101 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import recommendations
+from posts.cache import listing_version
+from posts.models import Follow, Recommendation
+from posts.tests.utils import RunOnCommitMixin
+
+User = get_user_model()
+
+
+class RecommendationTests(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader, cls.author, cls.friend, cls.neighbour = (
+            User.objects.create_user(username=name)
+            for name in ('reader', 'author', 'friend', 'neighbour')
+        )
+
+    def setUp(self):
+        cache.clear()
+        Follow.objects.create(user=self.reader, author=self.author)
+        Follow.objects.create(user=self.author, author=self.friend)
+        Follow.objects.create(user=self.neighbour, author=self.author)
+
+    def candidates(self, user):
+        return list(
+            recommendations.suggestions(user.pk).values_list(
+                'candidate__username', 'score'
+            )
+        )
+
+    def test_friends_of_friends_and_co_follows(self):
+        """Друг друга весит больше соседа по подпискам."""
+        self.assertEqual(
+            self.candidates(self.reader), [('friend', 2), ('neighbour', 1)]
+        )
+
+    def test_follow_refreshes_suggestions(self):
+        """Подписка убирает кандидата из предложений."""
+        Follow.objects.create(user=self.reader, author=self.friend)
+        self.assertEqual(self.candidates(self.reader), [('neighbour', 1)])
+        Follow.objects.filter(user=self.reader, author=self.friend).delete()
+        self.assertEqual(
+            self.candidates(self.reader), [('friend', 2), ('neighbour', 1)]
+        )
+
+    def test_followers_get_new_friends_of_friends(self):
+        """Новая подписка автора попадает в предложения его читателей."""
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.author, author=other)
+        self.assertIn(('other', 2), self.candidates(self.reader))
+
+    def test_rebuild_matches_incremental(self):
+        """Пакетный пересчёт даёт те же предложения."""
+        expected = {
+            user.pk: self.candidates(user) for user in User.objects.all()
+        }
+        Recommendation.objects.all().delete()
+        recommendations.rebuild()
+        for user in User.objects.all():
+            with self.subTest(user=user.username):
+                self.assertEqual(self.candidates(user), expected[user.pk])
+
+    def test_failed_rebuild_keeps_suggestions(self):
+        """Сбой пересчёта не оставляет пользователей без предложений."""
+        expected = self.candidates(self.reader)
+        with mock.patch(
+            'posts.recommendations.score', side_effect=RuntimeError
+        ), self.assertRaises(RuntimeError):
+            recommendations.rebuild()
+        self.assertEqual(self.candidates(self.reader), expected)
+
+    def test_rebuild_refreshes_profiles(self):
+        """Пересчёт сбрасывает ленты профилей с предложениями."""
+        version = listing_version(f'profile:{self.reader.username}')
+        recommendations.rebuild()
+        self.assertNotEqual(
+            listing_version(f'profile:{self.reader.username}'), version
+        )
+
+    def test_pages_show_suggestions(self):
+        """Предложения видны в ленте подписок и в своём профиле."""
+        client = Client()
+        client.force_login(self.reader)
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=[self.reader.username]),
+        ):
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertContains(response, 'Кого почитать')
+        response = client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertNotContains(response, 'Кого почитать')
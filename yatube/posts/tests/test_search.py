@@ -0,0 +1,81 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post, SearchEntry
+from posts.search import search, stem
+from posts.tests.utils import RunOnCommitMixin
+
+User = get_user_model()
+
+
+class SearchTests(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='КБ')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+
+    def found(self, query):
+        return [
+            row['post_id']
+            for row in search(query).order_by('-rank', 'post_id')
+        ]
+
+    def test_stem(self):
+        """Разные формы слова сводятся к одной основе."""
+        self.assertEqual(stem('подписчики'), stem('подписчиков'))
+        self.assertEqual(stem('красивая'), stem('красивые'))
+        self.assertEqual(stem('Ёлка'), stem('елки'))
+
+    def test_index_follows_posts_and_comments(self):
+        """Индекс обновляется при создании, правке и удалении."""
+        post = Post.objects.create(author=self.user, text='Мишки в лесу')
+        self.assertEqual(self.found('мишка'), [post.pk])
+        post.text = 'Зайцы в поле'
+        post.save()
+        self.assertEqual(self.found('мишка'), [])
+        self.assertEqual(self.found('зайцев'), [post.pk])
+        Comment.objects.create(post=post, author=self.user, text='Лисы')
+        self.assertEqual(self.found('лиса'), [post.pk])
+        post.delete()
+        self.assertFalse(SearchEntry.objects.exists())
+
+    def test_ranking(self):
+        """Все слова запроса обязательны, совпадение в посте важнее."""
+        in_text = Post.objects.create(author=self.user, text='Красный шар')
+        in_comment = Post.objects.create(author=self.user, text='Шар')
+        Comment.objects.create(
+            post=in_comment, author=self.user, text='Красный'
+        )
+        Post.objects.create(author=self.user, text='Красный куб')
+        self.assertEqual(
+            self.found('красные шары'), [in_text.pk, in_comment.pk]
+        )
+
+    def test_search_page_paginates_by_cursor(self):
+        """Страницы поиска идут по курсору без повторов."""
+        for i in range(settings.NUM_OF_POSTS + 3):
+            Post.objects.create(author=self.user, text=f'Поиск {i}')
+        url = reverse('posts:search')
+        first = self.client.get(url, {'q': 'поиск'}).context['page_obj']
+        self.assertEqual(len(first), settings.NUM_OF_POSTS)
+        second = self.client.get(url, {
+            'q': 'поиск',
+            'page': 2,
+            'after': first.paginator.next_cursor,
+        }).context['page_obj']
+        self.assertEqual(len(second), 3)
+        seen = [row['object'].pk for row in list(first) + list(second)]
+        self.assertEqual(len(set(seen)), settings.NUM_OF_POSTS + 3)
+
+    def test_empty_query(self):
+        """Без запроса страница поиска показывает только форму."""
+        response = self.client.get(reverse('posts:search'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('page_obj', response.context)
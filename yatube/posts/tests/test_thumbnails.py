@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='КБ')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            author=self.user,
+            text='Тестовый пост',
+            image=SimpleUploadedFile('pic.gif', GIF, 'image/gif'),
+        )
+
+    def test_generate_stores_thumbnail_urls(self):
+        """Миниатюры готовятся заранее и попадают в шаблон."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        url = self.post.thumbnail_urls['card']
+        self.assertTrue(url.startswith(settings.MEDIA_URL))
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, url)
+
+    def test_new_image_resets_thumbnails(self):
+        """Смена картинки сбрасывает готовые миниатюры."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.image = SimpleUploadedFile('other.gif', GIF, 'image/gif')
+        self.post.save()
+        self.assertEqual(self.post.thumbnails, '')
+
+    def test_text_edit_keeps_thumbnails(self):
+        """Правка текста не требует новых миниатюр."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.post.text = 'Новый текст'
+        self.post.save()
+        self.assertIn('card', self.post.thumbnail_urls)
+
+    def test_prefetch_reads_kvstore_in_one_batch(self):
+        """
+        Миниатюры необработанных постов страницы берутся из KV-хранилища
+        sorl; get_thumbnail вызывается только для недостающих.
+        """
+        other = Post.objects.create(
+            author=self.user,
+            text='Второй пост',
+            image=SimpleUploadedFile('pic.gif', GIF, 'image/gif'),
+        )
+        posts = list(Post.objects.filter(pk__in=[self.post.pk, other.pk]))
+        with mock.patch(
+            'posts.thumbnails.get_thumbnail', wraps=thumbnails.get_thumbnail
+        ) as get_thumbnail:
+            thumbnails.prefetch(posts)
+        # Картинки одинаковые: вторая миниатюра уже в хранилище.
+        self.assertEqual(get_thumbnail.call_count, 1)
+        self.assertEqual(
+            posts[0].thumbnail_urls['card'], posts[1].thumbnail_urls['card']
+        )
+        posts = list(Post.objects.filter(pk__in=[self.post.pk, other.pk]))
+        with mock.patch(
+            'posts.thumbnails.get_thumbnail', wraps=thumbnails.get_thumbnail
+        ) as get_thumbnail:
+            thumbnails.prefetch(posts)
+        get_thumbnail.assert_not_called()
+        self.assertIn('card', posts[0].thumbnail_urls)
+
+    def test_prefetch_skips_ready_thumbnails(self):
+        """Посты с готовыми миниатюрами хранилище не читают."""
+        thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        with mock.patch('posts.thumbnails._kvstore_get_many') as get_many:
+            thumbnails.prefetch([self.post])
+        get_many.assert_not_called()
@@ -0,0 +1,76 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import timeline
+from posts.models import Follow, HeavyAuthor, Post, TimelineEntry
+from posts.tests.utils import RunOnCommitMixin
+
+User = get_user_model()
+
+
+class TimelineTests(RunOnCommitMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленту подписчика."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, timeline.feed(self.reader))
+
+    def test_follow_and_unfollow_rebuild_timeline(self):
+        """Подписка добавляет старые посты автора, отписка — убирает."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertIn(post, timeline.feed(self.reader))
+        follow.delete()
+        self.assertFalse(timeline.feed(self.reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_author_is_read_on_request(self):
+        """Посты «тяжёлого» автора не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertIn(post, timeline.feed(self.reader))
+
+    def test_entries_repeat_post_author_and_date(self):
+        """Запись ленты хранит автора и дату поста для чтения по индексу."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        entry = TimelineEntry.objects.get(user=self.reader, post=post)
+        self.assertEqual(entry.author_id, self.author.pk)
+        self.assertEqual(entry.pub_date, post.pub_date)
+
+    def test_heavy_author_posts_survive_settle(self):
+        """
+        Посты, вышедшие, пока автор был «тяжёлым», остаются в ленте,
+        когда подписчиков становится меньше предела.
+        """
+        other = User.objects.create_user(username='other')
+        Follow.objects.create(user=self.reader, author=self.author)
+        follow = Follow.objects.create(user=other, author=self.author)
+        with self.settings(TIMELINE_FANOUT_LIMIT=1):
+            post = Post.objects.create(text='Пост', author=self.author)
+            self.assertTrue(
+                HeavyAuthor.objects.filter(author=self.author).exists()
+            )
+            cache.clear()
+            self.assertIn(self.author.pk, timeline.heavy_authors())
+            follow.delete()
+        self.assertFalse(HeavyAuthor.objects.exists())
+        self.assertNotIn(self.author.pk, timeline.heavy_authors())
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertIn(post, timeline.feed(self.reader))
@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.cache import listing_version
+from posts import timeline
+from posts.counters import user_counter
+from posts.models import (Comment, Follow, Group, HeavyAuthor, Post,
+                          TimelineEntry)
+
+User = get_user_model()
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {i}'
+            )
+            for i in range(5)
+        ]
+        Post.objects.filter(pk=self.posts[0].pk).update(
+            pub_date=self.posts[0].pub_date - timedelta(days=30)
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def export(self):
+        out = StringIO()
+        call_command('export_ndjson', '-', stdout=out, stderr=StringIO())
+        return out.getvalue()
+
+    def test_export_is_ndjson_in_dependency_order(self):
+        """Выгрузка — по объекту на строку, сначала те, на кого ссылаются."""
+        records = [json.loads(line) for line in self.export().splitlines()]
+        labels = [record['model'] for record in records]
+        self.assertEqual(len(records), 2 + 1 + 5 + 1 + 1)
+        self.assertEqual(
+            list(dict.fromkeys(labels)),
+            ['auth.user', 'posts.group', 'posts.post', 'posts.comment',
+             'posts.follow'],
+        )
+
+    def test_roundtrip(self):
+        """Загрузка восстанавливает данные, даты и производные таблицы."""
+        dump = self.export()
+        pub_dates = dict(Post.objects.values_list('pk', 'pub_date'))
+        password = self.author.password
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', delete=False
+        ) as file:
+            file.write(dump)
+        self.addCleanup(os.remove, file.name)
+        version = listing_version('group:group')
+        call_command(
+            'import_ndjson', file.name, chunk_size=2, stderr=StringIO()
+        )
+        self.assertNotEqual(listing_version('group:group'), version)
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'pub_date')), pub_dates
+        )
+        self.assertEqual(
+            User.objects.get(username='author').password, password
+        )
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertTrue(
+            Follow.objects.filter(
+                user__username='reader', author__username='author'
+            ).exists()
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(user__username='reader').count(), 5
+        )
+        self.group = Group.objects.get(slug='group')
+        self.assertEqual(self.group.posts_count, 5)
+        self.assertEqual(user_counter(self.author.pk).posts_count, 5)
+        new = Post.objects.create(author=self.author, text='После загрузки')
+        self.assertGreater(new.pk, max(pub_dates))
+
+    def load(self, dump):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', delete=False
+        ) as file:
+            file.write(dump)
+        self.addCleanup(os.remove, file.name)
+        call_command(
+            'import_ndjson', file.name, chunk_size=2, stderr=StringIO()
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_heavy_authors_are_recounted(self):
+        """После загрузки «тяжёлые» авторы не раскладываются по лентам."""
+        dump = self.export()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.load(dump)
+        author = User.objects.get(username='author')
+        reader = User.objects.get(username='reader')
+        self.assertTrue(HeavyAuthor.objects.filter(author=author).exists())
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+        self.assertEqual(timeline.feed(reader).count(), 5)
+
+    def test_broken_import_leaves_nothing(self):
+        """Оборванная загрузка откатывается целиком."""
+        lines = self.export().splitlines()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        broken = '\n'.join(lines[:4] + ['{"model": "posts.post"']) + '\n'
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.ndjson', delete=False
+        ) as file:
+            file.write(broken)
+        self.addCleanup(os.remove, file.name)
+        with self.assertRaises(ValueError):
+            call_command(
+                'import_ndjson', file.name, chunk_size=1, stderr=StringIO()
+            )
+        self.assertFalse(User.objects.exists())
+        self.assertFalse(Group.objects.exists())
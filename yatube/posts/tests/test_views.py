@@ -9,14 +9,15 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from posts.models import Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post
+from posts.tests.utils import RunOnCommitMixin
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostViewsTests(TestCase):
+class PostViewsTests(RunOnCommitMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
@@ -190,6 +191,27 @@ class PostViewsTests(TestCase):
             self.post.image,
         )
 
+    def test_post_detail_query_budget(self):
+        """Число запросов post_detail не зависит от числа комментариев."""
+        post = Post.objects.create(author=self.user, text='Обсуждение')
+        authors = User.objects.bulk_create(
+            User(username=f'reader_{i}') for i in range(30)
+        )
+        Comment.objects.bulk_create(
+            Comment(post=post, author=author, text='Комментарий')
+            for author in User.objects.filter(username__startswith='reader_')
+        )
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.guest_client.get(url)
+        # Пост с автором и группой, счётчики автора,
+        # число комментариев и страница комментариев с авторами.
+        with self.assertNumQueries(4):
+            response = self.guest_client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.NUM_OF_COMMENTS)
+        self.assertEqual(comments.paginator.count, len(authors))
+        self.assertContains(response, 'reader_')
+
     def test_create__and_post_edit_show_correct_context(self):
         """Шаблоны post_edit и create сформированы с правильным контекстом."""
         urls = (
@@ -302,17 +324,24 @@ class PostViewsTests(TestCase):
         self.assertEqual(post_unfollow.object_list.count(), 0)
 
     def test_cache_index(self):
-        """Проверка хранения и очистка кэша."""
+        """Главная берётся из кэша и сбрасывается при новом посте."""
         response = self.authorized_client.get(reverse('posts:index'))
         posts = response.content
+        Post.objects.filter(pk=self.post.pk).update(text='Без сигналов')
+        response_old = self.authorized_client.get(reverse('posts:index'))
+        old_posts = response_old.content
+        self.assertEqual(old_posts, posts)
         Post.objects.create(
             text='Тестовый текст',
             author=self.post.author,
         )
-        response_old = self.authorized_client.get(reverse('posts:index'))
-        old_posts = response_old.content
-        self.assertEqual(old_posts, posts)
-        cache.clear()
         response_new = self.authorized_client.get(reverse('posts:index'))
         new_posts = response_new.content
         self.assertNotEqual(old_posts, new_posts)
+        self.assertContains(response_new, 'Тестовый текст')
+
+    def test_cache_separates_anonymous_and_authorized(self):
+        """Гость и пользователь получают разные варианты страницы."""
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, self.user.username)
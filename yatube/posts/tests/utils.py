@@ -0,0 +1,29 @@
+from unittest import mock
+
+
+class RunOnCommitMixin:
+    """
+    TestCase не фиксирует транзакции, поэтому колбэки on_commit, в том
+    числе задачи posts.jobs при JOBS_EAGER, в нём не выполняются. С этой
+    примесью они выполняются сразу при регистрации.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._on_commit = mock.patch(
+            'django.db.transaction.on_commit',
+            lambda func, using=None: func(),
+        )
+        cls._on_commit.start()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._on_commit.stop()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._on_commit.stop()
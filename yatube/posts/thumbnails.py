@@ -0,0 +1,137 @@
+import json
+import logging
+
+from django.conf import settings
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import metrics
+
+from .cache import refresh_post
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+def _source(image):
+    blob_name = getattr(image.storage, 'blob_name', None)
+    return blob_name(image.name) if blob_name else image
+
+
+def render(image):
+    """
+    Готовит миниатюры всех размеров из POST_THUMBNAILS. Источник —
+    blob-файл картинки, поэтому одинаковые картинки разных постов
+    получают одни и те же миниатюры.
+    """
+    source = _source(image)
+    with metrics.THUMBNAIL_DURATION.time(path='generate'):
+        return {
+            name: get_thumbnail(source, geometry, **options).url
+            for name, (geometry, options) in settings.POST_THUMBNAILS.items()
+        }
+
+
+def _thumbnail_file(source, geometry, options):
+    """
+    Файл миниатюры, который вернёт get_thumbnail(source, geometry,
+    **options): параметры дополняются так же, как в ThumbnailBackend.
+    """
+    backend = default.backend
+    source = ImageFile(source)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(
+        backend._get_thumbnail_filename(source, geometry, options),
+        default.storage,
+    )
+
+
+def _kvstore_get_many(image_files):
+    get_many = getattr(default.kvstore, 'get_many', None)
+    if get_many is not None:
+        return get_many(image_files)
+    return [default.kvstore.get(image_file) for image_file in image_files]
+
+
+def prefetch(posts):
+    """
+    Заполняет thumbnail_urls постам страницы, чьи миниатюры ещё не готовы
+    (картинку не успели обработать). Записи sorl о миниатюрах всех таких
+    постов читаются одним запросом к кэшу, get_thumbnail вызывается
+    только для недостающих.
+    """
+    wanted = []
+    for post in posts:
+        if post is None or not post.image or post.thumbnail_urls:
+            continue
+        try:
+            source = _source(post.image)
+            wanted.extend([
+                (
+                    post, name, source, geometry, options,
+                    _thumbnail_file(source, geometry, options),
+                )
+                for name, (geometry, options)
+                in settings.POST_THUMBNAILS.items()
+            ])
+        except Exception:
+            logger.exception(
+                'Не удалось подготовить миниатюры поста %s', post.pk
+            )
+    if not wanted:
+        return
+    found = _kvstore_get_many([row[-1] for row in wanted])
+    # Одинаковые картинки дают одну миниатюру: готовится она один раз.
+    ready = {
+        row[-1].name: cached for row, cached in zip(wanted, found) if cached
+    }
+    hits = sum(1 for cached in found if cached)
+    metrics.THUMBNAIL_KVSTORE.inc(hits, result='hit')
+    metrics.THUMBNAIL_KVSTORE.inc(len(found) - hits, result='miss')
+    for post, name, source, geometry, options, thumbnail in wanted:
+        if thumbnail.name not in ready:
+            try:
+                with metrics.THUMBNAIL_DURATION.time(path='prefetch'):
+                    ready[thumbnail.name] = get_thumbnail(
+                        source, geometry, **options
+                    )
+            except Exception:
+                logger.exception(
+                    'Не удалось подготовить миниатюры поста %s', post.pk
+                )
+                continue
+        post.thumbnail_urls[name] = ready[thumbnail.name].url
+
+
+def generate(post_id):
+    """
+    Готовит миниатюры поста и сохраняет их адреса в Post.thumbnails.
+
+    Вызывается из images.process после обработки картинки. Если
+    картинку успели заменить, результат отбрасывается: для новой
+    картинки уже поставлена своя задача.
+    """
+    try:
+        post = Post.objects.select_related('author', 'group').get(pk=post_id)
+        if not post.image:
+            return
+        urls = render(post.image)
+        updated = Post.objects.filter(
+            pk=post_id, image=post.image.name
+        ).update(thumbnails=json.dumps(urls))
+        if updated:
+            refresh_post(post)
+    except Post.DoesNotExist:
+        pass
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры поста %s', post_id)
@@ -0,0 +1,184 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from . import follow_graph, jobs
+from .models import Follow, HeavyAuthor, Post, TimelineEntry
+
+HEAVY_AUTHORS_KEY = 'timeline:heavy-authors'
+
+# Ключ сортировки ленты для паджинатора: дата и id поста из записи ленты.
+FEED_KEY = ('feed_date', 'feed_post')
+
+
+def heavy_authors():
+    """
+    Авторы, у которых подписчиков стало больше TIMELINE_FANOUT_LIMIT.
+
+    Их посты не раскладываются по лентам, а читаются при запросе ленты.
+    """
+    return cache.get_or_set(
+        HEAVY_AUTHORS_KEY,
+        lambda: set(
+            HeavyAuthor.objects.using('default').values_list(
+                'author_id', flat=True
+            )
+        ),
+        settings.TIMELINE_HEAVY_AUTHORS_TIMEOUT,
+    )
+
+
+def _forget_heavy_authors():
+    cache.delete(HEAVY_AUTHORS_KEY)
+    transaction.on_commit(lambda: cache.delete(HEAVY_AUTHORS_KEY))
+
+
+def _over_limit(author_id):
+    """Подписчиков больше предела; считается не дальше предела."""
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    return Follow.objects.filter(
+        author_id=author_id
+    )[:limit + 1].count() > limit
+
+
+def mark_heavy(author_id):
+    """Отмечает автора «тяжёлым»: его посты читаются при запросе ленты."""
+    HeavyAuthor.objects.get_or_create(author_id=author_id)
+    _forget_heavy_authors()
+
+
+def recount_heavy_authors():
+    """
+    Заново отмечает «тяжёлыми» всех авторов, у которых подписчиков
+    больше TIMELINE_FANOUT_LIMIT, например после загрузки данных
+    в обход сигналов. Ленты после этого пересобираются rebuild().
+    """
+    with transaction.atomic():
+        HeavyAuthor.objects.all().delete()
+        HeavyAuthor.objects.bulk_create(
+            HeavyAuthor(author_id=author_id)
+            for author_id in Follow.objects.order_by().values(
+                'author'
+            ).annotate(followers=Count('id')).filter(
+                followers__gt=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('author', flat=True)
+        )
+        _forget_heavy_authors()
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+
+
+@jobs.task
+def fan_out(post_id, author_id):
+    """Раскладывает новый пост по лентам подписчиков автора."""
+    if author_id in heavy_authors():
+        return
+    if _over_limit(author_id):
+        mark_heavy(author_id)
+        return
+    pub_date = Post.objects.filter(pk=post_id).values_list(
+        'pub_date', flat=True
+    ).first()
+    if pub_date is None:
+        return
+    _insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        )
+        for user_id in follow_graph.followers(author_id)
+    )
+
+
+def _author_entries(user_ids, author_id):
+    for post_id, pub_date in Post.objects.filter(
+        author_id=author_id
+    ).values_list('id', 'pub_date').iterator():
+        for user_id in user_ids:
+            yield TimelineEntry(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                pub_date=pub_date,
+            )
+
+
+@jobs.task
+def follow(user_id, author_id):
+    """
+    Добавляет в ленту пользователя посты автора после подписки.
+    Если до выполнения задачи пользователь успел отписаться, ничего
+    не делает.
+    """
+    if author_id in heavy_authors() or not follow_graph.follows(
+        user_id, author_id
+    ):
+        return
+    _insert(_author_entries([user_id], author_id))
+
+
+@jobs.task
+def settle(author_id):
+    """
+    Снимает с автора отметку «тяжёлого», если подписчиков стало не
+    больше TIMELINE_FANOUT_LIMIT, и раскладывает все его посты по лентам
+    подписчиков. Отметка снимается в той же транзакции, поэтому ни один
+    пост не выпадает из лент.
+    """
+    if _over_limit(author_id):
+        return
+    with transaction.atomic():
+        _insert(_author_entries(
+            list(Follow.objects.filter(author_id=author_id).values_list(
+                'user_id', flat=True
+            )),
+            author_id,
+        ))
+        HeavyAuthor.objects.filter(author_id=author_id).delete()
+        _forget_heavy_authors()
+
+
+def unfollow(user_id, author_id):
+    """Убирает из ленты пользователя посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def rebuild(user_id):
+    """Пересобирает ленту пользователя по его текущим подпискам."""
+    TimelineEntry.objects.filter(user_id=user_id).delete()
+    follow_graph.forget(user_id)
+    for author_id in Follow.objects.filter(
+        user_id=user_id
+    ).values_list('author_id', flat=True):
+        follow(user_id, author_id)
+
+
+def feed(user):
+    """
+    Посты ленты подписок пользователя; сортировать по FEED_KEY.
+
+    Посты обычных авторов читаются диапазоном индекса готовой ленты,
+    посты «тяжёлых» авторов — напрямую из таблицы постов
+    (fan-out-on-read).
+    """
+    heavy = follow_graph.follows_many(user.pk, heavy_authors())
+    if not heavy:
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F('timeline_entries__pub_date'),
+            feed_post=F('timeline_entries__post_id'),
+        )
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post'))
+        | Q(author_id__in=heavy)
+    ).annotate(feed_date=F('pub_date'), feed_post=F('id'))
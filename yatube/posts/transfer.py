@@ -0,0 +1,220 @@
+import datetime
+import gzip
+import json
+from contextlib import contextmanager, nullcontext
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from . import (counters, follow_graph, hotness, recommendations, search,
+               thumbnails, timeline)
+from .cache import bump_listings, invalidate_post_cards
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Модели в порядке зависимостей: сначала те, на кого ссылаются.
+MODELS = (User, Group, Post, Comment, Follow)
+# Поля, которые вычисляются из остальных данных и не переносятся.
+DERIVED_FIELDS = {
+    Post: {'thumbnails', 'comments_count', 'hot_score'},
+    Group: {'posts_count'},
+}
+
+
+class Encoder(DjangoJSONEncoder):
+    """Как в dumpdata, но даты — с микросекундами, без потерь."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_stream(path, mode, standard=None):
+    """Файл NDJSON (.gz — сжатый) или поток standard, если path == '-'."""
+    if path == '-':
+        return nullcontext(standard)
+    if path.endswith('.gz'):
+        return gzip.open(path, f'{mode}t', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _fields(model):
+    derived = DERIVED_FIELDS.get(model, set())
+    return [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in derived
+    ]
+
+
+def export(stream, chunk_size):
+    """
+    Пишет все объекты MODELS в stream по одному JSON на строку,
+    в формате dumpdata. Записи читаются из базы порциями по chunk_size.
+    Возвращает число записанных объектов по меткам моделей.
+    """
+    encoder = Encoder(ensure_ascii=False)
+    totals = {}
+    for model in MODELS:
+        label = model._meta.label_lower
+        fields = _fields(model)
+        rows = model._default_manager.order_by('pk').values_list(
+            'pk', *(field.attname for field in fields)
+        ).iterator(chunk_size=chunk_size)
+        totals[label] = 0
+        for pk, *values in rows:
+            stream.write(encoder.encode({
+                'model': label,
+                'pk': pk,
+                'fields': {
+                    field.name: value for field, value in zip(fields, values)
+                },
+            }) + '\n')
+            totals[label] += 1
+    return totals
+
+
+@contextmanager
+def keep_auto_dates(model):
+    """Не даёт auto_now/auto_now_add затереть перенесённые даты."""
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """
+    Загружает объекты из NDJSON пачками через bulk_create.
+
+    Память расходуется только на текущие пачки. Перед записью пачки
+    модели сбрасываются пачки всех моделей, от которых она зависит,
+    поэтому файл в порядке MODELS загружается без нарушения ключей.
+    Файл загружается в одной транзакции: оборванная загрузка ничего
+    не оставляет, и её можно просто запустить заново.
+    """
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.models = {model._meta.label_lower: model for model in MODELS}
+        self.fields = {
+            model: {field.name: field.attname for field in _fields(model)}
+            for model in MODELS
+        }
+        self.pending = {model: [] for model in MODELS}
+        self.totals = {label: 0 for label in self.models}
+
+    def add(self, line):
+        record = json.loads(line)
+        model = self.models[record['model']]
+        names = self.fields[model]
+        self.pending[model].append(model(
+            pk=record['pk'],
+            **{
+                names[name]: value
+                for name, value in record['fields'].items() if name in names
+            }
+        ))
+        if len(self.pending[model]) >= self.chunk_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        """Записывает пачку модели и всех моделей перед ней в MODELS."""
+        last = MODELS.index(model) if model else len(MODELS) - 1
+        for dependency in MODELS[:last + 1]:
+            objects = self.pending[dependency]
+            if not objects:
+                continue
+            with keep_auto_dates(dependency):
+                dependency._default_manager.bulk_create(objects)
+            self.totals[dependency._meta.label_lower] += len(objects)
+            self.pending[dependency] = []
+
+    def load(self, stream):
+        with transaction.atomic():
+            for line in stream:
+                if line.strip():
+                    self.add(line)
+            self.flush()
+            reset_sequences()
+        return self.totals
+
+
+def reset_sequences():
+    """Сдвигает счётчики первичных ключей за загруженные записи."""
+    statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def rebuild_derived():
+    """
+    Пересчитывает то, что при bulk_create не обновили сигналы:
+    счётчики, популярность, поисковый индекс, списки подписок,
+    предложения, ленты и миниатюры, — и сбрасывает закэшированные
+    страницы и карточки.
+    """
+    counters.reconcile()
+    hotness.update()
+    search.rebuild()
+    recommendations.rebuild()
+    user_ids = User.objects.order_by('pk').values_list('pk', flat=True)
+    for user_id in user_ids.iterator():
+        follow_graph.forget(user_id)
+    # Посты «тяжёлых» авторов не раскладываются по лентам.
+    timeline.recount_heavy_authors()
+    readers = Follow.objects.order_by().values_list(
+        'user_id', flat=True
+    ).distinct()
+    for user_id in readers.iterator():
+        timeline.rebuild(user_id)
+    for post_id in Post.objects.exclude(image='').exclude(
+        image__isnull=True
+    ).values_list('id', flat=True).iterator():
+        thumbnails.generate(post_id)
+    _forget_pages()
+
+
+def _chunks(values):
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, settings.TIMELINE_BATCH_SIZE))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _forget_pages():
+    """Сбрасывает все ленты и карточки постов: в кэше — прежние данные."""
+    bump_listings('index', 'popular')
+    for slugs in _chunks(
+        Group.objects.values_list('slug', flat=True).iterator()
+    ):
+        bump_listings(*(f'group:{slug}' for slug in slugs))
+    for users in _chunks(
+        User.objects.values_list('pk', 'username').iterator()
+    ):
+        bump_listings(*(
+            scope for user_id, username in users
+            for scope in (f'profile:{username}', f'follow:{user_id}')
+        ))
+    for post_ids in _chunks(
+        Post.objects.values_list('pk', flat=True).iterator()
+    ):
+        invalidate_post_cards(post_ids)
+        bump_listings(*(f'post:{post_id}' for post_id in post_ids))
@@ -1,10 +1,23 @@
 from django.conf import settings
-from django.core.paginator import Paginator
 
+from core import metrics
 
-def listsing(request, posts):
-    """Паджинатор по 10 постам."""
-    paginator = Paginator(posts, settings.NUM_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+from .paginator import CursorPaginator
+
+
+def listsing(request, posts, per_page=None, **kwargs):
+    """
+    Паджинатор по 10 постам с переходом по курсору. Для других записей
+    передаются свой размер страницы и ключ сортировки (key).
+    """
+    paginator = CursorPaginator(
+        posts, per_page or settings.NUM_OF_POSTS, **kwargs
+    )
+    after, before = request.GET.get('after'), request.GET.get('before')
+    with metrics.LISTING_DURATION.time(
+        kind='cursor' if after or before else 'number'
+    ):
+        page_obj = paginator.get_page(
+            request.GET.get('page'), after=after, before=before
+        )
     return page_obj
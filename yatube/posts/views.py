@@ -1,73 +1,134 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from core.transactions import retry_on_locked
+
+from . import follow_graph, recommendations, thumbnails, timeline
+from .cache import cache_listing
+from .counters import user_counter
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
+from .paginator import COUNT_APPROXIMATE
+from .search import search as search_posts
 from .utils import listsing
 
 User = get_user_model()
 
 
-@cache_page(20 * 15)
+@cache_listing('index')
 def index(request):
     """Главная страница."""
     posts = Post.objects.select_related('author', 'group')
-    context = {
-        'page_obj': listsing(request, posts)
-    }
-    return render(request, 'posts/index.html', context)
+    page_obj = listsing(request, posts)
+    thumbnails.prefetch(page_obj.object_list)
+    return render(request, 'posts/index.html', {'page_obj': page_obj})
 
 
+@cache_listing('popular')
+def popular(request):
+    """Посты по популярности, которую заранее считает update_hot_scores."""
+    posts = Post.objects.select_related('author', 'group')
+    page_obj = listsing(request, posts, key=('hot_score', 'id'))
+    thumbnails.prefetch(page_obj.object_list)
+    return render(request, 'posts/popular.html', {'page_obj': page_obj})
+
+
+@cache_listing('group', 'slug')
 def group_post(request, slug):
     """Посты, отфильтрованные по группам."""
     group = get_object_or_404(Group, slug=slug)
     posts = group.posts.select_related('group', 'author')
+    page_obj = listsing(request, posts)
+    thumbnails.prefetch(page_obj.object_list)
     context = {
         'group': group,
-        'page_obj': listsing(request, posts),
+        'page_obj': page_obj,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_listing('profile', 'username')
 def profile(request, username):
     """Профиль пользователя."""
     username = get_object_or_404(User, username=username)
     posts = username.posts.select_related('author', 'group')
+    page_obj = listsing(request, posts)
+    thumbnails.prefetch(page_obj.object_list)
     if request.user.is_authenticated:
-        following = username.following.exists()
+        following = follow_graph.follows(request.user.pk, username.pk)
         context = {
             'author': username,
-            'page_obj': listsing(request, posts),
+            'counter': user_counter(username.pk),
+            'page_obj': page_obj,
             'following': following,
         }
+        if request.user == username:
+            context['suggestions'] = recommendations.suggestions(
+                request.user.pk
+            )
         return render(request, 'posts/profile.html', context)
     return render(
         request,
         'posts/profile.html',
         {
             'author': username,
-            'page_obj': listsing(request, posts),
+            'counter': user_counter(username.pk),
+            'page_obj': page_obj,
         }
     )
 
 
 def post_detail(request, post_id):
     """Пост подробно"""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'group'), pk=post_id
+    )
+    thumbnails.prefetch([post])
     form = CommentForm()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
+        'counter': user_counter(post.author_id),
+        'comments': listsing(
+            request,
+            comments,
+            settings.NUM_OF_COMMENTS,
+            key=('created', 'id'),
+        ),
         'form': form,
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def search(request):
+    """Поиск по текстам постов и комментариев."""
+    query = request.GET.get('q', '').strip()
+    context = {'query': query}
+    if query:
+        # Точное число найденного не важно: считаем до предела.
+        page_obj = listsing(
+            request,
+            search_posts(query),
+            key=('rank', 'post_id'),
+            count_mode=COUNT_APPROXIMATE,
+        )
+        posts = Post.objects.select_related('author', 'group').in_bulk(
+            [row['post_id'] for row in page_obj]
+        )
+        for row in page_obj:
+            row['object'] = posts.get(row['post_id'])
+        thumbnails.prefetch(posts.values())
+        context['page_obj'] = page_obj
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
+@retry_on_locked
 def post_create(request):
     """Создание поста."""
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if request.method == 'POST':
         if form.is_valid():
             create_post = form.save(commit=False)
@@ -79,6 +140,7 @@ def post_create(request):
 
 
 @login_required
+@retry_on_locked
 def post_edit(request, post_id):
     """Функция страницы редактирования постов."""
     edit_post = get_object_or_404(Post, id=post_id)
@@ -101,6 +163,7 @@ def post_edit(request, post_id):
 
 
 @login_required
+@retry_on_locked
 def add_comment(request, post_id):
     """Комментирование поста."""
     post = get_object_or_404(Post, id=post_id)
@@ -116,28 +179,36 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Посты авторов, на которых подписан пользователь."""
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = timeline.feed(request.user).select_related('author', 'group')
+    page_obj = listsing(request, posts, key=timeline.FEED_KEY)
+    thumbnails.prefetch(page_obj.object_list)
     context = {
-        'page_obj': listsing(request, posts),
+        'page_obj': page_obj,
+        'suggestions': recommendations.suggestions(request.user.pk),
     }
     template = 'posts/follow.html'
     return render(request, template, context)
 
 
 @login_required
+@retry_on_locked
 def profile_follow(request, username):
     """Подписка."""
     author = get_object_or_404(User, username=username)
-    if author != request.user:
+    if author != request.user and not follow_graph.follows(
+        request.user.pk, author.pk
+    ):
         Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("posts:follow_index")
 
 
 @login_required
+@retry_on_locked
 def profile_unfollow(request, username):
     """Отписка."""
     author = get_object_or_404(User, username=username)
-    follower = Follow.objects.filter(user=request.user, author=author)
-    if request.user != author and follower.exists():
-        follower.delete()
+    if request.user != author and follow_graph.follows(
+        request.user.pk, author.pk
+    ):
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
@@ -1,12 +1,46 @@
 import os
+import sys
 
-CACHES = {
-    'default': {
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Идут тесты (manage.py test или pytest): им не место в кэше проекта.
+TESTING = sys.argv[1:2] == ['test'] or 'pytest' in sys.modules
+
+# Кэш общий для всех воркеров. По умолчанию — файл SQLite рядом с проектом,
+# без внешних сервисов; CACHE_BACKEND=memcached или redis переключает
+# на внешний сервер (для redis нужен пакет django-redis). Тесты по
+# умолчанию работают с кэшем в памяти своего процесса.
+CACHE_BACKENDS = {
+    'sqlite': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, 'cache.sqlite3')
+        ),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', 'redis://127.0.0.1:6379/1'
+        ),
+    },
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
 }
 
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHES = {
+    'default': CACHE_BACKENDS[
+        os.environ.get('CACHE_BACKEND', 'locmem' if TESTING else 'sqlite')
+    ],
+}
 
 SECRET_KEY = 'w^5w%yk)q@o5*c-o@fy7yjydws%%z6z+1^nzamixfp1&3e5sn1'
 
@@ -43,14 +77,22 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
-#STATIC_URL = '/static/'
+STATIC_URL = '/static/'
 
-#STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Сюда collectstatic собирает статику: имена с хэшем содержимого,
+# сжатые копии .gz/.br (.br — с пакетом brotli) и манифест staticfiles.json.
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -64,12 +106,66 @@ INTERNAL_IPS = [
     '127.0.0.1',
 ]
 
+# Метрики Prometheus (core.metrics): каждый процесс пишет счётчики в свой
+# файл в METRICS_DIR, /metrics суммирует файлы всех процессов. Файлы
+# завершившихся процессов складываются в общий файл и остаются в сумме,
+# поэтому счётчики не убывают. Пустое значение выключает метрики;
+# в тестах они выключены.
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR', '' if TESTING else os.path.join(BASE_DIR, 'metrics')
+)
+
+# Адреса, которым отвечает /metrics. За обратным прокси на той же машине
+# все запросы приходят с 127.0.0.1, поэтому там нужен METRICS_TOKEN:
+# если он задан, /metrics отвечает только запросам с заголовком
+# «Authorization: Bearer <токен>», с любого адреса.
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Доля запросов, которые замеряет core.middleware.ProfilingMiddleware
+# (0 — ни одного); сводка по адресам — в админке.
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', '0'))
+
+# Снимать у замеряемых запросов стеки раз в PROFILE_STACK_INTERVAL секунд
+# для flame graph.
+PROFILE_STACKS = True
+
+PROFILE_STACK_INTERVAL = 0.005
+
+# Замеры копятся в памяти процесса и пишутся в базу не чаще раза
+# в PROFILE_FLUSH_INTERVAL секунд.
+PROFILE_FLUSH_INTERVAL = 10
+
+# Сколько самых частых стеков хранить для одного адреса.
+PROFILE_MAX_STACKS = 1000
+
 ROOT_URLCONF = 'yatube.urls'
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загрузки хранятся по хэшу содержимого (core.storage): одинаковые файлы
+# занимают место один раз. Миниатюры sorl лежат обычными файлами.
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+THUMBNAIL_STORAGE = 'django.core.files.storage.FileSystemStorage'
+
+# Записи sorl-thumbnail о готовых миниатюрах — в общем кэше, а не в базе.
+THUMBNAIL_KVSTORE = 'core.kvstore.CacheKVStore'
+
+# Каталоги MEDIA_ROOT, файлы в которых не меняются под тем же адресом:
+# веб-сервер должен отдавать их с Cache-Control: max-age=31536000,
+# immutable (при DEBUG так делает core.views.media). Миниатюры sorl
+# в cache/ сюда не входят: их имена считаются по имени исходника,
+# а не по содержимому, и при повторном имени файл меняется.
+MEDIA_IMMUTABLE_DIRS = ('blobs',)
+
+# collect_media не трогает файлы моложе этого срока (секунды): их пост
+# может быть ещё не сохранён.
+MEDIA_GC_GRACE = 60 * 60
+
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 
 TEMPLATES = [
@@ -91,13 +187,74 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
+# Соединения живут CONN_MAX_AGE секунд и переиспользуются запросами
+# того же потока.
+DATABASE_CONN_MAX_AGE = 60
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
     }
 }
 
+# Реплики только для чтения: пути к копиям базы через запятую
+# в DATABASE_REPLICAS. Локально это копии SQLite, которые обновляет
+# команда sync_replicas.
+DATABASE_REPLICA_FILES = [
+    name for name in os.environ.get('DATABASE_REPLICAS', '').split(',')
+    if name
+]
+
+for number, name in enumerate(DATABASE_REPLICA_FILES, 1):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'core.sqlite',
+        'NAME': f'file:{name}?mode=ro',
+        'OPTIONS': {'uri': True},
+        'CONN_MAX_AGE': DATABASE_CONN_MAX_AGE,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# SQLite под параллельную запись (ENGINE core.sqlite): журнал WAL, чтобы
+# чтение не мешало записи, и PRAGMA для каждого соединения.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    # С WAL база не портится и при normal; теряется лишь последняя
+    # транзакция при отключении питания.
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — в КиБ.
+    'cache_size': -64 * 1024,
+    # Сколько миллисекунд ждать чужую блокировку записи.
+    'busy_timeout': 5000,
+}
+
+# Транзакции сразу берут блокировку записи (BEGIN IMMEDIATE).
+SQLITE_BEGIN_IMMEDIATE = True
+
+# Представления с записью повторяются при «database is locked»:
+# число попыток и первая пауза (секунды), дальше она удваивается.
+SQLITE_RETRY_ATTEMPTS = 5
+
+SQLITE_RETRY_DELAY = 0.05
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Страницы, которые читают с реплик.
+REPLICA_VIEWS = (
+    'posts:index',
+    'posts:group_list',
+    'posts:profile',
+    'posts:post_detail',
+    'posts:follow_index',
+)
+
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_STICKY_SECONDS = 10
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -123,14 +280,134 @@ USE_L10N = True
 
 USE_TZ = True
 
-STATIC_URL = '/static/'
-
 NUM_OF_POSTS = 10
 
 NUM_OF_POSTS_3 = 3
 
+NUM_OF_COMMENTS = 20
+
+# Как считать общее число записей для ссылок паджинатора:
+# 'exact', 'cached' или 'approximate'.
+PAGINATOR_COUNT_MODE = 'exact'
+
+PAGINATOR_COUNT_TIMEOUT = 60
+
+PAGINATOR_COUNT_LIMIT = 1000
+
+# Авторы с большим числом подписчиков не раскладываются по лентам.
+TIMELINE_FANOUT_LIMIT = 5000
+
+TIMELINE_HEAVY_AUTHORS_TIMEOUT = 60 * 5
+
+TIMELINE_BATCH_SIZE = 500
+
+# Списки подписок сбрасываются сигналами; срок — страховка от
+# изменений в обход ORM.
+FOLLOW_GRAPH_TIMEOUT = 60 * 60
+
+# «Кого почитать»: сколько предложений хранить и веса связей.
+RECOMMENDATIONS_LIMIT = 10
+
+RECOMMENDATIONS_FOF_WEIGHT = 2
+
+RECOMMENDATIONS_COFOLLOW_WEIGHT = 1
+
+# Популярные авторы не связывают своих читателей, а пользователи
+# с большим числом подписчиков не пересчитывают их предложения сразу.
+RECOMMENDATIONS_FANOUT_LIMIT = 100
+
+# Популярность поста: (1 + комментарии * HOT_COMMENT_WEIGHT
+# + ln(1 + подписчики автора) * HOT_FOLLOWER_WEIGHT)
+# / (возраст в часах + 2) ** HOT_GRAVITY. Пересчитывается командой
+# update_hot_scores только для постов моложе HOT_WINDOW_DAYS дней.
+HOT_COMMENT_WEIGHT = 1
+
+HOT_FOLLOWER_WEIGHT = 1
+
+HOT_GRAVITY = 1.8
+
+HOT_WINDOW_DAYS = 7
+
+# Страницы лент сбрасываются сигналами, поэтому живут долго.
+LISTING_CACHE_TIMEOUT = 60 * 60 * 3
+
+# Карточки постов (includes/post_inc.html) тоже сбрасываются сигналами.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Миниатюры картинок постов, которые готовятся заранее, в фоне:
+# имя размера -> (геометрия, параметры sorl-thumbnail).
+POST_THUMBNAILS = {
+    'card': ('960x339', {'crop': 'center', 'upscale': True}),
+}
+
+# Без воркера очереди картинки обрабатываются в пуле потоков
+# из THUMBNAIL_WORKERS потоков; THUMBNAIL_ASYNC = False — сразу.
+THUMBNAIL_ASYNC = True
+
+THUMBNAIL_WORKERS = 2
+
+# Загрузки больше этого размера пишутся во временный файл, а не в память.
+FILE_UPLOAD_MAX_MEMORY_SIZE = 256 * 1024
+
+# Картинки постов: предельный размер файла и число точек при загрузке.
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 50 * 1000 * 1000
+
+# После загрузки картинка пережимается в POST_IMAGE_FORMAT не больше
+# POST_IMAGE_MAX_SIDE точек по стороне и без метаданных. Картинки меньше
+# POST_IMAGE_KEEP_SIZE байт без метаданных хранятся как есть.
+POST_IMAGE_MAX_SIDE = 2048
+
+POST_IMAGE_FORMAT = 'WEBP'
+
+POST_IMAGE_QUALITY = 80
+
+POST_IMAGE_KEEP_SIZE = 200 * 1024
+
+# Очередь задач (posts.jobs). Задачи записываются в таблицу Job
+# и выполняются командой run_jobs. С JOBS_EAGER=1 (так в тестах) они
+# выполняются в том же процессе после фиксации транзакции запроса:
+# так сайт работает и без воркера.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', '1' if TESTING else '0') == '1'
+
+# Сколько задач воркер выполняет одновременно.
+JOBS_CONCURRENCY = 4
+
+JOBS_MAX_ATTEMPTS = 5
+
+# Пауза перед повтором (секунды), удваивается с каждой попыткой.
+JOBS_RETRY_DELAY = 10
+
+# Задача, которую воркер не закончил за это время, возвращается в очередь.
+JOBS_LOCK_TIMEOUT = 60 * 10
+
+JOBS_POLL_INTERVAL = 1
+
+# Вес вхождения слова в поиске: в тексте поста и в комментарии к нему.
+SEARCH_POST_WEIGHT = 3
+
+SEARCH_COMMENT_WEIGHT = 1
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
 
 LOGOUT_REDIRECT_URL = 'posts:index'
+
+# Пределы для benchmark_views на страницу posts: число SQL-запросов,
+# медианное время ответа (секунды) и пик памяти (байты), с пустым кэшем.
+# 'default' действует для всех страниц, остальные ключи его уточняют.
+PERF_BUDGETS = {
+    'default': {'queries': 10, 'time': 0.1, 'memory': 1024 * 1024},
+    # Главная выводит ссылки на все страницы ленты.
+    'posts:index': {'time': 0.25, 'memory': 8 * 1024 * 1024},
+    # Отписка заодно чистит ленту подписчика и счётчики и проверяет,
+    # не перестал ли автор быть «тяжёлым».
+    'posts:profile_unfollow': {'queries': 13},
+    # Подписка: проверка, запись, два счётчика и две задачи в очередь;
+    # в тестах транзакция открывается двумя запросами (SAVEPOINT, RELEASE).
+    'posts:profile_follow': {'queries': 12},
+    # Слово из каждого поста: ранжируются все совпадения.
+    'posts:search': {'time': 0.25},
+}